@@ -10,6 +10,7 @@ load_dotenv()
 # Use the new graph with evolution loop
 from src.core.graph_builder import build_deep_think_graph
 from src.logging_utils import emit_spec_event
+from src.tools.kb_write_queue import kb_write_queue
 
 
 def parse_args(argv: Optional[list[str]] = None) -> Namespace:
@@ -83,6 +84,9 @@ async def run_pipeline(args: Namespace) -> None:
         import traceback
         traceback.print_exc()
         return
+    finally:
+        # Flush write-behind knowledge-base archives before reporting
+        kb_write_queue.drain()
 
     # Process results
     print("\n--- Pipeline Results ---")
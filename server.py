@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import json
 import logging
+import threading
+import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Set, Tuple
 import time
 from collections import defaultdict
 
@@ -25,6 +28,14 @@ BASE_DIR = Path(__file__).resolve().parent
 KNOWLEDGE_BASE_DIR = BASE_DIR / "knowledge_base"
 KNOWLEDGE_BASE_DIR.mkdir(parents=True, exist_ok=True)
 POLL_INTERVAL_SECONDS = 1.0
+# 交互式请求 (聊天 / 节点展开) 在 LLM 调度器中共享的 tenant
+INTERACTIVE_TENANT = "interactive"
+# 知识库快照分页: 首帧只发摘要 (不含 embedding_preview)，详情按需获取
+SNAPSHOT_PAGE_SIZE = 50
+MAX_SNAPSHOT_PAGE_SIZE = 200
+REFLECTION_EXCERPT_CHARS = 280
+# 每个知识库 websocket 客户端的事件队列上限；溢出时该客户端改为收到整页重同步
+WATCHER_QUEUE_SIZE = 256
 
 logger = logging.getLogger(__name__)
 
@@ -247,6 +258,124 @@ def _list_reflection_files() -> List[Path]:
     return sorted(KNOWLEDGE_BASE_DIR.glob("*.json"))
 
 
+def _summarize_reflection_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Lightweight view of a reflection for snapshots/updates (no vector preview)."""
+    reflection = payload.get("reflection") or ""
+    summary = {key: value for key, value in payload.items() if key != "embedding_preview"}
+    summary["reflection"] = reflection[:REFLECTION_EXCERPT_CHARS]
+    summary["reflection_truncated"] = len(reflection) > REFLECTION_EXCERPT_CHARS
+    return summary
+
+
+class ReflectionPayloadCache:
+    """
+    Parsed reflection payloads keyed by file, invalidated by (mtime, size).
+
+    重连或多个客户端连接时只需 stat 文件，不再重复读取/解析整个 JSON
+    (其中包含 4096 维嵌入)。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, int, Dict[str, Any]]] = {}
+        self._ids: Dict[str, str] = {}  # payload id -> file stem
+
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = path.stem
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+        try:
+            payload = _collect_reflection_payload(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._entries[key] = (stat.st_mtime, stat.st_size, payload)
+            self._ids[payload["id"]] = key
+        return payload
+
+    def scan(self, paths: List[Path]) -> List[Dict[str, Any]]:
+        """Payloads for ``paths``; entries for files no longer present are dropped."""
+        payloads = [payload for payload in (self.get(path) for path in paths) if payload is not None]
+        live = {path.stem for path in paths}
+        with self._lock:
+            for key in set(self._entries) - live:
+                self._entries.pop(key, None)
+            self._ids = {pid: key for pid, key in self._ids.items() if key in live}
+        return payloads
+
+    def detail(self, entry_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            key = self._ids.get(entry_id, entry_id)
+            cached = self._entries.get(key)
+        if cached is None:
+            return self.get(KNOWLEDGE_BASE_DIR / f"{Path(entry_id).name}.json")
+        return cached[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ids.clear()
+
+
+reflection_cache = ReflectionPayloadCache()
+
+
+def _encode_cursor(entry: Dict[str, Any]) -> str:
+    raw = json.dumps([entry.get("created_at") or "", entry.get("id") or ""])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    if not cursor:
+        return None
+    try:
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(entry_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _paginate_reflections(
+    payloads: List[Dict[str, Any]],
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Keyset pagination, newest first.
+
+    游标记录上一页最后一条的 (created_at, id)，新写入的条目不会导致翻页错位。
+    """
+    limit = max(1, min(limit or SNAPSHOT_PAGE_SIZE, MAX_SNAPSHOT_PAGE_SIZE))
+    ordered = sorted(
+        payloads,
+        key=lambda p: (p.get("created_at") or "", p.get("id") or ""),
+        reverse=True,
+    )
+    after = _decode_cursor(cursor)
+    if after is not None:
+        ordered = [p for p in ordered if (p.get("created_at") or "", p.get("id") or "") < after]
+
+    page = ordered[:limit]
+    next_cursor = _encode_cursor(page[-1]) if len(ordered) > limit else None
+    return [_summarize_reflection_payload(p) for p in page], next_cursor
+
+
+async def _load_reflection_payloads() -> Tuple[List[Path], List[Dict[str, Any]]]:
+    """List and parse reflection files off the event loop."""
+    def _scan() -> Tuple[List[Path], List[Dict[str, Any]]]:
+        paths = _list_reflection_files()
+        return paths, reflection_cache.scan(paths)
+
+    return await asyncio.to_thread(_scan)
+
+
 @app.get("/health", tags=["meta"])
 async def health_check() -> Dict[str, str]:
     return {"status": "ok"}
@@ -258,6 +387,171 @@ async def get_available_models():
     return {"models": AVAILABLE_MODELS}
 
 
+class KnowledgeBaseWatcher:
+    """
+    Process-wide knowledge-base poller.
+
+    所有 /ws/knowledge_base 连接共享同一个轮询任务：每个周期只扫描一次目录并计算
+    add/update/delete 差异，再通过每个客户端自己的 asyncio.Queue 分发。
+    没有订阅者时轮询任务自动停止。
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._last_seen: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.scans = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Register a client; the first subscriber primes the baseline and starts polling."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环变化 (如测试中多个 TestClient)：旧任务已不可用
+            self._subscribers.clear()
+            self._task = None
+            self._loop = loop
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=WATCHER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._last_seen = await asyncio.to_thread(self._stat_files)
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @staticmethod
+    def _stat_files() -> Dict[str, float]:
+        seen: Dict[str, float] = {}
+        for path in _list_reflection_files():
+            try:
+                seen[path.stem] = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+        return seen
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        """Scan the directory once and return the events since the previous scan."""
+        self.scans += 1
+        events: List[Dict[str, Any]] = []
+        current_files = _list_reflection_files()
+        current_ids = {path.stem for path in current_files}
+
+        for thread_id in set(self._last_seen) - current_ids:
+            events.append({"type": "delete", "data": {"id": thread_id}})
+            self._last_seen.pop(thread_id, None)
+
+        for path in current_files:
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if self._last_seen.get(path.stem) != modified:
+                payload = reflection_cache.get(path)
+                if payload is not None:
+                    events.append({"type": "update", "data": _summarize_reflection_payload(payload)})
+                self._last_seen[path.stem] = modified
+        return events
+
+    def publish(self, events: List[Dict[str, Any]]) -> None:
+        for queue in list(self._subscribers):
+            for event in events:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # 慢客户端：丢弃积压事件，让其重新拉取快照
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait({"type": "resync"})
+                    break
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+            try:
+                events = await asyncio.to_thread(self.poll_once)
+            except Exception as exc:  # pragma: no cover - defensive guard
+                logger.exception("Knowledge base watcher scan failed", exc_info=exc)
+                continue
+            if events:
+                self.publish(events)
+
+
+# Global knowledge-base watcher instance
+kb_watcher = KnowledgeBaseWatcher()
+
+
+@app.get("/api/knowledge_base/entries", tags=["knowledge_base"], dependencies=[Depends(rate_limiter)])
+async def list_knowledge_base_entries(cursor: Optional[str] = None, limit: Optional[int] = None):
+    """Paginated reflection summaries (newest first)."""
+    _, payloads = await _load_reflection_payloads()
+    page, next_cursor = _paginate_reflections(payloads, cursor, limit)
+    return {"data": page, "next_cursor": next_cursor, "total": len(payloads)}
+
+
+@app.get("/api/knowledge_base/entries/{entry_id}", tags=["knowledge_base"], dependencies=[Depends(rate_limiter)])
+async def get_knowledge_base_entry(entry_id: str):
+    """Full reflection payload, including the vector preview."""
+    payload = await asyncio.to_thread(reflection_cache.detail, entry_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Entry not found")
+    return payload
+
+
+async def _serve_knowledge_base_requests(websocket: WebSocket) -> None:
+    """
+    Handle client requests on the knowledge-base socket:
+
+    - {"type": "page", "cursor": str, "limit": int} -> 下一页摘要
+    - {"type": "detail", "id": str}                  -> 单条完整载荷
+    """
+    while True:
+        message = await websocket.receive_json()
+        if not isinstance(message, dict):
+            continue
+        request_type = message.get("type")
+        if request_type == "page":
+            _, payloads = await _load_reflection_payloads()
+            try:
+                limit = int(message["limit"]) if message.get("limit") else None
+            except (TypeError, ValueError):
+                limit = None
+            page, next_cursor = _paginate_reflections(payloads, message.get("cursor"), limit)
+            await websocket.send_json({
+                "type": "page",
+                "data": page,
+                "next_cursor": next_cursor,
+                "total": len(payloads),
+            })
+        elif request_type == "detail":
+            entry_id = str(message.get("id") or "")
+            payload = await asyncio.to_thread(reflection_cache.detail, entry_id) if entry_id else None
+            if payload is None:
+                await websocket.send_json({"type": "error", "data": {"id": entry_id, "message": "Entry not found"}})
+            else:
+                await websocket.send_json({"type": "detail", "data": payload})
+
+
+async def _send_knowledge_base_snapshot(websocket: WebSocket) -> None:
+    _, payloads = await _load_reflection_payloads()
+    page, next_cursor = _paginate_reflections(payloads)
+    await websocket.send_json({
+        "type": "snapshot",
+        "data": page,
+        "next_cursor": next_cursor,
+        "total": len(payloads),
+    })
+
+
 @app.websocket("/ws/knowledge_base")
 async def knowledge_base_updates(websocket: WebSocket) -> None:
     # Security: Rate Limit
@@ -266,32 +560,27 @@ async def knowledge_base_updates(websocket: WebSocket) -> None:
 
     await websocket.accept()
 
-    reflection_files = _list_reflection_files()
-    snapshot = [_collect_reflection_payload(path) for path in reflection_files]
-    await websocket.send_json({"type": "snapshot", "data": snapshot})
-
-    last_seen: Dict[str, float] = {path.stem: path.stat().st_mtime for path in reflection_files}
+    # 先订阅再取快照：快照之后的变化一定会经由队列送达 (重复的 update 对客户端是幂等的)
+    events = await kb_watcher.subscribe()
+    requests_task: Optional[asyncio.Task] = None
 
     try:
-        while True:
-            await asyncio.sleep(POLL_INTERVAL_SECONDS)
-
-            current_files = _list_reflection_files()
-            current_ids = {path.stem for path in current_files}
+        await _send_knowledge_base_snapshot(websocket)
+        requests_task = asyncio.create_task(_serve_knowledge_base_requests(websocket))
 
-            # Detect deletions
-            removed_ids = set(last_seen.keys()) - current_ids
-            for thread_id in removed_ids:
-                await websocket.send_json({"type": "delete", "data": {"id": thread_id}})
-                last_seen.pop(thread_id, None)
-
-            # Detect new or updated files
-            for path in current_files:
-                modified = path.stat().st_mtime
-                if last_seen.get(path.stem) != modified:
-                    payload = _collect_reflection_payload(path)
-                    await websocket.send_json({"type": "update", "data": payload})
-                    last_seen[path.stem] = modified
+        while True:
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({getter, requests_task}, return_when=asyncio.FIRST_COMPLETED)
+            if requests_task in done:
+                getter.cancel()
+                requests_task.result()  # 传播 WebSocketDisconnect
+                return
+
+            event = getter.result()
+            if event["type"] == "resync":
+                await _send_knowledge_base_snapshot(websocket)
+            else:
+                await websocket.send_json(event)
 
     except WebSocketDisconnect:
         ws_limiter.disconnect(websocket)
@@ -300,20 +589,28 @@ async def knowledge_base_updates(websocket: WebSocket) -> None:
         logger.exception("Knowledge base websocket crashed", exc_info=exc)
         ws_limiter.disconnect(websocket)
         await websocket.close(code=1011)
+    finally:
+        kb_watcher.unsubscribe(events)
+        if requests_task is not None:
+            requests_task.cancel()
 
 
 # --- Simulation Control & Telemetry ---
 
-import base64
 from typing import Literal
 from pydantic import BaseModel, Field, field_validator
 from fastapi.responses import StreamingResponse
-from google import genai
 from google.genai import types
 from src.core.graph_builder import build_deep_think_graph
+from src.core.progress import progress_reporter
 from src.core.state import DeepThinkState
+from src.llm_clients import llm_clients
+from src.llm_scheduler import PRIORITY_INTERACTIVE, llm_scheduler
+from src.llm_call_policy import llm_call_policy
 from src.strategy_architect import expand_strategy_node
 from src.tools.ask_human import hil_manager
+from src.tools.kb_write_queue import kb_write_queue
+from src.tools.kb_maintenance import kb_maintainer
 
 class ChatRequest(BaseModel):
     message: str = Field(..., max_length=50000, description="User message limited to 50k chars")
@@ -365,6 +662,14 @@ class SimulationConfig(BaseModel):
     max_iterations: int = Field(10, ge=1, le=100, description="Max iterations (1-100)")
     entropy_change_threshold: float = Field(0.1, ge=0.0, le=1.0, description="Convergence threshold (0.0-1.0)")
     total_child_budget: int = Field(6, ge=1, le=50, description="Total child budget (1-50)")
+    executor_concurrency: int = Field(4, ge=1, le=20, description="Concurrent Executor strategy tasks (1-20)")
+    executor_streaming: bool = True  # Stream partial Executor output as executor_progress events
+    judge_concurrency: int = Field(4, ge=1, le=20, description="Concurrent Judge evaluations (1-20)")
+    judge_batch_size: int = Field(1, ge=1, le=10, description="Strategies scored per Judge call (1 = per-strategy)")
+    # Judge score cache policy; None defers to JUDGE_REJUDGE_POLICY / the Judge default (strict)
+    judge_rejudge_policy: Optional[Literal["on_change", "strict", "always"]] = None
+    judge_max_reuse: int = Field(2, ge=0, le=20, description="Max consecutive cached Judge scores per strategy (0-20)")
+    execution_mode: Literal["phased", "fanout"] = "phased"  # fanout: per-strategy executor→judge chains
     # NOTE: LLM temperature is always 1.0 (Logic Manifold Integrity)
     # System temperature τ controls resource allocation only (see temperature_helper.py)
 
@@ -435,10 +740,13 @@ class SimulationManager:
 
     async def run_graph(self, problem: str, config: SimulationConfig):
         self.is_running = True
+        # Nodes run in worker threads; streamed progress is scheduled back onto this loop
+        progress_reporter.set_broadcast_func(self.broadcast)
         await self.broadcast({"type": "status", "data": "started"})
         
         try:
             print(f"Building graph for: {problem} with config {config}")
+            # Built inside the event loop, so the async node implementations are wired in
             graph_app = build_deep_think_graph()
             
             initial_state: DeepThinkState = {
@@ -481,6 +789,11 @@ class SimulationManager:
                 "propagation": "🌱 Propagation"
                 # Note: writer removed - report generation is now dynamically handled by Executor
             }
+            # fanout 模式的节点沿用已有的展示 (前端 AgentPhase 不变)
+            node_aliases = {
+                "strategy_chain": "executor",
+                "chain_merge": "judge",
+            }
             
             current_agent = None
 
@@ -493,6 +806,7 @@ class SimulationManager:
                     print(f"[Stream] Node: {node_name}")
                     
                     # Determine the agent from node name
+                    node_name = node_aliases.get(node_name, node_name)
                     agent_key = node_name if node_name in agent_names else None
                     
                     if agent_key and agent_key != current_agent:
@@ -560,6 +874,9 @@ class SimulationManager:
             logger.exception("Simulation failed")
             await self.broadcast({"type": "error", "data": GENERIC_ERROR_MESSAGE})
         finally:
+            # Flush write-behind knowledge-base archives queued during the run
+            await asyncio.to_thread(kb_write_queue.drain)
+            progress_reporter.clear()
             self.is_running = False
             self.current_task = None
 
@@ -570,7 +887,10 @@ async def start_simulation(req: SimulationRequest):
     if sim_manager.is_running:
         return {"status": "error", "message": "Simulation already running"}
     
-    sim_manager.current_task = asyncio.create_task(sim_manager.run_graph(req.problem, req.config))
+    # The task copies the current context, so every LLM call made by this run shares
+    # one fair-queuing tenant in the scheduler
+    with llm_scheduler.context(tenant=f"simulation-{uuid.uuid4().hex[:8]}"):
+        sim_manager.current_task = asyncio.create_task(sim_manager.run_graph(req.problem, req.config))
     return {"status": "started", "problem": req.problem}
 
 @app.get("/api/simulation/stop", dependencies=[Depends(rate_limiter)])
@@ -589,11 +909,14 @@ async def expand_node_endpoint(req: ExpandNodeRequest):
     """
     try:
         # Pydantic validates the request body against ExpandNodeRequest
-        content = expand_strategy_node(
-            rationale=req.rationale,
-            context=req.context,
-            model_name=req.model_name
-        )
+        # Runs off the event loop; the context makes its LLM call interactive priority
+        with llm_scheduler.context(priority=PRIORITY_INTERACTIVE, tenant=INTERACTIVE_TENANT):
+            content = await asyncio.to_thread(
+                expand_strategy_node,
+                rationale=req.rationale,
+                context=req.context,
+                model_name=req.model_name
+            )
         return {"expanded_content": content}
     except Exception as e:
         logger.error(f"Error in expand_node_endpoint: {e}")
@@ -635,7 +958,7 @@ async def chat_stream_endpoint(req: ChatRequest):
     
     async def generate():
         try:
-            client = genai.Client(api_key=api_key)
+            client = llm_clients.get_genai_client(api_key)
             
             # Build content parts
             contents = []
@@ -665,16 +988,17 @@ async def chat_stream_endpoint(req: ChatRequest):
                 temperature=1.0,  # Logic Manifold Integrity
             )
             
-            # Stream response
-            response = client.models.generate_content_stream(
-                model=req.model_name,
-                contents=contents,
-                config=config,
-            )
-            
-            for chunk in response:
-                if chunk.text:
-                    yield f"data: {json.dumps({'text': chunk.text})}\n\n"
+            # Stream response (interactive priority: jumps ahead of queued graph work)
+            async with llm_scheduler.aslot(req.model_name, priority=PRIORITY_INTERACTIVE, tenant=INTERACTIVE_TENANT):
+                response = await client.aio.models.generate_content_stream(
+                    model=req.model_name,
+                    contents=contents,
+                    config=config,
+                )
+                
+                async for chunk in response:
+                    if chunk.text:
+                        yield f"data: {json.dumps({'text': chunk.text})}\n\n"
             
             yield f"data: {json.dumps({'done': True})}\n\n"
             
@@ -685,6 +1009,47 @@ async def chat_stream_endpoint(req: ChatRequest):
     return StreamingResponse(generate(), media_type="text/event-stream")
 
 
+# --- LLM Scheduler ---
+
+@app.get("/api/llm/metrics", tags=["meta"], dependencies=[Depends(rate_limiter)])
+async def get_llm_metrics():
+    """Scheduler queue / wait statistics plus per-agent deadline and hedging counters."""
+    metrics = {**llm_scheduler.metrics(), "calls": llm_call_policy.metrics()}
+    if llm_clients.fake is not None:
+        metrics["fake"] = llm_clients.fake.metrics()
+    return metrics
+
+
+# --- Knowledge Base Maintenance ---
+
+class KnowledgeBaseMaintenanceRequest(BaseModel):
+    incremental: bool = True
+    dry_run: bool = False
+
+
+# Background maintenance is opt-in: set KB_MAINTENANCE_INTERVAL_SECONDS to enable
+_kb_maintenance_interval = os.environ.get("KB_MAINTENANCE_INTERVAL_SECONDS")
+if _kb_maintenance_interval:
+    try:
+        kb_maintainer.interval_seconds = float(_kb_maintenance_interval)
+        kb_maintainer.start()
+    except ValueError:
+        logger.warning(f"Invalid KB_MAINTENANCE_INTERVAL_SECONDS: {_kb_maintenance_interval!r}")
+
+
+@app.post("/api/knowledge_base/maintenance", tags=["knowledge_base"], dependencies=[Depends(rate_limiter)])
+async def run_kb_maintenance(req: KnowledgeBaseMaintenanceRequest):
+    """Run a knowledge-base maintenance pass (dedup merge, TTL, capacity eviction) on demand."""
+    try:
+        report = await asyncio.to_thread(
+            kb_maintainer.run_once, incremental=req.incremental, dry_run=req.dry_run
+        )
+        return {"status": "ok", "report": report.to_dict()}
+    except Exception as e:
+        logger.error(f"Knowledge base maintenance failed: {e}")
+        return {"status": "error", "message": GENERIC_ERROR_MESSAGE}
+
+
 # --- Human-in-the-Loop API ---
 
 @app.post("/api/hil/response", tags=["hil"], dependencies=[Depends(rate_limiter)])
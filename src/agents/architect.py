@@ -12,12 +12,15 @@ import os
 import json
 from typing import List, Dict, Any
 
-from google import genai
 from google.genai import types
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import LLMUnavailableError, llm_call_policy
+from src.llm_cache import LLMCacheMiss
 
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
 
 
@@ -106,7 +109,47 @@ def _format_strategies_for_prompt(strategies: List[StrategyNode]) -> str:
     return "\n\n".join(lines)
 
 
+def _resolve_strategy_ids(
+    decisions: List[Dict[str, Any]],
+    strategies: List[StrategyNode],
+) -> List[Dict[str, Any]]:
+    """
+    Map the 8-char id prefixes shown in the prompt ("[1a2b3c4d...]") back to full ids.
+
+    Executor 按完整 id 查找策略；唯一匹配的前缀会被替换，其他值原样保留。
+    """
+    ids = [s["id"] for s in strategies]
+    for decision in decisions:
+        if not isinstance(decision, dict):
+            continue
+        strategy_id = decision.get("strategy_id")
+        if not isinstance(strategy_id, str) or strategy_id in ids:
+            continue
+        prefix = strategy_id.strip("[]").rstrip(".")
+        matches = [full for full in ids if prefix and full.startswith(prefix)]
+        if len(matches) == 1:
+            decision["strategy_id"] = matches[0]
+    return decisions
+
+
+def _fallback_decisions(strategies: List[StrategyNode]) -> List[Dict[str, Any]]:
+    """Default schedule (continue every allocated strategy) when the LLM answer is unusable."""
+    return [
+        {
+            "strategy_id": s["id"],
+            "executor_instruction": "继续探索此策略方向",
+            "context_injection": ""
+        }
+        for s in strategies
+    ]
+
+
 def architect_scheduler_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see architect_scheduler_node_async."""
+    return run_coroutine_sync(architect_scheduler_node_async(state))
+
+
+async def architect_scheduler_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Architect Scheduler Node - 战略调度官
     
@@ -126,11 +169,11 @@ def architect_scheduler_node(state: DeepThinkState) -> DeepThinkState:
     
     if not active_strategies:
         print("[Architect] No active strategies with allocation to schedule.")
-        return {
+        return with_context_ledger({
             **state,
             "architect_decisions": [],
             "history": state.get("history", []) + ["Architect: no strategies to schedule"]
-        }
+        })
     
     api_key = os.environ.get("GEMINI_API_KEY")
     use_mock = os.environ.get("USE_MOCK_AGENTS", "false").lower() == "true" or not api_key
@@ -153,7 +196,7 @@ def architect_scheduler_node(state: DeepThinkState) -> DeepThinkState:
         print(f"[Architect] Using model: {model_name}")
         
         # 决策类 Agent: JSON 输出 + thinking_level，不需要 Grounding
-        client = genai.Client(api_key=api_key)
+        client = llm_clients.get_genai_client(api_key)
         
         # 从 config 读取 thinking_level (Gemini 3: MINIMAL, LOW, MEDIUM, HIGH)
         config_data = state.get("config", {})
@@ -174,45 +217,49 @@ def architect_scheduler_node(state: DeepThinkState) -> DeepThinkState:
         )
         
         try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=config,
+            response = await llm_call_policy.call(
+                "architect", model_name,
+                lambda: client.aio.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=config,
+                ),
             )
             
             try:
                 decisions = json.loads(response.text)
                 if not isinstance(decisions, list):
                     decisions = [decisions]
+                decisions = _resolve_strategy_ids(decisions, active_strategies)
             except json.JSONDecodeError:
                 print("[Architect] Failed to parse response, using fallback.")
-                decisions = [
-                    {
-                        "strategy_id": s["id"],
-                        "executor_instruction": "继续探索此策略方向",
-                        "context_injection": ""
-                    }
-                    for s in active_strategies
-                ]
+                decisions = _fallback_decisions(active_strategies)
                 
-        except Exception as e:
-            print(f"[Architect] Error: {e}")
+        except LLMUnavailableError as e:
+            # 模型不可用时 Executor 也无法执行，跳过本轮调度
+            print(f"[Architect] LLM unavailable, skipping this round: {e}")
             decisions = []
+        except LLMCacheMiss:
+            # 回放缺失记录时不能静默回退，否则回放结果与录制不一致
+            raise
+        except Exception as e:
+            print(f"[Architect] Error: {e}, using fallback.")
+            decisions = _fallback_decisions(active_strategies)
     
     print(f"[Architect] Created {len(decisions)} execution decisions.")
     
     for d in decisions[:3]:  # Print first 3
-        sid = d.get("strategy_id", "?")[:8]
+        sid = str(d.get("strategy_id", "?"))[:8]
         instr = d.get("executor_instruction", "")[:50]
         print(f"  > [{sid}...] {instr}...")
     
-    return {
+    return with_context_ledger({
         **state,
         "architect_decisions": decisions,
         "history": state.get("history", []) + [
             f"Architect: scheduled {len(decisions)} execution tasks"
         ]
-    }
+    })
 
 
 # Legacy function for backward compatibility
@@ -6,10 +6,15 @@ Distiller Agent - 信息蒸馏器
 """
 
 import os
+import re
 from typing import List, Optional, Dict, Any
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import llm_call_policy
+from src.llm_cache import LLMCacheMiss
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import ledger_token_count, update_context_ledger, with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
 
 
@@ -17,32 +22,13 @@ def estimate_token_count(state: DeepThinkState) -> int:
     """
     Estimate the token count of current state context.
     
-    Uses a rough estimate of 4 characters per token for Chinese/mixed content.
+    Counts the problem, research / judge context, every strategy's rationale,
+    assumption and trajectory, and the history. Sizes come from the incrementally
+    maintained state["context_ledger"], so only entries appended since the last
+    update are measured (rough estimate of 4 characters per token unless
+    CONTEXT_TOKENIZER is set).
     """
-    total_chars = 0
-    
-    # Problem state
-    total_chars += len(state.get("problem_state", ""))
-    
-    # Research context
-    total_chars += len(state.get("research_context", "") or "")
-    
-    # Judge context
-    total_chars += len(state.get("judge_context", "") or "")
-    
-    # Strategies (trajectories can get long)
-    for s in state.get("strategies", []):
-        total_chars += len(s.get("rationale", ""))
-        total_chars += len(s.get("assumption", ""))
-        for t in s.get("trajectory", []):
-            total_chars += len(t)
-    
-    # History
-    for h in state.get("history", []):
-        total_chars += len(h)
-    
-    # Rough estimate: 4 chars per token for mixed Chinese/English
-    return total_chars // 4
+    return ledger_token_count(update_context_ledger(state))
 
 
 def should_distill(state: DeepThinkState) -> bool:
@@ -96,9 +82,9 @@ def _get_llm():
     
     model_name = os.environ.get("GEMINI_MODEL_DISTILLER", 
                                 os.environ.get("GEMINI_MODEL", "gemini-1.5-flash"))
-    return ChatGoogleGenerativeAI(
+    return llm_clients.get_chat_model(
         model=model_name,
-        google_api_key=api_key,
+        api_key=api_key,
         temperature=1.0,  # Logic Manifold Integrity
     )
 
@@ -146,6 +132,11 @@ def _summarize_history(history: List[str], limit: int = 5) -> str:
 
 
 def distiller_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see distiller_node_async."""
+    return run_coroutine_sync(distiller_node_async(state))
+
+
+async def distiller_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Distills the raw research context into a concise, actionable summary
     and injects it into the problem state.
@@ -190,23 +181,25 @@ def distiller_node(state: DeepThinkState) -> DeepThinkState:
     chain = prompt | llm | StrOutputParser()
     
     try:
-        summary = chain.invoke({
+        summary = await llm_call_policy.call("distiller", llm.model, lambda: chain.ainvoke({
             "problem": state["problem_state"],
             "context": context
-        })
+        }))
         
         print(f"[Distiller] Distilled summary length: {len(summary)} chars.")
         
         # Inject into problem state
         new_problem_state = f"{state['problem_state']}\n\n[背景补充]:\n{summary}"
         
-        return {
+        return with_context_ledger({
             **state,
             "problem_state": new_problem_state,
             "research_context": summary,
             "history": state.get("history", []) + ["Distiller refined context"]
-        }
+        })
         
+    except LLMCacheMiss:
+        raise
     except Exception as e:
         print(f"[Distiller] Error: {e}")
         return state
@@ -252,6 +245,29 @@ def generate_judge_context(state: DeepThinkState) -> str:
     return "\n".join(lines)
 
 
+# generate_judge_context 中每轮都会变化、与单个策略评分无关的部分：
+# 迭代指标 (迭代次数 / τ / 熵)、最近事件日志，以及 Judge 自己上一轮输出的分数
+JUDGE_CONTEXT_VOLATILE_SECTIONS = ("当前状态", "最近事件")
+_SCORE_ANNOTATION_RE = re.compile(r" \(score: -?[\d.]+\)")
+
+
+def stable_judge_context(judge_context: Optional[str]) -> Optional[str]:
+    """
+    The parts of a Judge context that a strategy's score depends on.
+
+    用于 Judge 评分缓存的 strict 键：只保留问题概述与策略概览 (去掉分数)，
+    否则每轮都会变化的指标会让缓存永远无法命中。
+    """
+    if not judge_context:
+        return judge_context
+    sections = judge_context.split("\n## ")
+    kept = [
+        section for section in sections
+        if section.lstrip("# ").split("\n", 1)[0].strip() not in JUDGE_CONTEXT_VOLATILE_SECTIONS
+    ]
+    return _SCORE_ANNOTATION_RE.sub("", "\n## ".join(kept))
+
+
 def distiller_for_judge_node(state: DeepThinkState) -> DeepThinkState:
     """
     Distiller node that runs BEFORE Judge to prepare clean context.
@@ -266,8 +282,8 @@ def distiller_for_judge_node(state: DeepThinkState) -> DeepThinkState:
     
     print(f"[Distiller] Judge context prepared ({len(judge_context)} chars)")
     
-    return {
+    return with_context_ledger({
         **state,
         "judge_context": judge_context,
-    }
+    })
 
@@ -4,11 +4,15 @@ import numpy as np
 import os
 from typing import List, Dict
 
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
 from src.math_engine.kde import gaussian_kernel_log_density, estimate_density, estimate_bandwidth, compute_kde_optimized
+from src.math_engine.bandwidth_cache import bandwidth_cache
 from src.math_engine.temperature import calculate_effective_temperature, calculate_normalized_temperature
 from src.math_engine.ucb import batch_calculate_ucb
 from src.embedding_client import embed_text, embed_strategies
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+from src.tools.embedding_pipeline import embedding_pipeline
 
 
 def calculate_boltzmann_allocation(
@@ -119,10 +123,17 @@ def evolution_node(state: DeepThinkState) -> DeepThinkState:
 
     # Parallel embedding of new strategies
     strategies_to_embed = [s for s in active_strategies if not s.get("embedding")]
+    if strategies_to_embed:
+        # Propagation 已在后台提交了子策略的嵌入，这里只取回结果
+        prefetched = embedding_pipeline.collect(strategies_to_embed)
+        if prefetched:
+            print(f"  > {prefetched} embeddings prefetched by the propagation pipeline")
+            strategies_to_embed = [s for s in strategies_to_embed if not s.get("embedding")]
     if strategies_to_embed:
         print(f"  > Batch embedding {len(strategies_to_embed)} new strategies...")
         # embed_strategies modifies objects in place
-        embed_strategies(strategies_to_embed)
+        with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+            embed_strategies(strategies_to_embed)
 
         # Check for failures
         for s in strategies_to_embed:
@@ -144,7 +155,9 @@ def evolution_node(state: DeepThinkState) -> DeepThinkState:
     # 2. Density Estimation (KDE) with AUTO BANDWIDTH (Silverman rule)
     # Optimized: Use single pass to compute bandwidth and log densities
     bandwidth, log_densities = compute_kde_optimized(embeddings)
-    print(f"  [KDE] Auto bandwidth: {bandwidth:.6f}")
+    # Publish ε so knowledge-base recall reuses it instead of recomputing O(N²·D) distances
+    population_version = bandwidth_cache.publish(embeddings, bandwidth)
+    print(f"  [KDE] Auto bandwidth: {bandwidth:.6f} (population v{population_version})")
     
     densities = np.exp(log_densities)
     
@@ -215,7 +228,7 @@ def evolution_node(state: DeepThinkState) -> DeepThinkState:
     # Store previous entropy for convergence detection (entropy change rate)
     prev_entropy = state.get("spatial_entropy", None)
     
-    return {
+    return with_context_ledger({
         **state,
         "strategies": strategies,  # Explicit return to ensure updated UCB scores are broadcast
         "spatial_entropy": spatial_entropy,
@@ -227,5 +240,5 @@ def evolution_node(state: DeepThinkState) -> DeepThinkState:
             f"Evolution iter {iteration_count}: entropy={spatial_entropy:.3f}, tau={tau:.3f}, "
             f"allocated {total_budget} children to {strategies_with_children}/{len(valid_active)} strategies"
         ]
-    }
+    })
 
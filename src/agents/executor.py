@@ -13,18 +13,75 @@ Executor Agent - 策略执行器
 
 import os
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
-from google import genai
 from google.genai import types
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import LLMPartialOutputError, LLMUnavailableError, llm_call_policy
+from src.llm_cache import LLMCacheMiss
 
+from src.core.async_helper import gather_bounded, run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
+from src.core.progress import progress_reporter
 from src.core.state import DeepThinkState, StrategyNode
-from src.tools.knowledge_base import write_strategy_archive
+from src.tools.kb_write_queue import kb_write_queue
 
 
+# 同时在途的策略任务数上限 (config["executor_concurrency"] 或环境变量 EXECUTOR_CONCURRENCY)
+DEFAULT_EXECUTOR_CONCURRENCY = 4
+
+# 流式输出的 WebSocket 事件类型 (config["executor_streaming"] 或环境变量 EXECUTOR_STREAMING 开启)
+EXECUTOR_PROGRESS_EVENT = "executor_progress"
+
+
+async def _generate_text(
+    client: Any,
+    model_name: str,
+    prompt: str,
+    config: types.GenerateContentConfig,
+    on_text: Optional[Callable[[str], None]] = None,
+    agent: str = "executor",
+) -> str:
+    """
+    Run one grounded generation and return the full response text.
+
+    on_text 不为空时使用 generate_content_stream，每个增量文本块都会回调一次；
+    返回值与非流式调用相同，因此后续 JSON 解析不变。流式调用已经把部分文本
+    推给了前端，不能重复发起，因此不做对冲；只有尚未输出任何文本时的失败会被重试。
+    """
+    if on_text is None:
+        response = await llm_call_policy.call(
+            agent, model_name,
+            lambda: client.aio.models.generate_content(
+                model=model_name,
+                contents=prompt,
+                config=config,
+            ),
+        )
+        return response.text
+
+    async def _stream() -> str:
+        parts: List[str] = []
+        try:
+            async for chunk in await client.aio.models.generate_content_stream(
+                model=model_name,
+                contents=prompt,
+                config=config,
+            ):
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    on_text(text)
+        except Exception as e:
+            if parts:
+                raise LLMPartialOutputError(f"Stream failed after {len(parts)} chunks: {e}") from e
+            raise
+        return "".join(parts)
+
+    return await llm_call_policy.call(agent, model_name, _stream, hedge=False)
+
 
 EXECUTOR_PROMPT_TEMPLATE = """\
 你是一位"策略执行专家"，拥有 Google Search Grounding 工具能力（如需要可以搜索外部信息）。
@@ -70,7 +127,23 @@ def execute_single_task(
     decision: Dict[str, Any],
     api_key: str,
     use_mock: bool = False,
-    thinking_level: str = "HIGH"
+    thinking_level: str = "HIGH",
+    on_text: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    """Sync wrapper around execute_single_task_async."""
+    return run_coroutine_sync(execute_single_task_async(
+        problem, strategy, decision, api_key, use_mock, thinking_level, on_text
+    ))
+
+
+async def execute_single_task_async(
+    problem: str,
+    strategy: StrategyNode,
+    decision: Dict[str, Any],
+    api_key: str,
+    use_mock: bool = False,
+    thinking_level: str = "HIGH",
+    on_text: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
     """
     Execute a single task for a strategy based on Architect's decision.
@@ -81,20 +154,24 @@ def execute_single_task(
         decision: Architect's decision containing executor_instruction and context_injection
         api_key: API key for LLM
         use_mock: Whether to run in mock mode
+        on_text: Optional callback for streamed partial text (enables streaming)
         
     Returns:
         Execution result dictionary
     """
     if use_mock:
-        return {
+        result = {
             "execution_result": f"Mock execution for {strategy['name']}: Task completed successfully.",
             "new_insights": ["Mock insight 1", "Mock insight 2"],
             "next_steps": ["Continue exploration", "Validate assumption"],
             "variant_strategy": None
         }
+        if on_text:
+            on_text(result["execution_result"])
+        return result
     
     # Initialize client with grounding
-    client = genai.Client(api_key=api_key)
+    client = llm_clients.get_genai_client(api_key)
     grounding_tool = types.Tool(google_search=types.GoogleSearch())
     
     model_name = os.environ.get(
@@ -118,18 +195,14 @@ def execute_single_task(
     )
     
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config=config,
-        )
+        text = await _generate_text(client, model_name, prompt, config, on_text)
         
         import json
         try:
-            result = json.loads(response.text)
+            result = json.loads(text)
         except json.JSONDecodeError:
             result = {
-                "execution_result": response.text,
+                "execution_result": text,
                 "new_insights": [],
                 "next_steps": [],
                 "variant_strategy": None
@@ -137,6 +210,18 @@ def execute_single_task(
         
         return result
         
+    except LLMUnavailableError as e:
+        # 模型不可用 (重试耗尽 / 熔断)：跳过本任务，不把错误写进策略轨迹
+        print(f"[Executor] Skipping task for '{strategy.get('name')}': {e}")
+        return {
+            "execution_result": "",
+            "new_insights": [],
+            "next_steps": [],
+            "variant_strategy": None,
+            "skipped": True
+        }
+    except LLMCacheMiss:
+        raise
     except Exception as e:
         print(f"[Executor] Error executing task: {e}")
         return {
@@ -208,7 +293,27 @@ def execute_synthesis_task(
     report_version: int,
     api_key: str,
     use_mock: bool = False,
-    thinking_level: str = "HIGH"
+    thinking_level: str = "HIGH",
+    on_text: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
+    """Sync wrapper around execute_synthesis_task_async."""
+    return run_coroutine_sync(execute_synthesis_task_async(
+        problem, strategies, decision, research_context, existing_report,
+        report_version, api_key, use_mock, thinking_level, on_text
+    ))
+
+
+async def execute_synthesis_task_async(
+    problem: str,
+    strategies: List[StrategyNode],
+    decision: Dict[str, Any],
+    research_context: Optional[str],
+    existing_report: Optional[str],
+    report_version: int,
+    api_key: str,
+    use_mock: bool = False,
+    thinking_level: str = "HIGH",
+    on_text: Optional[Callable[[str], None]] = None
 ) -> Dict[str, Any]:
     """
     Execute a synthesis/report task (when strategy_id is null).
@@ -216,7 +321,7 @@ def execute_synthesis_task(
     After synthesis, the strategies will be HARD PRUNED.
     Their value is preserved in:
     1. The report itself
-    2. Knowledge base vector database (via write_strategy_archive)
+    2. Knowledge base vector database (via kb_write_queue.enqueue_strategy_archive)
     
     Args:
         problem: Original problem statement
@@ -227,6 +332,7 @@ def execute_synthesis_task(
         report_version: Current report version number
         api_key: API key for LLM
         use_mock: Whether to run in mock mode
+        on_text: Optional callback for streamed partial text (enables streaming)
         
     Returns:
         Synthesis result containing report and prune_strategy_ids
@@ -236,13 +342,16 @@ def execute_synthesis_task(
     prune_ids = [s["id"] for s in active_strategies]
     
     if use_mock:
-        return {
+        result = {
             "report": f"# Mock 阶段性报告 v{report_version + 1}\n\n问题: {problem[:100]}...\n\n## 主要发现\n- Mock finding 1\n- Mock finding 2\n\n## 被综合策略\n{len(active_strategies)} 条策略已综合\n\n## 推荐方案\nMock recommendation.",
             "report_summary": "Mock synthesis completed",
             "key_findings": ["Mock finding 1", "Mock finding 2"],
             "branch_rationale": "Mock branch rationale for pruning decision",
             "prune_strategy_ids": prune_ids
         }
+        if on_text:
+            on_text(result["report"])
+        return result
     
     # Format detailed strategies for pruning notification
     sorted_strategies = sorted(active_strategies, key=lambda s: s.get("score", 0), reverse=True)
@@ -258,7 +367,7 @@ def execute_synthesis_task(
         )
     
     # Initialize client with grounding
-    client = genai.Client(api_key=api_key)
+    client = llm_clients.get_genai_client(api_key)
     grounding_tool = types.Tool(google_search=types.GoogleSearch())
     
     model_name = os.environ.get(
@@ -281,18 +390,14 @@ def execute_synthesis_task(
     )
     
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config=config,
-        )
+        text = await _generate_text(client, model_name, prompt, config, on_text, agent="executor_synthesis")
         
         import json
         try:
-            result = json.loads(response.text)
+            result = json.loads(text)
         except json.JSONDecodeError:
             result = {
-                "report": response.text,
+                "report": text,
                 "report_summary": "Report generated",
                 "key_findings": [],
                 "branch_rationale": "Report generated (parse fallback)"
@@ -302,6 +407,18 @@ def execute_synthesis_task(
         result["prune_strategy_ids"] = prune_ids
         return result
         
+    except LLMUnavailableError as e:
+        # 保留已有报告，留到下一轮综合
+        print(f"[Executor] Skipping synthesis task: {e}")
+        return {
+            "report": None,
+            "report_summary": "Skipped (LLM unavailable)",
+            "key_findings": [],
+            "prune_strategy_ids": [],
+            "skipped": True
+        }
+    except LLMCacheMiss:
+        raise
     except Exception as e:
         print(f"[Executor] Error executing synthesis task: {e}")
         return {
@@ -312,13 +429,235 @@ def execute_synthesis_task(
         }
 
 
+def get_executor_concurrency(config: Dict[str, Any]) -> int:
+    """Resolve the Executor concurrency cap from run config, then env, then default."""
+    raw = config.get("executor_concurrency") or os.environ.get("EXECUTOR_CONCURRENCY")
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_EXECUTOR_CONCURRENCY
+    except (TypeError, ValueError):
+        return DEFAULT_EXECUTOR_CONCURRENCY
+
+
+def get_executor_streaming(config: Dict[str, Any]) -> bool:
+    """Whether Executor calls stream partial text to the UI (run config, then env)."""
+    raw = config.get("executor_streaming")
+    if raw is None:
+        raw = os.environ.get("EXECUTOR_STREAMING", "false")
+    if isinstance(raw, str):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    return bool(raw)
+
+
+def _open_progress_stream(kind: str, strategy: Optional[StrategyNode] = None):
+    """Open an executor_progress stream; the frontend groups deltas by task_id."""
+    return progress_reporter.stream(EXECUTOR_PROGRESS_EVENT, {
+        "task_id": str(uuid.uuid4()),
+        "kind": kind,
+        "strategy_id": strategy.get("id") if strategy else None,
+        "strategy_name": strategy.get("name") if strategy else None,
+    })
+
+
+def _is_synthesis_decision(decision: Dict[str, Any]) -> bool:
+    # strategy_id 为 null 或特殊标记时是综合任务
+    strategy_id = decision.get("strategy_id")
+    return strategy_id is None or strategy_id == "null" or strategy_id == "SYNTHESIS"
+
+
+def plan_execution_waves(decisions: List[Dict[str, Any]]) -> List[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """
+    Split Architect decisions into waves separated by synthesis barriers.
+
+    每个 wave 是 (并发执行的策略任务列表, 其后的综合任务或 None)。综合任务只能在
+    它之前的所有策略任务完成并合并后执行 —— 它要综合 (并剪枝) 这些任务的结果。
+    """
+    waves: List[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]] = []
+    pending: List[Dict[str, Any]] = []
+    for decision in decisions:
+        if _is_synthesis_decision(decision):
+            waves.append((pending, decision))
+            pending = []
+        else:
+            pending.append(decision)
+    if pending:
+        waves.append((pending, None))
+    return waves
+
+
+def _build_variant_node(strategy: StrategyNode, result: Dict[str, Any]) -> Optional[StrategyNode]:
+    variant = result.get("variant_strategy")
+    if not (variant and isinstance(variant, dict) and variant.get("strategy_name")):
+        return None
+    return {
+        "id": str(uuid.uuid4()),
+        "name": variant.get("strategy_name", "Variant"),
+        "rationale": variant.get("rationale", ""),
+        "assumption": variant.get("initial_assumption", ""),
+        "milestones": [],
+        "embedding": None,
+        "density": None,
+        "log_density": None,
+        "score": 0.0,
+        "ucb_score": None,
+        "child_quota": 0,
+        "status": "active",
+        "trajectory": [f"[Executor] Generated as variant of {strategy['name']}"],
+        "parent_id": strategy["id"],
+        "pruned_at_report_version": None,
+        # 完整响应和思维摘要 - 确保前端能显示完整内容
+        "full_response": result.get("execution_result", ""),
+        "thinking_summary": f"由策略 '{strategy['name']}' 分支生成。\n洞见: {', '.join(result.get('new_insights', []))}"
+    }
+
+
+async def _execute_strategy_tasks(
+    problem: str,
+    tasks: List[Tuple[StrategyNode, Dict[str, Any]]],
+    api_key: str,
+    use_mock: bool,
+    thinking_level: str,
+    concurrency: int,
+    streaming: bool = False,
+) -> List[Dict[str, Any]]:
+    """Run strategy tasks concurrently (at most ``concurrency`` in flight); results keep the input order."""
+    async def _run(task: Tuple[StrategyNode, Dict[str, Any]]) -> Dict[str, Any]:
+        strategy, decision = task
+        print(f"  > Executing for '{strategy['name']}'...")
+        stream = _open_progress_stream("task", strategy) if streaming else None
+        try:
+            return await execute_single_task_async(
+                problem=problem,
+                strategy=strategy,
+                decision=decision,
+                api_key=api_key,
+                use_mock=use_mock,
+                thinking_level=thinking_level,
+                on_text=stream.write if stream else None
+            )
+        finally:
+            if stream:
+                stream.close()
+
+    return await gather_bounded(
+        [lambda task=task: _run(task) for task in tasks],
+        limit=concurrency,
+        return_exceptions=False,
+    )
+
+
+def apply_task_result(strategy: StrategyNode, result: Dict[str, Any]) -> Tuple[bool, Optional[StrategyNode]]:
+    """
+    Record one strategy task result on ``strategy`` (in place).
+
+    Returns:
+        (executed, variant): 被跳过的任务 (模型不可用) 不修改策略，executed 为 False
+    """
+    if result.get("skipped"):
+        return False, None
+    strategy["trajectory"] = strategy.get("trajectory", []) + [
+        f"[Executor] {result.get('execution_result', 'Task executed')[:100]}..."
+    ]
+    
+    # If a variant strategy was generated, add it
+    new_node = _build_variant_node(strategy, result)
+    if new_node:
+        print(f"    Created variant: '{new_node['name']}'")
+    return True, new_node
+
+
+async def run_synthesis_task(
+    problem: str,
+    strategies: List[StrategyNode],
+    decision: Dict[str, Any],
+    research_context: Optional[str],
+    report: Optional[str],
+    report_version: int,
+    api_key: str,
+    use_mock: bool,
+    thinking_level: str,
+    streaming: bool = False,
+) -> Tuple[Optional[str], int]:
+    """
+    Execute one synthesis task, then hard-prune (and archive) the synthesized strategies.
+
+    Returns:
+        (report, report_version) after the task; unchanged if no report was produced
+    """
+    print("  > Executing synthesis task...")
+    strategy_map = {s["id"]: s for s in strategies}
+    
+    stream = _open_progress_stream("synthesis") if streaming else None
+    try:
+        result = await execute_synthesis_task_async(
+            problem=problem,
+            strategies=strategies,
+            decision=decision,
+            research_context=research_context,
+            existing_report=report,
+            report_version=report_version,
+            api_key=api_key,
+            use_mock=use_mock,
+            thinking_level=thinking_level,
+            on_text=stream.write if stream else None
+        )
+    finally:
+        if stream:
+            stream.close()
+    
+    # Update report
+    if result.get("report"):
+        report = result["report"]
+        report_version += 1
+        print(f"    Report updated (v{report_version})")
+    
+    # Execute hard pruning for synthesized strategies
+    prune_ids = result.get("prune_strategy_ids", [])
+    branch_rationale = result.get("branch_rationale", "")
+    pruned_count = 0
+    
+    for sid in prune_ids:
+        if sid in strategy_map:
+            s = strategy_map[sid]
+            
+            # Archive to knowledge base before pruning (write-behind: embedding
+            # and disk write happen in batches off the graph's critical path)
+            try:
+                kb_write_queue.enqueue_strategy_archive(
+                    strategy=s,
+                    synthesis_context=f"在报告 v{report_version} 中被综合",
+                    branch_rationale=branch_rationale,
+                    report_version=report_version
+                )
+            except Exception as e:
+                print(f"    [KB] Warning: Failed to archive {s.get('name')}: {e}")
+            
+            # Hard prune: mark as pruned_synthesized
+            s["status"] = "pruned_synthesized"
+            s["pruned_at_report_version"] = report_version
+            pruned_count += 1
+    
+    if pruned_count > 0:
+        print(f"    Hard pruned {pruned_count} strategies, archived to KB")
+    
+    return report, report_version
+
+
 def executor_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see executor_node_async."""
+    return run_coroutine_sync(executor_node_async(state))
+
+
+async def executor_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Executor Node - 策略执行器
     
     基于 Architect 的决策，执行相应任务。
-    - 当 strategy_id 存在时：对特定策略执行任务
-    - 当 strategy_id 为 null 时：执行综合任务（如生成报告）
+    - 当 strategy_id 存在时：对特定策略执行任务 (有界并发执行)
+    - 当 strategy_id 为 null 时：执行综合任务（如生成报告），作为屏障在其之前的
+      策略任务全部完成后才执行
+    - executor_streaming 开启时，部分输出以 executor_progress 事件推送到前端
+    
+    结果按决策顺序合并，轨迹与变体顺序与串行执行一致。
     """
     print("\n[Executor] Executing tasks based on Architect decisions...")
     
@@ -342,6 +681,8 @@ def executor_node(state: DeepThinkState) -> DeepThinkState:
     # 从 config 读取 thinking_level (Gemini 3: MINIMAL, LOW, MEDIUM, HIGH)
     config_data = state.get("config", {})
     thinking_level = config_data.get("thinking_level", "HIGH")
+    concurrency = get_executor_concurrency(config_data)
+    streaming = get_executor_streaming(config_data)
     
     new_strategies: List[StrategyNode] = []
     executed_count = 0
@@ -349,119 +690,46 @@ def executor_node(state: DeepThinkState) -> DeepThinkState:
     updated_report = state.get("final_report")
     report_version = state.get("report_version", 0)
     
-    for decision in architect_decisions:
-        strategy_id = decision.get("strategy_id")
-        
-        # Check if this is a synthesis task (strategy_id is null or special marker)
-        is_synthesis = strategy_id is None or strategy_id == "null" or strategy_id == "SYNTHESIS"
+    for strategy_decisions, synthesis_decision in plan_execution_waves(architect_decisions):
+        tasks = [
+            (strategy_map[d.get("strategy_id")], d)
+            for d in strategy_decisions
+            if d.get("strategy_id") in strategy_map
+        ]
+        results = await _execute_strategy_tasks(
+            problem, tasks, api_key, use_mock, thinking_level, concurrency, streaming
+        )
         
-        if is_synthesis:
-            # Execute synthesis/report task
-            print("  > Executing synthesis task...")
-            
-            result = execute_synthesis_task(
-                problem=problem,
-                strategies=strategies,
-                decision=decision,
-                research_context=state.get("research_context"),
-                existing_report=updated_report,
-                report_version=report_version,
-                api_key=api_key,
-                use_mock=use_mock,
-                thinking_level=thinking_level
-            )
-            
-            # Update report
-            if result.get("report"):
-                updated_report = result["report"]
-                report_version += 1
-                print(f"    Report updated (v{report_version})")
-            
-            # Execute hard pruning for synthesized strategies
-            prune_ids = result.get("prune_strategy_ids", [])
-            branch_rationale = result.get("branch_rationale", "")
-            pruned_count = 0
-            
-            for sid in prune_ids:
-                if sid in strategy_map:
-                    s = strategy_map[sid]
-                    
-                    # Archive to knowledge base before pruning
-                    try:
-                        write_strategy_archive(
-                            strategy=s,
-                            synthesis_context=f"在报告 v{report_version} 中被综合",
-                            branch_rationale=branch_rationale,
-                            report_version=report_version
-                        )
-                    except Exception as e:
-                        print(f"    [KB] Warning: Failed to archive {s.get('name')}: {e}")
-                    
-                    # Hard prune: mark as pruned_synthesized
-                    s["status"] = "pruned_synthesized"
-                    s["pruned_at_report_version"] = report_version
-                    pruned_count += 1
-            
-            if pruned_count > 0:
-                print(f"    Hard pruned {pruned_count} strategies, archived to KB")
-            
-            synthesis_count += 1
-            
-        elif strategy_id in strategy_map:
-            # Execute strategy-specific task
-            strategy = strategy_map[strategy_id]
-            
-            print(f"  > Executing for '{strategy['name']}'...")
-            
-            # Execute the task
-            result = execute_single_task(
-                problem=problem,
-                strategy=strategy,
-                decision=decision,
-                api_key=api_key,
-                use_mock=use_mock,
-                thinking_level=thinking_level
-            )
-            
-            # Update strategy trajectory
-            strategy["trajectory"] = strategy.get("trajectory", []) + [
-                f"[Executor] {result.get('execution_result', 'Task executed')[:100]}..."
-            ]
-            
-            # If a variant strategy was generated, add it
-            variant = result.get("variant_strategy")
-            if variant and isinstance(variant, dict) and variant.get("strategy_name"):
-                new_node: StrategyNode = {
-                    "id": str(uuid.uuid4()),
-                    "name": variant.get("strategy_name", "Variant"),
-                    "rationale": variant.get("rationale", ""),
-                    "assumption": variant.get("initial_assumption", ""),
-                    "milestones": [],
-                    "embedding": None,
-                    "density": None,
-                    "log_density": None,
-                    "score": 0.0,
-                    "ucb_score": None,
-                    "child_quota": 0,
-                    "status": "active",
-                    "trajectory": [f"[Executor] Generated as variant of {strategy['name']}"],
-                    "parent_id": strategy["id"],
-                    "pruned_at_report_version": None,
-                    # 完整响应和思维摘要 - 确保前端能显示完整内容
-                    "full_response": result.get("execution_result", ""),
-                    "thinking_summary": f"由策略 '{strategy['name']}' 分支生成。\n洞见: {', '.join(result.get('new_insights', []))}"
-                }
+        # Merge in decision order so trajectories and variants are deterministic
+        for (strategy, _decision), result in zip(tasks, results):
+            executed, new_node = apply_task_result(strategy, result)
+            if new_node:
                 new_strategies.append(new_node)
-                print(f"    Created variant: '{new_node['name']}'")
-            
-            executed_count += 1
+            executed_count += int(executed)
+        
+        if synthesis_decision is None:
+            continue
+        
+        updated_report, report_version = await run_synthesis_task(
+            problem=problem,
+            strategies=strategies,
+            decision=synthesis_decision,
+            research_context=state.get("research_context"),
+            report=updated_report,
+            report_version=report_version,
+            api_key=api_key,
+            use_mock=use_mock,
+            thinking_level=thinking_level,
+            streaming=streaming,
+        )
+        synthesis_count += 1
     
     # Merge new strategies with existing
     all_strategies = strategies + new_strategies
     
     print(f"[Executor] Executed {executed_count} strategy tasks, {synthesis_count} synthesis tasks, {len(new_strategies)} variants.")
     
-    return {
+    return with_context_ledger({
         **state,
         "strategies": all_strategies,
         "architect_decisions": [],  # Clear decisions after execution
@@ -470,4 +738,4 @@ def executor_node(state: DeepThinkState) -> DeepThinkState:
         "history": state.get("history", []) + [
             f"Executor: {executed_count} tasks, {synthesis_count} synthesis, {len(new_strategies)} variants"
         ]
-    }
+    })
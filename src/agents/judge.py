@@ -1,14 +1,22 @@
 
+import hashlib
 import json
 import os
-from typing import List, Optional
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import llm_call_policy
+from src.llm_cache import LLMCacheMiss
+from src.agents.distiller import stable_judge_context
 
+from src.core.async_helper import gather_bounded, run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
 from src.tools.knowledge_base import write_experience, search_experiences
+from src.tools.kb_write_queue import kb_write_queue
 
 
 # System prompt for Judge with knowledge base awareness
@@ -32,8 +40,215 @@ JUDGE_SYSTEM_PROMPT = """\
 - 关于**如何评估假设**的元策略
 """
 
+# 同时在途的 Judge 调用数上限 (config["judge_concurrency"] 或环境变量 JUDGE_CONCURRENCY)
+DEFAULT_JUDGE_CONCURRENCY = 4
+
+
+# 每次调用评估的策略数 K (config["judge_batch_size"] 或环境变量 JUDGE_BATCH_SIZE)；1 表示逐个评估
+DEFAULT_JUDGE_BATCH_SIZE = 1
+
+BATCH_EVALUATION_HUMAN_PROMPT = """\
+{judge_context}
+
+---
+
+## 待评估策略 (共 {strategy_count} 个)
+
+{strategies_block}
+
+---
+
+## 评估任务
+
+请对上面**每一个**策略独立打分 (0-10) 并给出简短评语，评分标准:
+1. 逻辑自洽性: 理由是否支持结论？
+2. 假设合理性: 关键假设是否过于牵强？
+3. 约束符合性: 是否违背了基本的物理或逻辑约束？
+
+在评估过程中，请结合上述"策略概览"和"最近事件"，判断是否存在值得记录的教训或成功模式。
+如果发现值得记录的经验，请调用 write_experience 工具。
+
+注意：你只负责评分，不负责决定策略的去留。资源分配由系统的 Boltzmann 软剪枝机制自动决定。
+
+输出格式 JSON 数组，每个策略一项，id 必须与上面 [id: ...] 中的值完全一致:
+[
+    {{"id": "策略id", "feasibility_score": float, "reasoning": "简短评语"}}
+]
+"""
+
+
+def get_judge_batch_size(config: Dict[str, Any]) -> int:
+    """Resolve how many strategies share one Judge prompt (1 = per-strategy calls)."""
+    raw = config.get("judge_batch_size") or os.environ.get("JUDGE_BATCH_SIZE")
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_JUDGE_BATCH_SIZE
+    except (TypeError, ValueError):
+        return DEFAULT_JUDGE_BATCH_SIZE
+
+
+def _valid_score(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if 0.0 <= score <= 10.0 else None
+
+
+def parse_batch_judge_content(content: Any, expected_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Parse a batched Judge response (JSON array) into {strategy_id: result}.
+
+    只保留 id 属于本批次且分数为 0-10 数值的条目；缺失或格式错误的策略
+    由调用方回退到单策略评估。
+    """
+    if not isinstance(content, str):
+        return {}
+    json_match = re.search(r'```(?:json)?\s*(\[.*?\])\s*```', content, re.DOTALL)
+    if json_match:
+        content = json_match.group(1)
+    else:
+        start, end = content.find("["), content.rfind("]")
+        if start == -1 or end <= start:
+            return {}
+        content = content[start:end + 1]
+    try:
+        items = json.loads(content)
+    except (json.JSONDecodeError, ValueError):
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    expected = set(expected_ids)
+    parsed: Dict[str, Dict[str, Any]] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        strategy_id = str(item.get("id", ""))
+        score = _valid_score(item.get("feasibility_score"))
+        if strategy_id in expected and strategy_id not in parsed and score is not None:
+            parsed[strategy_id] = {"feasibility_score": score, "reasoning": str(item.get("reasoning", ""))}
+    return parsed
+
+
+# 评分缓存 (state["judge_cache"]) 的复评策略 (config["judge_rejudge_policy"])
+#   strict:    连同 judge_context 一起比较 (默认)；只比较其中稳定的部分 (问题概述 + 策略概览，
+#              见 distiller.stable_judge_context)，每轮变化的迭代指标与事件日志不计入
+#   on_change: 只比较策略相关的 prompt 输入；judge_context 变化时仍复用
+#              (最多 judge_max_reuse 次，之后强制重新评估)
+#   always:    每轮都重新评估 (关闭缓存)
+JUDGE_REJUDGE_POLICIES = ("on_change", "strict", "always")
+DEFAULT_JUDGE_REJUDGE_POLICY = "strict"
+# 连续复用次数上限 (config["judge_max_reuse"])，到达后强制重新评估一次
+DEFAULT_JUDGE_MAX_REUSE = 2
+JUDGE_TRAJECTORY_STEPS = 5
+
+
+def get_rejudge_policy(config: Dict[str, Any]) -> Tuple[str, int]:
+    """Resolve (policy, max consecutive reuses) for the Judge score cache."""
+    policy = config.get("judge_rejudge_policy") or os.environ.get("JUDGE_REJUDGE_POLICY") or DEFAULT_JUDGE_REJUDGE_POLICY
+    if policy not in JUDGE_REJUDGE_POLICIES:
+        policy = DEFAULT_JUDGE_REJUDGE_POLICY
+    try:
+        max_reuse = max(0, int(config.get("judge_max_reuse", DEFAULT_JUDGE_MAX_REUSE)))
+    except (TypeError, ValueError):
+        max_reuse = DEFAULT_JUDGE_MAX_REUSE
+    return policy, max_reuse
+
+
+def judge_cache_key(
+    strategy: StrategyNode,
+    model_name: str,
+    judge_context: Optional[str] = None,
+) -> str:
+    """
+    Content hash of the strategy-specific inputs to the Judge prompt.
+
+    轨迹末尾由 Judge 自己追加的 "[Judge] Score" 记录不计入哈希：它们是上一次评估的输出，
+    不是新信息；否则任何策略在被评估后都会"变化"，缓存永远无法命中。
+    """
+    trajectory = list(strategy.get("trajectory") or [])
+    while trajectory and str(trajectory[-1]).startswith("[Judge]"):
+        trajectory.pop()
+    payload = {
+        "model": model_name,
+        "name": strategy.get("name"),
+        "rationale": strategy.get("rationale"),
+        "assumption": strategy.get("assumption"),
+        "trajectory": trajectory[-JUDGE_TRAJECTORY_STEPS:],
+        "judge_context": judge_context,
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def get_judge_concurrency(config: Dict[str, Any]) -> int:
+    """Resolve the Judge concurrency cap from run config, then env, then default."""
+    raw = config.get("judge_concurrency") or os.environ.get("JUDGE_CONCURRENCY")
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_JUDGE_CONCURRENCY
+    except (TypeError, ValueError):
+        return DEFAULT_JUDGE_CONCURRENCY
+
+
+def parse_judge_content(content: Any, strategy_name: str) -> Dict[str, Any]:
+    """Extract {"feasibility_score", "reasoning"} from a Judge response body."""
+    try:
+        # Try to extract JSON from markdown code blocks
+        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
+        if json_match:
+            content = json_match.group(1)
+        else:
+            # Try to find raw JSON object
+            json_match = re.search(r'\{[^{}]*"feasibility_score"[^{}]*\}', content, re.DOTALL)
+            if json_match:
+                content = json_match.group(0)
+
+        return json.loads(content)
+    except (json.JSONDecodeError, ValueError, AttributeError, TypeError) as parse_err:
+        # Fallback: try to extract score from text
+        print(f"  [Judge] Warning: JSON parse failed for {strategy_name}: {parse_err}")
+        # Try to extract numeric score from response
+        score_match = re.search(r'feasibility_score["\s:]+(\d+(?:\.\d+)?)', str(content))
+        if score_match:
+            extracted_score = float(score_match.group(1))
+            print(f"  [Judge] Extracted score: {extracted_score}")
+            return {"feasibility_score": extracted_score, "reasoning": "Score extracted from response"}
+        return {"feasibility_score": 5.0, "reasoning": "Evaluation completed (parse fallback)"}
+
+
+async def _evaluate_concurrently(
+    llm_with_tools: Any,
+    messages_by_idx: List[Tuple[Any, Any]],
+    concurrency: int,
+    model_name: str = "default",
+) -> Dict[Any, Any]:
+    """
+    ainvoke every prompt with at most ``concurrency`` requests in flight.
+
+    每个请求还要经过全局 llm_scheduler 的准入 (与其他节点共享配额)，
+    并受 llm_call_policy 的截止时间 / 对冲策略约束。
+
+    Returns:
+        key -> response (or the exception raised for that prompt)
+    """
+    async def _invoke(messages: Any) -> Any:
+        return await llm_call_policy.call("judge", model_name, lambda: llm_with_tools.ainvoke(messages))
+
+    responses = await gather_bounded(
+        [lambda m=messages: _invoke(m) for _, messages in messages_by_idx],
+        limit=concurrency,
+    )
+    return {idx: response for (idx, _), response in zip(messages_by_idx, responses)}
+
 
 def judge_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see judge_node_async."""
+    return run_coroutine_sync(judge_node_async(state))
+
+
+async def judge_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Evaluates the feasibility of active strategies.
     
@@ -62,6 +277,7 @@ def judge_node(state: DeepThinkState) -> DeepThinkState:
     llm = None
     llm_with_tools = None
     parser = None
+    model_name = "mock"
     
     if not use_mock:
         model_name = os.environ.get("GEMINI_MODEL_JUDGE", os.environ.get("GEMINI_MODEL", "gemini-3.0-flash-preview"))
@@ -78,9 +294,9 @@ def judge_node(state: DeepThinkState) -> DeepThinkState:
         }
         
         # Create LLM with tool binding for knowledge base
-        llm = ChatGoogleGenerativeAI(
+        llm = llm_clients.get_chat_model(
             model=model_name,
-            google_api_key=api_key,
+            api_key=api_key,
             temperature=1.0,  # Logic Manifold Integrity
             generation_config=generation_config
         )
@@ -144,62 +360,140 @@ def judge_node(state: DeepThinkState) -> DeepThinkState:
     def format_trajectory(traj: List[str]) -> str:
         if not traj:
             return "(无历史记录)"
-        return "\n".join([f"  - {step}" for step in traj[-5:]])  # Last 5 steps
+        return "\n".join([f"  - {step}" for step in traj[-JUDGE_TRAJECTORY_STEPS:]])  # Last 5 steps
 
+    def strategy_key(idx: int) -> str:
+        return str(strategies[idx].get("id") or idx)
+
+    # 评分缓存: 未变化的策略直接复用上次评分，不再调用 LLM
+    policy, max_reuse = get_rejudge_policy(state.get("config", {}))
+    previous_cache = state.get("judge_cache") or {}
+    judge_cache: Dict[str, Dict[str, Any]] = {}
+    cache_keys: Dict[int, str] = {}
+    reused: Dict[int, Dict[str, Any]] = {}
+    for idx in active_indices:
+        cache_keys[idx] = judge_cache_key(
+            strategies[idx], model_name, stable_judge_context(judge_context) if policy == "strict" else None
+        )
+        entry = previous_cache.get(strategy_key(idx))
+        if (
+            policy != "always"
+            and entry
+            and entry.get("key") == cache_keys[idx]
+            and entry.get("reuses", 0) < max_reuse
+        ):
+            reused[idx] = {**entry, "reuses": entry.get("reuses", 0) + 1}
+    if reused:
+        print(f"[Judge] Reusing cached scores for {len(reused)} unchanged strategies (policy={policy})")
+    to_evaluate = [idx for idx in active_indices if idx not in reused]
+
+    def handle_tool_calls(response: Any) -> None:
+        nonlocal kb_writes
+        # Tool calls are processed sequentially here, so KB writes stay serialised
+        if hasattr(response, 'tool_calls') and response.tool_calls:
+            for tool_call in response.tool_calls:
+                if tool_call['name'] == 'write_experience':
+                    try:
+                        # Queued: embedding + write happen in the background batch
+                        result = kb_write_queue.enqueue_experience(tool_call['args'])
+                        print(f"  [KB] {result}")
+                        kb_writes += 1
+                    except Exception as e:
+                        print(f"  [KB Error] {e}")
+
+    # idx -> {"feasibility_score", "reasoning"} 或该策略评估时抛出的异常
+    results: Dict[int, Any] = {}
+    if not use_mock:
+        config_data = state.get("config", {})
+        concurrency = get_judge_concurrency(config_data)
+        batch_size = get_judge_batch_size(config_data)
+        pending = list(to_evaluate)
+
+        # 批量模式: 每 K 个策略共享一次 system prompt + judge_context
+        if batch_size > 1 and len(pending) > 1:
+            batch_prompt = ChatPromptTemplate.from_messages([
+                ("system", JUDGE_SYSTEM_PROMPT),
+                ("human", BATCH_EVALUATION_HUMAN_PROMPT),
+            ])
+            groups = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            batch_messages = [
+                (group_no, batch_prompt.format_messages(
+                    judge_context=judge_context,
+                    strategy_count=len(group),
+                    strategies_block="\n\n".join(
+                        f"### [id: {strategy_key(idx)}] 策略 \"{strategies[idx]['name']}\"\n"
+                        f"理由: {strategies[idx]['rationale']}\n"
+                        f"关键假设: {strategies[idx]['assumption']}\n"
+                        f"历史轨迹:\n{format_trajectory(strategies[idx].get('trajectory', []))}"
+                        for idx in group
+                    ),
+                ))
+                for group_no, group in enumerate(groups)
+            ]
+            print(f"[Judge] Batch mode: {len(pending)} strategies in {len(groups)} calls (K={batch_size})")
+            batch_responses = await _evaluate_concurrently(llm_with_tools, batch_messages, concurrency, model_name)
+
+            pending = []
+            for group_no, group in enumerate(groups):
+                response = batch_responses[group_no]
+                parsed: Dict[str, Dict[str, Any]] = {}
+                if isinstance(response, LLMCacheMiss):
+                    raise response
+                if isinstance(response, BaseException):
+                    print(f"[Judge] Warning: batch call failed: {response}")
+                else:
+                    handle_tool_calls(response)
+                    parsed = parse_batch_judge_content(
+                        response.content, [strategy_key(idx) for idx in group]
+                    )
+                for idx in group:
+                    if strategy_key(idx) in parsed:
+                        results[idx] = parsed[strategy_key(idx)]
+                    else:
+                        pending.append(idx)
+            if pending:
+                print(f"[Judge] Falling back to single-strategy calls for {len(pending)} strategies")
+
+        # 单策略评估 (默认模式，或批量结果缺失/格式错误时的回退)
+        # 所有请求通过 ainvoke 同时发出 (受并发上限约束)，结果随后按索引顺序写回
+        if pending:
+            messages_by_idx = [
+                (idx, evaluation_prompt.format_messages(
+                    judge_context=judge_context,
+                    strategy_name=strategies[idx]["name"],
+                    rationale=strategies[idx]["rationale"],
+                    initial_assumption=strategies[idx]["assumption"],
+                    trajectory=format_trajectory(strategies[idx].get("trajectory", []))
+                ))
+                for idx in pending
+            ]
+            print(f"[Judge] Evaluating {len(messages_by_idx)} strategies (concurrency={concurrency})")
+            responses = await _evaluate_concurrently(llm_with_tools, messages_by_idx, concurrency, model_name)
+            for idx in pending:
+                response = responses[idx]
+                if isinstance(response, BaseException):
+                    results[idx] = response
+                    continue
+                handle_tool_calls(response)
+                results[idx] = parse_judge_content(response.content, strategies[idx]['name'])
+
+    reused_count = 0
     for idx in active_indices:
         strategy = strategies[idx]
+
+        if idx in reused:
+            entry = reused[idx]
+            judge_cache[strategy_key(idx)] = entry
+            new_strategies[idx]["score"] = entry["score"] / 10.0
+            reused_count += 1
+            print(f"  > '{strategy['name']}' Score: {entry['score']:.2f} (cached)")
+            continue
         
         try:
             if not use_mock:
-                # Invoke with tool support
-                messages = evaluation_prompt.format_messages(
-                    judge_context=judge_context,
-                    strategy_name=strategy["name"],
-                    rationale=strategy["rationale"],
-                    initial_assumption=strategy["assumption"],
-                    trajectory=format_trajectory(strategy.get("trajectory", []))
-                )
-                
-                response = llm_with_tools.invoke(messages)
-                
-                # Check for tool calls
-                if hasattr(response, 'tool_calls') and response.tool_calls:
-                    for tool_call in response.tool_calls:
-                        if tool_call['name'] == 'write_experience':
-                            try:
-                                result = write_experience.invoke(tool_call['args'])
-                                print(f"  [KB] {result}")
-                                kb_writes += 1
-                            except Exception as e:
-                                print(f"  [KB Error] {e}")
-                
-                # Parse the JSON content - improved extraction
-                try:
-                    content = response.content
-                    # Try to extract JSON from markdown code blocks
-                    import re
-                    json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-                    if json_match:
-                        content = json_match.group(1)
-                    else:
-                        # Try to find raw JSON object
-                        json_match = re.search(r'\{[^{}]*"feasibility_score"[^{}]*\}', content, re.DOTALL)
-                        if json_match:
-                            content = json_match.group(0)
-                    
-                    result = json.loads(content)
-                except (json.JSONDecodeError, ValueError, AttributeError) as parse_err:
-                    # Fallback: try to extract score from text
-                    print(f"  [Judge] Warning: JSON parse failed for {strategy['name']}: {parse_err}")
-                    # Try to extract numeric score from response
-                    score_match = re.search(r'feasibility_score["\s:]+(\d+(?:\.\d+)?)', str(response.content))
-                    if score_match:
-                        extracted_score = float(score_match.group(1))
-                        result = {"feasibility_score": extracted_score, "reasoning": "Score extracted from response"}
-                        print(f"  [Judge] Extracted score: {extracted_score}")
-                    else:
-                        result = {"feasibility_score": 5.0, "reasoning": "Evaluation completed (parse fallback)"}
-                
+                result = results[idx]
+                if isinstance(result, BaseException):
+                    raise result
                 score = float(result.get("feasibility_score", 5.0))
                 reasoning = result.get("reasoning", "")
             else:
@@ -216,20 +510,29 @@ def judge_node(state: DeepThinkState) -> DeepThinkState:
             new_strategies[idx]["score"] = score / 10.0
             # No hard pruning - Boltzmann allocation decides resource distribution
             
+            judge_cache[strategy_key(idx)] = {
+                "key": cache_keys[idx],
+                "score": score,
+                "reasoning": reasoning,
+                "reuses": 0,
+            }
             evaluated_count += 1
             print(f"  > '{strategy['name']}' Score: {score:.2f}")
             
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             print(f"[Judge] Error evaluating strategy {strategy['name']}: {e}")
             import traceback
             traceback.print_exc()
             
-    print(f"[Judge] Evaluated {evaluated_count} strategies. KB writes: {kb_writes}.")
+    print(f"[Judge] Evaluated {evaluated_count} strategies ({reused_count} cached). KB writes: {kb_writes}.")
     
-    return {
+    return with_context_ledger({
         **state,
         "strategies": new_strategies,
+        "judge_cache": judge_cache,
         "history": state.get("history", []) + [
-            f"Judge evaluated {evaluated_count} strategies, KB writes: {kb_writes}"
+            f"Judge evaluated {evaluated_count} strategies ({reused_count} cached), KB writes: {kb_writes}"
         ]
-    }
+    })
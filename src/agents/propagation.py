@@ -14,12 +14,20 @@ import os
 import uuid
 from typing import List, Dict, Any
 
-from google import genai
 from google.genai import types
 import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.llm_clients import llm_clients
+from src.llm_call_policy import llm_call_policy
+from src.llm_cache import LLMCacheMiss
+from src.core.async_helper import gather_bounded, run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
+from src.tools.embedding_pipeline import embedding_pipeline, pipeline_enabled
+
+
+# 同时扩展的父策略数上限
+PROPAGATION_CONCURRENCY = 5
 
 
 PROPAGATION_PROMPT = """\
@@ -63,6 +71,25 @@ PROPAGATION_PROMPT = """\
 
 
 def generate_children_for_strategy(
+    problem: str,
+    parent: StrategyNode,
+    num_children: int,
+    api_key: str,
+    use_mock: bool = False,
+    thinking_level: str = "HIGH"
+) -> List[StrategyNode]:
+    """Sync wrapper around generate_children_for_strategy_async."""
+    return run_coroutine_sync(generate_children_for_strategy_async(
+        problem=problem,
+        parent=parent,
+        num_children=num_children,
+        api_key=api_key,
+        use_mock=use_mock,
+        thinking_level=thinking_level
+    ))
+
+
+async def generate_children_for_strategy_async(
     problem: str,
     parent: StrategyNode,
     num_children: int,
@@ -126,7 +153,7 @@ def generate_children_for_strategy(
     )
     
     # 调用 LLM
-    client = genai.Client(api_key=api_key)
+    client = llm_clients.get_genai_client(api_key)
     
     model_name = os.environ.get(
         "GEMINI_MODEL_GENERATOR",
@@ -140,16 +167,21 @@ def generate_children_for_strategy(
     )
     
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            contents=prompt,
-            config=config,
+        response = await llm_call_policy.call(
+            "propagation", model_name,
+            lambda: client.aio.models.generate_content(
+                model=model_name,
+                contents=prompt,
+                config=config,
+            ),
         )
         
         raw_strategies = json.loads(response.text)
         if not isinstance(raw_strategies, list):
             raw_strategies = [raw_strategies]
             
+    except LLMCacheMiss:
+        raise
     except Exception as e:
         print(f"[Propagation] Error generating children: {e}")
         return []
@@ -187,6 +219,11 @@ def generate_children_for_strategy(
 
 
 def propagation_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see propagation_node_async."""
+    return run_coroutine_sync(propagation_node_async(state))
+
+
+async def propagation_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Propagation Node - 策略传播器
     
@@ -208,51 +245,55 @@ def propagation_node(state: DeepThinkState) -> DeepThinkState:
     new_children: List[StrategyNode] = []
     expanded_count = 0
     
-    # ⚡ Parallel Execution Optimization
-    # Use ThreadPoolExecutor to generate children for multiple strategies in parallel
-    # This significantly reduces the total time when multiple strategies need expansion.
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_strategy = {}
-        
-        for strategy in strategies:
-            if strategy.get("status") != "active":
-                continue
-
-            quota = strategy.get("child_quota", 0)
-            if quota <= 0:
-                continue
-
-            print(f"  > [Parallel Submit] Generating {quota} children for '{strategy['name']}'...")
-
-            # 从 config 获取 thinking_level
-            config = state.get("config", {})
-            thinking_level = config.get("thinking_level", "HIGH")
+    # 从 config 获取 thinking_level
+    config = state.get("config", {})
+    thinking_level = config.get("thinking_level", "HIGH")
+    
+    parents = [
+        s for s in strategies
+        if s.get("status") == "active" and s.get("child_quota", 0) > 0
+    ]
+    for strategy in parents:
+        print(f"  > [Parallel Submit] Generating {strategy['child_quota']} children for '{strategy['name']}'...")
+    
+    pipeline = pipeline_enabled()
 
-            future = executor.submit(
-                generate_children_for_strategy,
-                problem=problem,
-                parent=strategy,
-                num_children=quota,
-                api_key=api_key,
-                use_mock=use_mock,
-                thinking_level=thinking_level
-            )
-            future_to_strategy[future] = strategy
+    async def expand(parent: StrategyNode) -> List[StrategyNode]:
+        children = await generate_children_for_strategy_async(
+            problem=problem,
+            parent=parent,
+            num_children=parent["child_quota"],
+            api_key=api_key,
+            use_mock=use_mock,
+            thinking_level=thinking_level
+        )
+        # 流水线: 该父策略的子节点一生成就提交嵌入，与其余生成及后续节点重叠，
+        # Evolution 时直接取回结果
+        if pipeline:
+            embedding_pipeline.submit(children)
+        return children
 
-        # Collect results as they complete
-        for future in as_completed(future_to_strategy):
-            strategy = future_to_strategy[future]
-            try:
-                children = future.result()
-                if children:
-                    new_children.extend(children)
-                    # 标记父节点为已扩展，并清除 quota 防止重复扩展
-                    strategy["status"] = "expanded"
-                    strategy["child_quota"] = 0  # 防止无限扩展
-                    expanded_count += 1
-                    print(f"    [Complete] '{strategy['name']}' -> Created {len(children)} children")
-            except Exception as e:
-                print(f"[Propagation] Error generating children for '{strategy.get('name', 'Unknown')}': {e}")
+    # ⚡ Parallel Execution Optimization
+    # All parents are expanded concurrently on the async client (bounded), and
+    # results are merged in strategy order so the tree is deterministic.
+    results = await gather_bounded(
+        [lambda parent=strategy: expand(parent) for strategy in parents],
+        limit=PROPAGATION_CONCURRENCY,
+    )
+    
+    for strategy, children in zip(parents, results):
+        if isinstance(children, LLMCacheMiss):
+            raise children
+        if isinstance(children, BaseException):
+            print(f"[Propagation] Error generating children for '{strategy.get('name', 'Unknown')}': {children}")
+            continue
+        if children:
+            new_children.extend(children)
+            # 标记父节点为已扩展，并清除 quota 防止重复扩展
+            strategy["status"] = "expanded"
+            strategy["child_quota"] = 0  # 防止无限扩展
+            expanded_count += 1
+            print(f"    [Complete] '{strategy['name']}' -> Created {len(children)} children")
     
     # 合并新子策略到策略池
     all_strategies = strategies + new_children
@@ -260,10 +301,10 @@ def propagation_node(state: DeepThinkState) -> DeepThinkState:
     print(f"[Propagation] Expanded {expanded_count} strategies, created {len(new_children)} children.")
     print(f"[Propagation] Total strategies: {len(all_strategies)}")
     
-    return {
+    return with_context_ledger({
         **state,
         "strategies": all_strategies,
         "history": state.get("history", []) + [
             f"Propagation: {expanded_count} expanded, {len(new_children)} children created"
         ]
-    }
+    })
@@ -10,8 +10,12 @@ import os
 import json
 from typing import List, Dict, Any, Optional
 
-from google import genai
 from google.genai import types
+from src.llm_clients import llm_clients
+from src.llm_call_policy import LLMDeadlineExceeded, LLMUnavailableError, llm_call_policy
+from src.llm_cache import LLMCacheMiss
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState
 
 
@@ -48,6 +52,11 @@ RESEARCHER_PROMPT_TEMPLATE = """\
 
 
 def research_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see research_node_async."""
+    return run_coroutine_sync(research_node_async(state))
+
+
+async def research_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Researcher Node - 深度研究专家
     
@@ -78,13 +87,13 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
     
     if current_iteration >= max_iterations:
         print(f"[Researcher] Max iterations ({max_iterations}) reached. Proceeding with available context.")
-        return {
+        return with_context_ledger({
             **state,
             "research_status": "sufficient",  # Force sufficient to proceed
             "history": state.get("history", []) + [
                 f"Researcher: max iterations reached, proceeding with available context"
             ]
-        }
+        })
     
     # Format information needs for prompt
     if information_needs:
@@ -106,7 +115,7 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
         }
     else:
         # Initialize client with API key
-        client = genai.Client(api_key=api_key)
+        client = llm_clients.get_genai_client(api_key)
         
         # Configure grounding tool
         grounding_tool = types.Tool(
@@ -132,10 +141,13 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
         )
         
         try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=grounding_config,
+            response = await llm_call_policy.call(
+                "researcher", model_name,
+                lambda: client.aio.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=grounding_config,
+                ),
             )
             
             # Parse JSON response
@@ -149,6 +161,16 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
                     "missing_items": []
                 }
                 
+        except (LLMUnavailableError, LLMDeadlineExceeded) as e:
+            # 重试已由 llm_call_policy 完成；再开一轮研究只会浪费迭代，使用现有背景继续
+            print(f"[Researcher] LLM unavailable, proceeding with available context: {e}")
+            result = {
+                "research_context": state.get("research_context", ""),
+                "information_status": "sufficient",
+                "missing_items": []
+            }
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             print(f"[Researcher] Error during search: {e}")
             result = {
@@ -167,7 +189,7 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
     if missing_items:
         print(f"[Researcher] Missing items: {missing_items}")
     
-    return {
+    return with_context_ledger({
         **state,
         "research_context": research_context,
         "research_status": information_status,
@@ -175,5 +197,5 @@ def research_node(state: DeepThinkState) -> DeepThinkState:
         "history": state.get("history", []) + [
             f"Researcher: {len(research_context)} chars, status={information_status}"
         ]
-    }
+    })
 
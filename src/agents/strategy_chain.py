@@ -0,0 +1,215 @@
+"""
+Strategy Chain - 流式扇出执行模式
+
+默认的 phased 模式严格按阶段同步：所有策略任务执行完才开始 Judge，
+每一轮的耗时是各阶段最慢调用之和。execution_mode="fanout" 时
+ArchitectScheduler 之后用 LangGraph 的 Send 为每个策略派发一条独立的
+strategy_chain (执行该策略的任务 → 立即评分，含其生成的变体)，
+唯一的屏障是 Evolution 之前的 chain_merge：
+
+    ArchitectScheduler ─Send→ strategy_chain × N ─→ chain_merge → Evolution
+
+- 未被调度执行的活跃策略 (例如刚由 Propagation 生成的子策略) 也各有一条
+  只评分的链，一产生就被评估，不再等待其他策略的执行
+- Judge 上下文在派发时生成一次 (与 phased 模式下 distiller_for_judge 的区别
+  是不包含本轮其他策略的执行结果；本策略自己的轨迹仍是最新的)
+- 综合任务 (strategy_id 为空) 需要全部结果，在 chain_merge 中按顺序执行
+- 并发度由 llm_scheduler 统一约束
+"""
+
+import os
+import uuid
+from typing import Any, Dict, List, Union
+
+from langgraph.types import Send
+
+from src.agents.distiller import generate_judge_context
+from src.agents.executor import (
+    _execute_strategy_tasks,
+    _is_synthesis_decision,
+    apply_task_result,
+    get_executor_streaming,
+    run_synthesis_task,
+)
+from src.agents.judge import judge_node_async
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
+from src.core.state import DeepThinkState
+
+
+EXECUTION_MODE_PHASED = "phased"
+EXECUTION_MODE_FANOUT = "fanout"
+EXECUTION_MODES = (EXECUTION_MODE_PHASED, EXECUTION_MODE_FANOUT)
+
+
+def get_execution_mode(config: Dict[str, Any]) -> str:
+    """Resolve the execution mode from run config, then env EXECUTION_MODE (default phased)."""
+    mode = (config.get("execution_mode") or os.environ.get("EXECUTION_MODE") or EXECUTION_MODE_PHASED).lower()
+    if mode not in EXECUTION_MODES:
+        print(f"[StrategyChain] Unknown execution_mode {mode!r}, using {EXECUTION_MODE_PHASED}")
+        return EXECUTION_MODE_PHASED
+    return mode
+
+
+def build_chain_sends(state: DeepThinkState) -> List[Send]:
+    """One Send per strategy that has decisions or is still active (judge-only chain)."""
+    strategies = state.get("strategies", [])
+    decisions_by_id: Dict[str, List[Dict[str, Any]]] = {}
+    for decision in state.get("architect_decisions") or []:
+        if not _is_synthesis_decision(decision):
+            decisions_by_id.setdefault(decision.get("strategy_id"), []).append(decision)
+
+    judge_context = generate_judge_context(state)
+    sends = []
+    for strategy in strategies:
+        decisions = decisions_by_id.get(strategy["id"], [])
+        if not decisions and strategy.get("status") != "active":
+            continue
+        sends.append(Send("strategy_chain", {
+            "task_id": str(uuid.uuid4()),
+            "problem_state": state["problem_state"],
+            "strategy": strategy,
+            "decisions": decisions,
+            "judge_context": judge_context,
+            "judge_cache": state.get("judge_cache") or {},
+            "config": state.get("config", {}),
+        }))
+    return sends
+
+
+def route_after_architect(state: DeepThinkState) -> Union[str, List[Send]]:
+    """Conditional edge after ArchitectScheduler: phased Executor, or fan-out chains."""
+    if get_execution_mode(state.get("config", {})) != EXECUTION_MODE_FANOUT:
+        return "executor"
+    sends = build_chain_sends(state)
+    if not sends:
+        return "chain_merge"
+    print(f"[StrategyChain] Fanning out {len(sends)} strategy chains")
+    return sends
+
+
+def strategy_chain_node(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Sync entry point (CLI / graph.invoke); see strategy_chain_node_async."""
+    return run_coroutine_sync(strategy_chain_node_async(payload))
+
+
+async def strategy_chain_node_async(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strategy Chain Node - 单个策略的 执行 → 评分
+
+    在策略副本上工作 (chain_merge 按 id 写回)，只写 chain_results 通道，
+    因此多条链可以在同一步中并行而不冲突。
+    """
+    strategy = dict(payload["strategy"])
+    decisions = payload.get("decisions") or []
+    config = payload.get("config", {})
+
+    api_key = os.environ.get("GEMINI_API_KEY")
+    use_mock = os.environ.get("USE_MOCK_AGENTS", "false").lower() == "true" or not api_key
+
+    variants = []
+    executed = 0
+    if decisions:
+        results = await _execute_strategy_tasks(
+            payload["problem_state"],
+            [(strategy, decision) for decision in decisions],
+            api_key,
+            use_mock,
+            config.get("thinking_level", "HIGH"),
+            concurrency=1,  # 同一策略的多个任务依次执行，轨迹顺序确定
+            streaming=get_executor_streaming(config),
+        )
+        for result in results:
+            ok, variant = apply_task_result(strategy, result)
+            executed += int(ok)
+            if variant:
+                variants.append(variant)
+
+    judged = await judge_node_async({
+        "problem_state": payload["problem_state"],
+        "strategies": [strategy] + variants,
+        "judge_context": payload.get("judge_context"),
+        "judge_cache": payload.get("judge_cache") or {},
+        "config": config,
+        "history": [],
+    })
+
+    return {
+        "chain_results": [{
+            "task_id": payload["task_id"],
+            "strategy_id": strategy["id"],
+            "strategies": judged["strategies"],
+            "judge_cache": judged.get("judge_cache") or {},
+            "executed": executed,
+        }]
+    }
+
+
+def chain_merge_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see chain_merge_node_async."""
+    return run_coroutine_sync(chain_merge_node_async(state))
+
+
+async def chain_merge_node_async(state: DeepThinkState) -> DeepThinkState:
+    """
+    Chain Merge Node - Evolution 之前的屏障
+
+    按策略原顺序写回各链结果 (结果与链完成顺序无关)，合并评分缓存，
+    然后执行综合任务。
+    """
+    results = state.get("chain_results") or []
+    strategies = list(state.get("strategies", []))
+    position = {s["id"]: i for i, s in enumerate(strategies)}
+    results = sorted(results, key=lambda r: position.get(r.get("strategy_id"), len(strategies)))
+
+    judge_cache: Dict[str, Dict[str, Any]] = {}
+    variants = []
+    executed_count = 0
+    for result in results:
+        for strategy in result.get("strategies", []):
+            if strategy["id"] in position:
+                strategies[position[strategy["id"]]] = strategy
+            else:
+                variants.append(strategy)
+        judge_cache.update(result.get("judge_cache") or {})
+        executed_count += result.get("executed", 0)
+
+    print(f"\n[ChainMerge] Merged {len(results)} strategy chains "
+          f"({executed_count} tasks, {len(variants)} variants)")
+
+    config = state.get("config", {})
+    api_key = os.environ.get("GEMINI_API_KEY")
+    use_mock = os.environ.get("USE_MOCK_AGENTS", "false").lower() == "true" or not api_key
+    report = state.get("final_report")
+    report_version = state.get("report_version", 0)
+    synthesis_count = 0
+    for decision in state.get("architect_decisions") or []:
+        if not _is_synthesis_decision(decision):
+            continue
+        report, report_version = await run_synthesis_task(
+            problem=state["problem_state"],
+            strategies=strategies,
+            decision=decision,
+            research_context=state.get("research_context"),
+            report=report,
+            report_version=report_version,
+            api_key=api_key,
+            use_mock=use_mock,
+            thinking_level=config.get("thinking_level", "HIGH"),
+            streaming=get_executor_streaming(config),
+        )
+        synthesis_count += 1
+
+    return with_context_ledger({
+        **state,
+        "strategies": strategies + variants,
+        "judge_cache": judge_cache,
+        "architect_decisions": [],
+        "final_report": report,
+        "report_version": report_version,
+        "chain_results": None,  # reset (see merge_chain_results)
+        "history": state.get("history", []) + [
+            f"ChainMerge: {len(results)} chains, {executed_count} tasks, "
+            f"{synthesis_count} synthesis, {len(variants)} variants"
+        ]
+    })
@@ -11,8 +11,12 @@ from typing import List
 
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import llm_call_policy
+from src.llm_cache import LLMCacheMiss
 
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState, StrategyNode
 from src.core.temperature_helper import get_llm_temperature
 
@@ -56,6 +60,11 @@ STRATEGY_GENERATOR_PROMPT = """\
 
 
 def strategy_generator_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see strategy_generator_node_async."""
+    return run_coroutine_sync(strategy_generator_node_async(state))
+
+
+async def strategy_generator_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Strategy Generator Node - 策略生成器
     
@@ -114,9 +123,9 @@ def strategy_generator_node(state: DeepThinkState) -> DeepThinkState:
             }
         }
         
-        llm = ChatGoogleGenerativeAI(
+        llm = llm_clients.get_chat_model(
             model=model_name,
-            google_api_key=api_key,
+            api_key=api_key,
             temperature=llm_temperature,  # 动态温度
             generation_config=generation_config
         )
@@ -132,11 +141,11 @@ def strategy_generator_node(state: DeepThinkState) -> DeepThinkState:
         subtasks_str = "\n".join([f"- {s}" for s in subtasks]) if subtasks else "无子任务分解"
         
         try:
-            response = chain.invoke({
+            response = await llm_call_policy.call("strategy_generator", model_name, lambda: chain.ainvoke({
                 "problem_state": problem_state,
                 "research_context": research_context,
                 "subtasks": subtasks_str
-            })
+            }))
             
             if isinstance(response, dict):
                 raw_strategies = [response]
@@ -145,6 +154,8 @@ def strategy_generator_node(state: DeepThinkState) -> DeepThinkState:
             else:
                 raw_strategies = []
                 
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             print(f"[StrategyGenerator] Error: {e}")
             raw_strategies = []
@@ -185,10 +196,10 @@ def strategy_generator_node(state: DeepThinkState) -> DeepThinkState:
     
     print(f"[StrategyGenerator] Generated {len(new_strategies)} strategies.")
     
-    return {
+    return with_context_ledger({
         **state,
         "strategies": new_strategies,
         "history": state.get("history", []) + [
             f"StrategyGenerator: {len(new_strategies)} strategies generated"
         ]
-    }
+    })
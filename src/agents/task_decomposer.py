@@ -10,8 +10,12 @@ from typing import List, TypedDict
 
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_clients import llm_clients
+from src.llm_call_policy import llm_call_policy
+from src.llm_cache import LLMCacheMiss
 
+from src.core.async_helper import run_coroutine_sync
+from src.core.context_ledger import with_context_ledger
 from src.core.state import DeepThinkState
 
 
@@ -70,6 +74,11 @@ TASK_DECOMPOSER_PROMPT = """\
 
 
 def task_decomposer_node(state: DeepThinkState) -> DeepThinkState:
+    """Sync entry point (CLI / graph.invoke); see task_decomposer_node_async."""
+    return run_coroutine_sync(task_decomposer_node_async(state))
+
+
+async def task_decomposer_node_async(state: DeepThinkState) -> DeepThinkState:
     """
     Task Decomposer Node - 任务拆解专家
     
@@ -104,9 +113,9 @@ def task_decomposer_node(state: DeepThinkState) -> DeepThinkState:
         )
         print(f"[TaskDecomposer] Using model: {model_name}")
         
-        llm = ChatGoogleGenerativeAI(
+        llm = llm_clients.get_chat_model(
             model=model_name,
-            google_api_key=api_key,
+            api_key=api_key,
             temperature=1.0,  # Logic Manifold Integrity
         )
         
@@ -119,7 +128,11 @@ def task_decomposer_node(state: DeepThinkState) -> DeepThinkState:
         chain = prompt | llm | parser
         
         try:
-            decomposition = chain.invoke({"problem": problem})
+            decomposition = await llm_call_policy.call(
+                "task_decomposer", model_name, lambda: chain.ainvoke({"problem": problem})
+            )
+        except LLMCacheMiss:
+            raise
         except Exception as e:
             print(f"[TaskDecomposer] Error: {e}")
             decomposition = {
@@ -134,11 +147,11 @@ def task_decomposer_node(state: DeepThinkState) -> DeepThinkState:
     
     print(f"[TaskDecomposer] Decomposed into {subtask_count} subtasks, {info_needs_count} information needs.")
     
-    return {
+    return with_context_ledger({
         **state,
         "subtasks": decomposition.get("subtasks", []),
         "information_needs": decomposition.get("information_needs", []),
         "history": state.get("history", []) + [
             f"TaskDecomposer: {subtask_count} subtasks, {info_needs_count} info needs"
         ]
-    }
+    })
@@ -7,9 +7,15 @@ export const KnowledgePanel: React.FC = () => {
     const [status, setStatus] = useState<"connecting" | "connected" | "error" | "closed">("closed");
     const [filter, setFilter] = useState<'all' | 'lesson_learned' | 'success_pattern' | 'insight'>('all');
     const [copiedId, setCopiedId] = useState<string | null>(null);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [total, setTotal] = useState(0);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const socketRef = useRef<WebSocket | null>(null);
     const reconnectTimerRef = useRef<number | undefined>(undefined);
+    const pendingCopyRef = useRef<string | null>(null);
+    // Mirrors loadingMore for the scroll handler, so one page is in flight at a time
+    const loadingMoreRef = useRef(false);
 
     const connect = (attempt = 0) => {
         if (socketRef.current) {
@@ -50,6 +56,7 @@ export const KnowledgePanel: React.FC = () => {
         socket.addEventListener("close", () => {
             if (socketRef.current !== socket) return;
             socketRef.current = null;
+            setPageLoading(false);
             setStatus("closed");
             scheduleReconnect(attempt + 1);
         });
@@ -70,15 +77,63 @@ export const KnowledgePanel: React.FC = () => {
         reconnectTimerRef.current = window.setTimeout(() => connect(attempt + 1), delay);
     };
 
+    const sortEntries = (list: KnowledgeEntry[]) =>
+        list.sort((a, b) => new Date(b.created_at).getTime() - new Date(a.created_at).getTime());
+
+    const setPageLoading = (loading: boolean) => {
+        loadingMoreRef.current = loading;
+        setLoadingMore(loading);
+    };
+
+    const requestPage = (cursor: string | null) => {
+        // Later summary pages are fetched only when the user asks (scroll / "Load more")
+        if (cursor && !loadingMoreRef.current && socketRef.current?.readyState === WebSocket.OPEN) {
+            setPageLoading(true);
+            socketRef.current.send(JSON.stringify({ type: "page", cursor }));
+        }
+    };
+
+    const handleFeedScroll = (event: React.UIEvent<HTMLDivElement>) => {
+        const feed = event.currentTarget;
+        if (feed.scrollTop + feed.clientHeight >= feed.scrollHeight - 48) {
+            requestPage(nextCursor);
+        }
+    };
+
+    const requestDetail = (id: string) => {
+        if (socketRef.current?.readyState === WebSocket.OPEN) {
+            socketRef.current.send(JSON.stringify({ type: "detail", id }));
+        }
+    };
+
     const handleMessage = (payload: KnowledgeMessage) => {
         switch (payload.type) {
             case "snapshot":
                 if (Array.isArray(payload.data)) {
-                    // Sort by created_at desc
-                    const sorted = [...payload.data].sort((a, b) =>
-                        new Date(b.created_at).getTime() - new Date(a.created_at).getTime()
-                    );
-                    setEntries(sorted);
+                    setEntries(sortEntries([...payload.data]));
+                    setNextCursor(payload.next_cursor);
+                    setTotal(payload.total);
+                    setPageLoading(false);
+                }
+                break;
+            case "page":
+                if (Array.isArray(payload.data)) {
+                    setEntries(prev => {
+                        const incoming = new Set(payload.data.map(e => e.id));
+                        return sortEntries([...prev.filter(e => !incoming.has(e.id)), ...payload.data]);
+                    });
+                    setNextCursor(payload.next_cursor);
+                    setTotal(payload.total);
+                    setPageLoading(false);
+                }
+                break;
+            case "detail":
+                if (payload.data?.id) {
+                    setEntries(prev => prev.map(e => e.id === payload.data.id ? { ...e, ...payload.data } : e));
+                    if (pendingCopyRef.current === payload.data.id) {
+                        pendingCopyRef.current = null;
+                        handleCopy(payload.data.id, payload.data.reflection);
+                    }
                 }
                 break;
             case "update":
@@ -106,7 +161,7 @@ export const KnowledgePanel: React.FC = () => {
         };
     }, []);
 
-    const formatEmbeddingPreview = (values: number[]) => {
+    const formatEmbeddingPreview = (values?: number[]) => {
         if (!values || values.length === 0) return "n/a";
         const formatted = values.map((value) =>
             Number.isFinite(value) ? value.toFixed(4) : String(value)
@@ -114,6 +169,16 @@ export const KnowledgePanel: React.FC = () => {
         return `[${formatted.join(", ")}]`;
     };
 
+    const handleCopyEntry = (entry: KnowledgeEntry) => {
+        if (entry.reflection_truncated) {
+            // Copy the full reflection, not the snapshot excerpt
+            pendingCopyRef.current = entry.id;
+            requestDetail(entry.id);
+            return;
+        }
+        handleCopy(entry.id, entry.reflection);
+    };
+
     const handleCopy = async (id: string, text: string) => {
         try {
             await navigator.clipboard.writeText(text);
@@ -160,7 +225,7 @@ export const KnowledgePanel: React.FC = () => {
                 </div>
             </div>
 
-            <div id="knowledge-feed" className={`knowledge-feed`} style={{ flex: 1, overflowY: 'auto', padding: '1rem' }}>
+            <div id="knowledge-feed" className={`knowledge-feed`} style={{ flex: 1, overflowY: 'auto', padding: '1rem' }} onScroll={handleFeedScroll}>
                 {entries.length === 0 ? (
                     <div className="knowledge-feed empty">
                         <div className="empty-icon-wrapper">
@@ -193,7 +258,7 @@ export const KnowledgePanel: React.FC = () => {
                                         {new Date(entry.created_at).toLocaleTimeString()}
                                     </time>
                                     <button
-                                        onClick={() => handleCopy(entry.id, entry.reflection)}
+                                        onClick={() => handleCopyEntry(entry)}
                                         aria-label={copiedId === entry.id ? "Copied" : "Copy reflection"}
                                         title={copiedId === entry.id ? "Copied" : "Copy reflection"}
                                         style={{
@@ -212,14 +277,50 @@ export const KnowledgePanel: React.FC = () => {
                                 </div>
                             </div>
                             <h4 style={{ margin: '0 0 0.5rem 0', fontSize: '0.95rem', color: 'var(--text-primary)' }}>{entry.thread_id}</h4>
-                            <p style={{ fontSize: '0.9rem', color: 'var(--text-secondary)', lineHeight: '1.5', margin: '0 0 0.75rem 0' }}>{entry.reflection}</p>
-                            <dl className="knowledge-entry__meta" style={{ margin: 0, fontSize: '0.75rem', color: 'var(--text-muted)' }}>
-                                <dt style={{ display: 'inline', fontWeight: 500 }}>Vector Preview: </dt>
-                                <dd style={{ display: 'inline', margin: 0, fontFamily: 'monospace' }}>{formatEmbeddingPreview(entry.embedding_preview)}</dd>
-                            </dl>
+                            <p style={{ fontSize: '0.9rem', color: 'var(--text-secondary)', lineHeight: '1.5', margin: '0 0 0.75rem 0' }}>
+                                {entry.reflection}{entry.reflection_truncated ? '…' : ''}
+                            </p>
+                            {entry.embedding_preview ? (
+                                <dl className="knowledge-entry__meta" style={{ margin: 0, fontSize: '0.75rem', color: 'var(--text-muted)' }}>
+                                    <dt style={{ display: 'inline', fontWeight: 500 }}>Vector Preview: </dt>
+                                    <dd style={{ display: 'inline', margin: 0, fontFamily: 'monospace' }}>{formatEmbeddingPreview(entry.embedding_preview)}</dd>
+                                </dl>
+                            ) : (
+                                <button
+                                    onClick={() => requestDetail(entry.id)}
+                                    style={{
+                                        background: 'transparent',
+                                        border: 'none',
+                                        cursor: 'pointer',
+                                        padding: 0,
+                                        fontSize: '0.75rem',
+                                        color: 'var(--text-muted)'
+                                    }}
+                                >
+                                    Show details
+                                </button>
+                            )}
                         </article>
                     ))
                 )}
+                {nextCursor && (
+                    <button
+                        onClick={() => requestPage(nextCursor)}
+                        disabled={loadingMore || status !== "connected"}
+                        style={{
+                            width: '100%',
+                            background: 'transparent',
+                            border: '1px solid var(--border-color)',
+                            borderRadius: '4px',
+                            cursor: loadingMore ? 'default' : 'pointer',
+                            padding: '6px',
+                            fontSize: '0.8rem',
+                            color: 'var(--text-muted)'
+                        }}
+                    >
+                        {loadingMore ? 'Loading…' : `Load more (${entries.length} of ${total})`}
+                    </button>
+                )}
             </div>
         </aside>
     );
@@ -1,18 +1,27 @@
 """Utilities for managing per-thread reasoning contexts and long-term reflections."""
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
 import json
+import logging
+import math
 import os
 import re
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterable, Mapping, Optional
+from typing import Any, Iterable, Mapping, Optional, Sequence
 
 import google.generativeai as genai
 
-from src.embedding_client import embed_text
+from src.embedding_client import embed_text, embed_texts
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -22,7 +31,19 @@ DEFAULT_MODEL_NAME = os.getenv("SUMMARY_MODEL_NAME", "gemini-1.5-flash")
 DEFAULT_INITIAL_PROMPT = """# Strategy Thread Bootstrapping\n\n- Thread ID: {thread_id}\n- Created (UTC): {timestamp}\n\nMaintain a detailed stream-of-consciousness reasoning log for this strategy branch.\nEach step should be appended as a JSON line in ``history.log`` using the ``append_step``\nhelper so downstream tooling can parse the progression of thought.\n"""
 DEFAULT_HISTORY_LIMIT = 50
 HISTORY_LIMIT_ENV_VAR = "CONTEXT_HISTORY_LIMIT"
+HISTORY_FILENAME = "history.log"
+# history.log 是活动段；写满后重命名为 history.log.<seq> 封存，超出保留量的旧段整段删除
+HISTORY_SEGMENTS_RETAINED = 4
+_TAIL_READ_BLOCK = 8192
+# history 写入缓冲: 累计字节数或距上次刷新时间超过阈值时刷盘，退出时统一刷新
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_MAX_OPEN_WRITERS = 64
 SUMMARY_FILENAME = "summary.md"
+SUMMARY_META_FILENAME = "summary.meta.json"
+DEFAULT_BULK_CONCURRENCY = 4
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(slots=True)
@@ -33,6 +54,16 @@ class SummaryResult:
     text: str
 
 
+@dataclass(slots=True)
+class ReflectionRequest:
+    """One reflection to archive via ``record_reflections``."""
+
+    thread_id: str
+    reflection_text: str
+    outcome: str
+    metadata: Optional[Mapping[str, Any]] = None
+
+
 @dataclass(slots=True)
 class HistoryEntry:
     """Represents a single reasoning step stored in history.log."""
@@ -50,13 +81,23 @@ class HistoryEntry:
         return f"[{self.timestamp}]\n{body}"
 
 
+# 已创建过的 (CONTEXT_ROOT, KNOWLEDGE_BASE_ROOT) 组合，避免每次调用都 mkdir/stat
+_ensured_roots: set[tuple[Path, Path]] = set()
+# 已确认存在的线程上下文目录
+_known_context_dirs: set[Path] = set()
+
+
 def _ensure_directories() -> None:
+    roots = (CONTEXT_ROOT, KNOWLEDGE_BASE_ROOT)
+    if roots in _ensured_roots:
+        return
     CONTEXT_ROOT.mkdir(parents=True, exist_ok=True)
     KNOWLEDGE_BASE_ROOT.mkdir(parents=True, exist_ok=True)
     # Preserve git tracking placeholder if repository is clean
     gitkeep = KNOWLEDGE_BASE_ROOT / ".gitkeep"
     if not gitkeep.exists():
         gitkeep.touch()
+    _ensured_roots.add(roots)
 
 
 def _sanitize_thread_id(thread_id: str) -> str:
@@ -81,20 +122,23 @@ def create_context(thread_id: str) -> Path:
     prompt_path = context_dir / "prompt.md"
     prompt_path.write_text(prompt_text, encoding="utf-8")
 
-    history_path = context_dir / "history.log"
+    history_path = context_dir / HISTORY_FILENAME
     if not history_path.exists():
         history_path.write_text("", encoding="utf-8")
 
+    _known_context_dirs.add(context_dir)
     return context_dir
 
 
 def append_step(thread_id: str, step_data: Any) -> Path:
     """Append a reasoning step to the thread's history log."""
     context_dir = _context_dir(thread_id)
-    if not context_dir.exists():
-        raise FileNotFoundError(
-            f"Context for '{thread_id}' does not exist. Did you call create_context()?"
-        )
+    if context_dir not in _known_context_dirs:
+        if not context_dir.exists():
+            raise FileNotFoundError(
+                f"Context for '{thread_id}' does not exist. Did you call create_context()?"
+            )
+        _known_context_dirs.add(context_dir)
 
     timestamp = datetime.now(timezone.utc).isoformat()
     entry = {
@@ -103,12 +147,8 @@ def append_step(thread_id: str, step_data: Any) -> Path:
         "data": step_data,
     }
 
-    history_path = context_dir / "history.log"
-    with history_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(entry, ensure_ascii=False))
-        handle.write("\n")
-
-    _enforce_history_limit(history_path)
+    history_path = context_dir / HISTORY_FILENAME
+    context_writer_pool.append(history_path, json.dumps(entry, ensure_ascii=False) + "\n")
 
     return history_path
 
@@ -129,31 +169,25 @@ def get_history_limit() -> int:
         return DEFAULT_HISTORY_LIMIT
 
 
-def _load_history(thread_id: str) -> list[HistoryEntry]:
-    context_dir = _context_dir(thread_id)
-    history_path = context_dir / "history.log"
-    if not history_path.exists():
-        return []
+def _load_history_lines(thread_id: str) -> list[str]:
+    history_path = _context_dir(thread_id) / HISTORY_FILENAME
+    context_writer_pool.flush(history_path)
+    return _tail_history_lines(history_path, get_history_limit())
 
-    entries: list[HistoryEntry] = []
-    with history_path.open("r", encoding="utf-8") as handle:
-        for line in handle:
-            if not line.strip():
-                continue
-            try:
-                payload = json.loads(line)
-                entries.append(
-                    HistoryEntry(
-                        timestamp=payload.get("timestamp", ""),
-                        data=payload.get("data"),
-                    )
-                )
-            except json.JSONDecodeError:
-                entries.append(
-                    HistoryEntry(timestamp="", data=line.strip())
-                )
-    limit = get_history_limit()
-    return entries[-limit:]
+
+def _parse_history_line(line: str) -> HistoryEntry:
+    try:
+        payload = json.loads(line)
+        return HistoryEntry(
+            timestamp=payload.get("timestamp", ""),
+            data=payload.get("data"),
+        )
+    except json.JSONDecodeError:
+        return HistoryEntry(timestamp="", data=line.strip())
+
+
+def _load_history(thread_id: str) -> list[HistoryEntry]:
+    return [_parse_history_line(line) for line in _load_history_lines(thread_id)]
 
 
 def _format_history(entries: Iterable[HistoryEntry]) -> str:
@@ -161,29 +195,231 @@ def _format_history(entries: Iterable[HistoryEntry]) -> str:
     return "\n\n".join(formatted) if formatted else "(no reasoning steps recorded yet)"
 
 
-def _enforce_history_limit(history_path: Path) -> None:
-    """Trim the history log so that at most the configured history limit remain."""
+# history.log 路径 -> (文件大小, 行数)；大小不符时重新计数，避免每次追加都读文件
+_segment_line_counts: dict[Path, tuple[int, int]] = {}
 
-    if not history_path.exists():
-        return
 
-    with history_path.open("r", encoding="utf-8") as handle:
-        lines = handle.readlines()
+def _segment_capacity(limit: int) -> int:
+    """Lines per segment, so that the retained sealed segments cover ``limit``."""
 
-    limit = get_history_limit()
+    return max(1, math.ceil(limit / HISTORY_SEGMENTS_RETAINED))
 
-    if len(lines) <= limit:
-        return
 
-    trimmed = lines[-limit:]
-    with history_path.open("w", encoding="utf-8") as handle:
-        handle.writelines(trimmed)
+def _sealed_segments(history_path: Path) -> list[Path]:
+    """Sealed segments for ``history_path``, oldest first."""
+
+    segments = []
+    for candidate in history_path.parent.glob(f"{history_path.name}.*"):
+        suffix = candidate.name[len(history_path.name) + 1:]
+        if suffix.isdigit():
+            segments.append((int(suffix), candidate))
+    return [path for _, path in sorted(segments)]
 
 
-def _generate_summary(thread_id: str, prompt_text: str, history_block: str) -> str:
+def _active_line_count(history_path: Path) -> int:
+    try:
+        size = history_path.stat().st_size
+    except FileNotFoundError:
+        return 0
+    cached = _segment_line_counts.get(history_path)
+    if cached is not None and cached[0] == size:
+        return cached[1]
+    with history_path.open("rb") as handle:
+        count = sum(1 for line in handle if line.strip())
+    _segment_line_counts[history_path] = (size, count)
+    return count
+
+
+def _rotate_history(history_path: Path, retain: int = HISTORY_SEGMENTS_RETAINED) -> None:
+    """Seal the active segment and drop sealed segments beyond the retention window."""
+
+    sealed = _sealed_segments(history_path)
+    next_seq = int(sealed[-1].name.rsplit(".", 1)[-1]) + 1 if sealed else 1
+    history_path.replace(history_path.with_name(f"{history_path.name}.{next_seq:06d}"))
+    history_path.write_text("", encoding="utf-8")
+    _segment_line_counts[history_path] = (0, 0)
+
+    sealed = _sealed_segments(history_path)
+    for stale in sealed[:-retain]:
+        stale.unlink(missing_ok=True)
+
+
+class _HistoryWriter:
+    """Open append handle for one active history segment."""
+
+    __slots__ = ("path", "handle", "count", "pending_bytes", "last_flush")
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.count = _active_line_count(path)
+        self.handle = path.open("a", encoding="utf-8", buffering=DEFAULT_FLUSH_BYTES)
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, line: str) -> None:
+        self.handle.write(line)
+        self.count += 1
+        self.pending_bytes += len(line)
+
+    def flush(self) -> None:
+        if self.pending_bytes:
+            self.handle.flush()
+            self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self.handle.close()
+        try:
+            _segment_line_counts[self.path] = (self.path.stat().st_size, self.count)
+        except FileNotFoundError:
+            _segment_line_counts.pop(self.path, None)
+
+
+class ContextWriterPool:
+    """
+    In-process registry of buffered history writers.
+
+    每个线程的活动 history 段保持一个打开的句柄 (LRU 上限 max_open)，
+    追加只写入内存缓冲；当缓冲超过 flush_bytes 或距上次刷新超过 flush_interval
+    时刷盘，后台线程负责空闲句柄的定时刷新，读取历史前与进程退出时也会刷新。
+    """
+
+    def __init__(
+        self,
+        flush_bytes: int = DEFAULT_FLUSH_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_open: int = DEFAULT_MAX_OPEN_WRITERS,
+    ) -> None:
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.max_open = max(1, max_open)
+        self._writers: "OrderedDict[Path, _HistoryWriter]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def append(self, history_path: Path, line: str) -> None:
+        """Buffer one history line, rotating the active segment when it is full."""
+
+        with self._lock:
+            writer = self._writer_for(history_path)
+            limit = get_history_limit()
+            capacity = _segment_capacity(limit)
+            if writer.count >= capacity:
+                writer.close()
+                # 活动段可能刚被清空，封存段本身需覆盖 limit 条
+                _rotate_history(history_path, retain=math.ceil(limit / capacity))
+                writer = _HistoryWriter(history_path)
+                self._writers[history_path] = writer
+
+            writer.write(line)
+            if (
+                writer.pending_bytes >= self.flush_bytes
+                or time.monotonic() - writer.last_flush >= self.flush_interval
+            ):
+                writer.flush()
+        self._ensure_flusher()
+
+    def flush(self, history_path: Optional[Path] = None) -> None:
+        """Flush one writer (or all of them) so readers see every appended line."""
+
+        with self._lock:
+            if history_path is None:
+                writers = list(self._writers.values())
+            else:
+                writer = self._writers.get(history_path)
+                writers = [writer] if writer is not None else []
+            for writer in writers:
+                writer.flush()
+
+    def close_all(self) -> None:
+        with self._lock:
+            for writer in self._writers.values():
+                writer.close()
+            self._writers.clear()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self.close_all()
+
+    def _writer_for(self, history_path: Path) -> _HistoryWriter:
+        writer = self._writers.get(history_path)
+        if writer is not None:
+            self._writers.move_to_end(history_path)
+            return writer
+        while len(self._writers) >= self.max_open:
+            _, evicted = self._writers.popitem(last=False)
+            evicted.close()
+        writer = _HistoryWriter(history_path)
+        self._writers[history_path] = writer
+        return writer
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="context-writer-flush", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            now = time.monotonic()
+            with self._lock:
+                for writer in self._writers.values():
+                    if writer.pending_bytes and now - writer.last_flush >= self.flush_interval:
+                        writer.flush()
+
+
+# Global writer pool; flushed and closed at interpreter exit
+context_writer_pool = ContextWriterPool()
+atexit.register(context_writer_pool.shutdown)
+
+
+def _tail_lines(path: Path, count: int) -> list[str]:
+    """Return the last ``count`` non-empty lines of ``path`` by reading backwards."""
+
+    if count <= 0 or not path.exists():
+        return []
+    with path.open("rb") as handle:
+        handle.seek(0, os.SEEK_END)
+        position = handle.tell()
+        buffer = b""
+        while position > 0 and buffer.count(b"\n") <= count:
+            step = min(_TAIL_READ_BLOCK, position)
+            position -= step
+            handle.seek(position)
+            buffer = handle.read(step) + buffer
+    lines = [line for line in buffer.decode("utf-8", errors="replace").splitlines() if line.strip()]
+    return lines[-count:]
+
+
+def _tail_history_lines(history_path: Path, count: int) -> list[str]:
+    """Last ``count`` history lines across the active and sealed segments."""
+
+    lines = _tail_lines(history_path, count)
+    for segment in reversed(_sealed_segments(history_path)):
+        if len(lines) >= count:
+            break
+        lines = _tail_lines(segment, count - len(lines)) + lines
+    return lines[-count:]
+
+
+def _generate_summary(
+    thread_id: str,
+    prompt_text: str,
+    history_block: str,
+    previous_summary: Optional[str] = None,
+) -> tuple[str, bool]:
+    """Return (summary text, whether it is the offline fallback instead of a model summary)."""
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
-        return _fallback_summary(thread_id, history_block)
+        return _fallback_summary(thread_id, history_block), True
 
     genai.configure(api_key=api_key)
     model = genai.GenerativeModel(model_name=DEFAULT_MODEL_NAME)
@@ -191,7 +427,25 @@ def _generate_summary(thread_id: str, prompt_text: str, history_block: str) -> s
     system_instruction = (
         "你是一位系统日志分析师。你的任务是将思维链（stream-of-consciousness）" "记录总结成结构化洞察。"
     )
-    user_prompt = f"""
+    if previous_summary is not None:
+        user_prompt = f"""
+以下是该策略线程已有的 SoC 摘要，以及此后新追加的推理步骤。
+请在已有摘要的基础上合并新步骤，输出一份完整的、更新后的摘要（保持相同的小节结构），
+不要丢弃已有摘要中仍然成立的信息。
+
+=== 初始 Prompt ===
+{prompt_text}
+
+=== 已有摘要 ===
+{previous_summary}
+
+=== 新增推理步骤（按时间顺序，最近的在最后） ===
+{history_block}
+
+输出使用 Markdown，包含清晰的小节标题。
+"""
+    else:
+        user_prompt = f"""
 请阅读以下上下文，生成一份全面的 SoC（Stream of Consciousness）摘要，包含：
 1. 此策略线程目前关注的核心目标或任务。
 2. 已采取的关键行动步骤（保持顺序）。
@@ -208,17 +462,18 @@ def _generate_summary(thread_id: str, prompt_text: str, history_block: str) -> s
 """
 
     try:
-        response = model.generate_content(
-            [
-                {"role": "system", "parts": [system_instruction]},
-                {"role": "user", "parts": [user_prompt]},
-            ]
-        )
+        with llm_scheduler.slot(DEFAULT_MODEL_NAME):
+            response = model.generate_content(
+                [
+                    {"role": "system", "parts": [system_instruction]},
+                    {"role": "user", "parts": [user_prompt]},
+                ]
+            )
         if not response or not getattr(response, "text", "").strip():
             raise RuntimeError("Empty response from model")
-        return response.text.strip()
+        return response.text.strip(), False
     except Exception:
-        return _fallback_summary(thread_id, history_block)
+        return _fallback_summary(thread_id, history_block), True
 
 
 def _fallback_summary(thread_id: str, history_block: str) -> str:
@@ -234,8 +489,26 @@ def _fallback_summary(thread_id: str, history_block: str) -> str:
     )
 
 
+def _hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _load_summary_meta(context_dir: Path) -> dict[str, Any]:
+    try:
+        return json.loads((context_dir / SUMMARY_META_FILENAME).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
 def summarize(thread_id: str) -> Path:
-    """Generate a SoC summary for the thread and persist it as working memory."""
+    """
+    Generate a SoC summary for the thread and persist it as working memory.
+
+    summary.md 旁的 summary.meta.json 记录了生成摘要时的内容哈希与最后一条已纳入的步骤：
+    - 历史与 prompt 均未变化时直接返回缓存的摘要，不调用模型
+    - 仅有新追加的步骤时，只把旧摘要 + 新步骤发送给模型做增量合并
+    - 已纳入的最后一步已被轮转出保留窗口 (或首次生成) 时，回退为全量摘要
+    """
     context_dir = _context_dir(thread_id)
     if not context_dir.exists():
         raise FileNotFoundError(
@@ -245,13 +518,46 @@ def summarize(thread_id: str) -> Path:
     prompt_path = context_dir / "prompt.md"
     prompt_text = prompt_path.read_text(encoding="utf-8") if prompt_path.exists() else ""
 
-    history_entries = _load_history(thread_id)
-    history_block = _format_history(history_entries)
-
-    summary_text = _generate_summary(thread_id, prompt_text, history_block)
+    history_lines = _load_history_lines(thread_id)
+    line_hashes = [_hash_text(line) for line in history_lines]
+    content_hash = _hash_text(_hash_text(prompt_text) + "".join(line_hashes))
 
     summary_path = context_dir / SUMMARY_FILENAME
+    meta = _load_summary_meta(context_dir) if summary_path.exists() else {}
+    if meta.get("content_hash") == content_hash and meta.get("model") == DEFAULT_MODEL_NAME:
+        return summary_path
+
+    new_lines = history_lines
+    previous_summary: Optional[str] = None
+    last_hash = meta.get("last_line_hash")
+    if (
+        last_hash
+        and last_hash in line_hashes
+        and meta.get("prompt_hash") == _hash_text(prompt_text)
+        and meta.get("model") == DEFAULT_MODEL_NAME
+    ):
+        offset = len(line_hashes) - 1 - line_hashes[::-1].index(last_hash)
+        new_lines = history_lines[offset + 1:]
+        previous_summary = summary_path.read_text(encoding="utf-8")
+
+    history_block = _format_history(_parse_history_line(line) for line in new_lines)
+    summary_text, fallback = _generate_summary(thread_id, prompt_text, history_block, previous_summary)
+
     summary_path.write_text(summary_text, encoding="utf-8")
+    meta = {
+        "prompt_hash": _hash_text(prompt_text),
+        "entry_count": len(history_lines),
+        "incremental": previous_summary is not None,
+        "fallback": fallback,
+        "model": DEFAULT_MODEL_NAME,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    if not fallback:
+        # 回退摘要不记录内容哈希与锚点：下次调用不会命中缓存，也不会把回退文本当作
+        # 已有摘要做增量合并，而是重新全量生成
+        meta["content_hash"] = content_hash
+        meta["last_line_hash"] = line_hashes[-1] if line_hashes else None
+    (context_dir / SUMMARY_META_FILENAME).write_text(json.dumps(meta, indent=2), encoding="utf-8")
 
     return summary_path
 
@@ -267,14 +573,13 @@ def _summary_path(thread_id: str) -> Path:
     return _context_dir(thread_id) / SUMMARY_FILENAME
 
 
-def record_reflection(
+def _build_reflection_entry(
     thread_id: str,
     reflection_text: str,
-    *,
     outcome: str,
-    metadata: Optional[Mapping[str, Any]] = None,
-) -> Path:
-    """Persist a long-term reflection with embedding metadata into the knowledge base."""
+    metadata: Optional[Mapping[str, Any]],
+) -> tuple[Path, dict[str, Any]]:
+    """Prepare a reflection payload (without embedding) and its target path."""
 
     context_dir = _context_dir(thread_id)
     if not context_dir.exists():
@@ -294,23 +599,95 @@ def record_reflection(
         "created_at": timestamp,
         "outcome": outcome,
         "reflection": reflection_text,
-        "embedding": embed_text(reflection_text),
+        "embedding": [],
         "source": {
             "summary_path": str(summary_path) if summary_path.exists() else None,
             "metadata": dict(metadata or {}),
         },
     }
+    return KNOWLEDGE_BASE_ROOT / f"{entry_id}.json", entry_payload
 
-    entry_path = KNOWLEDGE_BASE_ROOT / f"{entry_id}.json"
+
+def record_reflection(
+    thread_id: str,
+    reflection_text: str,
+    *,
+    outcome: str,
+    metadata: Optional[Mapping[str, Any]] = None,
+) -> Path:
+    """Persist a long-term reflection with embedding metadata into the knowledge base."""
+
+    entry_path, entry_payload = _build_reflection_entry(thread_id, reflection_text, outcome, metadata)
+    with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+        entry_payload["embedding"] = embed_text(reflection_text)
     entry_path.write_text(json.dumps(entry_payload, ensure_ascii=False, indent=2), encoding="utf-8")
     return entry_path
 
 
+def record_reflections(requests: Iterable[ReflectionRequest]) -> list[Path]:
+    """
+    Archive many reflections at once.
+
+    所有反思文本通过一次 ``embed_texts`` 批量嵌入，然后在一轮中写入知识库，
+    而不是每个线程各发一次嵌入请求。
+    """
+
+    prepared = [
+        _build_reflection_entry(req.thread_id, req.reflection_text, req.outcome, req.metadata)
+        for req in requests
+    ]
+    if not prepared:
+        return []
+
+    with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+        embeddings = embed_texts([payload["reflection"] for _, payload in prepared])
+    paths: list[Path] = []
+    for (entry_path, entry_payload), embedding in zip(prepared, embeddings):
+        entry_payload["embedding"] = embedding
+        entry_path.write_text(json.dumps(entry_payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        paths.append(entry_path)
+    return paths
+
+
+async def generate_summaries(
+    thread_ids: Sequence[str],
+    *,
+    max_concurrency: int = DEFAULT_BULK_CONCURRENCY,
+) -> dict[str, SummaryResult]:
+    """
+    Summarise many threads with bounded concurrency.
+
+    ``generate_summary`` 使用同步的 genai 客户端，因此每个线程在工作线程中执行，
+    并由信号量限制同时在途的模型请求数。缺失上下文等失败会被记录并跳过。
+    """
+
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def _one(thread_id: str) -> Optional[SummaryResult]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(generate_summary, thread_id)
+            except Exception as exc:
+                logger.warning("Failed to summarise thread %s: %s", thread_id, exc)
+                return None
+
+    unique_ids = list(dict.fromkeys(thread_ids))
+    results = await asyncio.gather(*(_one(thread_id) for thread_id in unique_ids))
+    return {
+        thread_id: result
+        for thread_id, result in zip(unique_ids, results)
+        if result is not None
+    }
+
+
 __all__ = [
     "create_context",
     "append_step",
     "summarize",
     "generate_summary",
     "record_reflection",
+    "record_reflections",
+    "generate_summaries",
+    "ReflectionRequest",
     "SummaryResult",
 ]
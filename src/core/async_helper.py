@@ -0,0 +1,82 @@
+"""
+Async Helper - 在同步 LangGraph 节点中运行协程
+
+Agent 节点以异步实现 (*_async) 为主，服务器的 graph.astream 直接使用它们；
+同步入口 (graph.invoke / CLI) 通过 run_coroutine_sync 驱动同一个协程完成，
+无论调用线程是否已有运行中的事件循环都可以安全使用。
+
+所有协程都提交到进程内唯一的后台事件循环执行：共享的 LLM 客户端
+(src.llm_clients) 的异步连接池绑定在该循环上，可以跨节点调用复用。
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, Iterable, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop that runs coroutines for sync callers."""
+    global _loop
+    if _loop is not None and _loop.is_running():
+        return _loop
+    with _loop_lock:
+        if _loop is None or not _loop.is_running():
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            threading.Thread(target=_run, name="async-helper-loop", daemon=True).start()
+            ready.wait()
+            _loop = loop
+    return _loop
+
+
+def run_coroutine_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run ``coro`` to completion from synchronous code.
+
+    无论调用线程是否已有运行中的事件循环都可使用 (协程总在后台循环中执行)，
+    但不能在后台循环自身内部调用 —— 那会造成死锁。
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_coroutine_sync() cannot be called from the background loop; await instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+async def gather_bounded(
+    factories: Iterable[Callable[[], Awaitable[T]]],
+    limit: int,
+    return_exceptions: bool = True,
+) -> List[Any]:
+    """
+    Await the coroutines produced by ``factories`` with at most ``limit`` in flight.
+
+    结果顺序与输入顺序一致；return_exceptions=True 时单个失败以异常对象返回，
+    不影响其他任务。
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(factory: Callable[[], Awaitable[T]]) -> T:
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(
+        *(_run(factory) for factory in factories),
+        return_exceptions=return_exceptions,
+    )
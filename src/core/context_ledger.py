@@ -0,0 +1,162 @@
+"""
+Context Ledger - 增量维护的上下文大小账本
+
+distiller.estimate_token_count 此前每次都遍历整个状态 (问题、研究背景、每个策略的
+理由 / 假设 / 全部轨迹、全部历史)，should_distill 每次调用都重新扫描一遍；
+种群与轨迹越长，这个开销越明显。这里把各部分的大小记在 state["context_ledger"] 中：
+
+- history 与每个策略的 trajectory 按只追加处理：账本记录已计入的条数以及最后一条
+  的指纹，更新时只测量新追加的条目 (指纹不一致说明列表被替换，才整体重算)
+- 单个字符串 (问题、研究背景、Judge 上下文、策略理由 + 假设) 按 (长度, 哈希) 缓存
+- 追加 history / trajectory 的节点通过 with_context_ledger 在返回前更新账本
+
+默认沿用 "约 4 个字符一个 token" 的估计 (与原实现结果一致)；设置
+CONTEXT_TOKENIZER=gemini 时使用 google-genai 的本地分词器 (需要 sentencepiece，
+CONTEXT_TOKENIZER_MODEL 指定模型)，不可用时回退到字符估计。
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.state import DeepThinkState
+
+
+CHARS_PER_TOKEN = 4
+TOKENIZER_CHARS = "chars"
+TOKENIZER_GEMINI = "gemini"
+DEFAULT_TOKENIZER_MODEL = "gemini-2.5-flash"
+
+# 账本中按整体计量的字符串字段
+_TEXT_FIELDS = ("problem_state", "research_context", "judge_context")
+
+_tokenizer_lock = threading.Lock()
+_tokenizer: Optional[Tuple[str, Optional[Callable[[str], int]]]] = None
+
+
+def _load_gemini_tokenizer(model: str) -> Optional[Callable[[str], int]]:
+    try:
+        from google.genai.local_tokenizer import LocalTokenizer
+
+        tokenizer = LocalTokenizer(model_name=model)
+    except Exception as e:  # ImportError (sentencepiece) / unsupported model / download failure
+        print(f"[ContextLedger] Gemini tokenizer unavailable ({e}), using character estimate")
+        return None
+    return lambda text: tokenizer.count_tokens(text).total_tokens
+
+
+def get_context_tokenizer() -> Tuple[str, Optional[Callable[[str], int]]]:
+    """(name, count function) of the configured tokenizer; count is None for the char estimate."""
+    global _tokenizer
+    with _tokenizer_lock:
+        if _tokenizer is None:
+            kind = os.environ.get("CONTEXT_TOKENIZER", TOKENIZER_CHARS).lower()
+            count = None
+            if kind == TOKENIZER_GEMINI:
+                model = os.environ.get("CONTEXT_TOKENIZER_MODEL", DEFAULT_TOKENIZER_MODEL)
+                count = _load_gemini_tokenizer(model)
+                kind = f"{TOKENIZER_GEMINI}:{model}" if count else TOKENIZER_CHARS
+            elif kind != TOKENIZER_CHARS:
+                print(f"[ContextLedger] Unknown CONTEXT_TOKENIZER {kind!r}, using character estimate")
+                kind = TOKENIZER_CHARS
+            _tokenizer = (kind, count)
+        return _tokenizer
+
+
+def set_context_tokenizer(name: Optional[str], count: Optional[Callable[[str], int]] = None) -> None:
+    """Override the tokenizer (None re-reads the environment on next use)."""
+    global _tokenizer
+    with _tokenizer_lock:
+        _tokenizer = None if name is None else (name, count)
+
+
+def _measure(texts: List[str], count: Optional[Callable[[str], int]]) -> Tuple[int, int]:
+    chars = sum(len(t) for t in texts)
+    tokens = sum(count(t) for t in texts if t) if count else 0
+    return chars, tokens
+
+
+def _text_entry(
+    texts: List[str],
+    previous: Optional[Dict[str, Any]],
+    count: Optional[Callable[[str], int]],
+) -> Dict[str, Any]:
+    # str 对象缓存自身的哈希，未变化的字符串不会被重新读取
+    key = [[len(t), hash(t)] for t in texts]
+    if previous is not None and previous.get("key") == key:
+        return previous
+    chars, tokens = _measure(texts, count)
+    return {"key": key, "chars": chars, "tokens": tokens}
+
+
+def _list_entry(
+    items: List[str],
+    previous: Optional[Dict[str, Any]],
+    count: Optional[Callable[[str], int]],
+) -> Dict[str, Any]:
+    n = len(items)
+    last = hash(items[-1]) if items else None
+    if previous is not None:
+        done = previous.get("count", 0)
+        if done == n and previous.get("last") == last:
+            return previous
+        # 只追加：之前计入的最后一条仍在原位置
+        if 0 < done < n and hash(items[done - 1]) == previous.get("last"):
+            chars, tokens = _measure(items[done:], count)
+            return {"count": n, "last": last,
+                    "chars": previous["chars"] + chars, "tokens": previous["tokens"] + tokens}
+    chars, tokens = _measure(items, count)
+    return {"count": n, "last": last, "chars": chars, "tokens": tokens}
+
+
+def update_context_ledger(state: DeepThinkState) -> Dict[str, Any]:
+    """
+    Return the state's ledger brought up to date with its current contents.
+
+    未变化的部分直接复用 (不读取文本)，返回新的账本字典而不修改旧账本。
+    """
+    name, count = get_context_tokenizer()
+    previous = state.get("context_ledger") or {}
+    if previous.get("tokenizer") != name:
+        previous = {}
+
+    texts = previous.get("texts", {})
+    old_strategies = previous.get("strategies", {})
+    strategies: Dict[str, Dict[str, Any]] = {}
+    for s in state.get("strategies", []):
+        old = old_strategies.get(s.get("id"), {})
+        strategies[s.get("id")] = {
+            "text": _text_entry([s.get("rationale") or "", s.get("assumption") or ""], old.get("text"), count),
+            "trajectory": _list_entry(s.get("trajectory", []), old.get("trajectory"), count),
+        }
+
+    return {
+        "tokenizer": name,
+        "texts": {field: _text_entry([state.get(field) or ""], texts.get(field), count) for field in _TEXT_FIELDS},
+        "history": _list_entry(state.get("history", []), previous.get("history"), count),
+        "strategies": strategies,
+    }
+
+
+def _entries(ledger: Dict[str, Any]) -> List[Dict[str, Any]]:
+    entries = list(ledger.get("texts", {}).values()) + [ledger.get("history", {})]
+    for s in ledger.get("strategies", {}).values():
+        entries.extend((s["text"], s["trajectory"]))
+    return entries
+
+
+def ledger_char_count(ledger: Dict[str, Any]) -> int:
+    return sum(e.get("chars", 0) for e in _entries(ledger))
+
+
+def ledger_token_count(ledger: Dict[str, Any]) -> int:
+    """Token count recorded in the ledger (char estimate unless a tokenizer was used)."""
+    if ledger.get("tokenizer", TOKENIZER_CHARS) == TOKENIZER_CHARS:
+        return ledger_char_count(ledger) // CHARS_PER_TOKEN
+    return sum(e.get("tokens", 0) for e in _entries(ledger))
+
+
+def with_context_ledger(state: DeepThinkState) -> DeepThinkState:
+    """Attach the updated ledger to a node's return value."""
+    state["context_ledger"] = update_context_ledger(state)
+    return state
@@ -5,25 +5,42 @@ Graph Builder - Deep Think Evolving 主流程图
 Phase 1 (问题理解): TaskDecomposer → Researcher → StrategyGenerator
 Phase 2 (初评): Judge → Evolution  
 Phase 3 (执行循环): ArchitectScheduler → Executor → Judge → Evolution → (收敛?)
+          fanout 模式: ArchitectScheduler ─Send→ strategy_chain × N → chain_merge → Evolution
 横切关注点: Distiller 在需要时动态触发
+
+LLM 节点同时提供同步与异步 (*_async) 版本：在事件循环中构建图时 (服务器
+graph.astream) 使用异步版本，网络 I/O 直接在事件循环上并发；CLI 的
+graph.invoke 使用同步版本。
 """
 
-from typing import Literal
+import asyncio
+from typing import Literal, Optional
 from langgraph.graph import StateGraph, END
 from src.core.state import DeepThinkState
 
 # New Agent imports
-from src.agents.task_decomposer import task_decomposer_node
-from src.agents.researcher import research_node
-from src.agents.strategy_generator import strategy_generator_node
-from src.agents.architect import architect_scheduler_node, strategy_architect_node
-from src.agents.propagation import propagation_node  # 子节点生成
+from src.agents.task_decomposer import task_decomposer_node, task_decomposer_node_async
+from src.agents.researcher import research_node, research_node_async
+from src.agents.strategy_generator import strategy_generator_node, strategy_generator_node_async
+from src.agents.architect import (
+    architect_scheduler_node,
+    architect_scheduler_node_async,
+    strategy_architect_node,
+)
+from src.agents.propagation import propagation_node, propagation_node_async  # 子节点生成
 
 # Existing agents
-from src.agents.judge import judge_node
+from src.agents.judge import judge_node, judge_node_async
 from src.agents.evolution import evolution_node
-from src.agents.executor import executor_node
-from src.agents.distiller import distiller_node, distiller_for_judge_node
+from src.agents.executor import executor_node, executor_node_async
+from src.agents.distiller import distiller_node, distiller_node_async, distiller_for_judge_node
+from src.agents.strategy_chain import (
+    chain_merge_node,
+    chain_merge_node_async,
+    route_after_architect,
+    strategy_chain_node,
+    strategy_chain_node_async,
+)
 # Note: writer_node removed - report generation is now dynamically handled by Executor
 # Note: distiller_node now runs BEFORE strategy_generator for context purity
 
@@ -107,7 +124,32 @@ def should_research_continue(state: DeepThinkState) -> Literal["research_more",
     return "proceed"
 
 
-def build_deep_think_graph():
+# 节点名 -> (同步版本, 异步版本)；evolution / distiller_for_judge 没有网络 I/O，只有同步版本
+NODE_IMPLEMENTATIONS = {
+    "task_decomposer": (task_decomposer_node, task_decomposer_node_async),
+    "researcher": (research_node, research_node_async),
+    "distiller": (distiller_node, distiller_node_async),
+    "strategy_generator": (strategy_generator_node, strategy_generator_node_async),
+    "distiller_for_judge": (distiller_for_judge_node, None),
+    "judge": (judge_node, judge_node_async),
+    "evolution": (evolution_node, None),
+    "propagation": (propagation_node, propagation_node_async),
+    "architect_scheduler": (architect_scheduler_node, architect_scheduler_node_async),
+    "executor": (executor_node, executor_node_async),
+    "strategy_chain": (strategy_chain_node, strategy_chain_node_async),
+    "chain_merge": (chain_merge_node, chain_merge_node_async),
+}
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def build_deep_think_graph(use_async: Optional[bool] = None):
     """
     Constructs the Deep Think Evolving StateGraph with new Agent architecture.
     
@@ -122,6 +164,8 @@ def build_deep_think_graph():
         Evolution -> (should_continue?) 
             -> ArchitectScheduler -> Executor -> DistillerForJudge -> Judge -> Evolution
             -> WriterAgent -> END (if converged)
+        config["execution_mode"] == "fanout":
+            ArchitectScheduler -> Send(strategy_chain) per strategy -> ChainMerge -> Evolution
     
     Key Features:
     - TaskDecomposer breaks down problem into subtasks and information needs
@@ -130,22 +174,36 @@ def build_deep_think_graph():
     - Architect now schedules execution tasks (UCB-driven)
     - Executor executes tasks and can generate variants
     - distiller_for_judge runs BEFORE every Judge call for clean context
+    
+    Args:
+        use_async: Wire the async node implementations (the graph must then be run
+            with ainvoke/astream). Defaults to True when called inside a running
+            event loop (e.g. the FastAPI server), False otherwise (CLI).
     """
+    if use_async is None:
+        use_async = _in_event_loop()
+    
+    def node(name: str):
+        sync_impl, async_impl = NODE_IMPLEMENTATIONS[name]
+        return async_impl if use_async and async_impl else sync_impl
+    
     workflow = StateGraph(DeepThinkState)
     
     # ========== Phase 1: Problem Understanding ==========
-    workflow.add_node("task_decomposer", task_decomposer_node)
-    workflow.add_node("researcher", research_node)
-    workflow.add_node("distiller", distiller_node)  # Required: context purity for StrategyGenerator
-    workflow.add_node("strategy_generator", strategy_generator_node)
+    workflow.add_node("task_decomposer", node("task_decomposer"))
+    workflow.add_node("researcher", node("researcher"))
+    workflow.add_node("distiller", node("distiller"))  # Required: context purity for StrategyGenerator
+    workflow.add_node("strategy_generator", node("strategy_generator"))
     
     # ========== Phase 2 & 3: Evaluation & Execution ==========
-    workflow.add_node("distiller_for_judge", distiller_for_judge_node)
-    workflow.add_node("judge", judge_node)
-    workflow.add_node("evolution", evolution_node)
-    workflow.add_node("propagation", propagation_node)  # 新增: 子节点生成
-    workflow.add_node("architect_scheduler", architect_scheduler_node)
-    workflow.add_node("executor", executor_node)
+    workflow.add_node("distiller_for_judge", node("distiller_for_judge"))
+    workflow.add_node("judge", node("judge"))
+    workflow.add_node("evolution", node("evolution"))
+    workflow.add_node("propagation", node("propagation"))  # 新增: 子节点生成
+    workflow.add_node("architect_scheduler", node("architect_scheduler"))
+    workflow.add_node("executor", node("executor"))
+    workflow.add_node("strategy_chain", node("strategy_chain"))  # fanout: 单策略 执行→评分
+    workflow.add_node("chain_merge", node("chain_merge"))  # fanout: Evolution 前的屏障
     # Note: Report generation is now dynamically handled by Executor (no fixed writer node)
     
     # ========== Entry Point ==========
@@ -191,8 +249,15 @@ def build_deep_think_graph():
     workflow.add_edge("propagation", "architect_scheduler")
     
     # ArchitectScheduler -> Executor -> DistillerForJudge -> Judge -> Evolution (loop)
-    workflow.add_edge("architect_scheduler", "executor")
+    # or, in fanout mode, one strategy_chain per strategy (Send) -> ChainMerge -> Evolution
+    workflow.add_conditional_edges(
+        "architect_scheduler",
+        route_after_architect,
+        ["executor", "strategy_chain", "chain_merge"],
+    )
     workflow.add_edge("executor", "distiller_for_judge")
+    workflow.add_edge("strategy_chain", "chain_merge")
+    workflow.add_edge("chain_merge", "evolution")
     # Note: distiller_for_judge -> judge -> evolution edges already defined above
     
     # ========== Compile ==========
@@ -0,0 +1,136 @@
+"""
+Progress Reporter - 从图节点向前端推送流式进度
+
+图节点在 LangGraph 的工作线程中同步执行，而 WebSocket 广播
+(SimulationManager.broadcast) 是服务器事件循环上的协程。ProgressReporter
+把两者连接起来：节点在任意线程调用 emit / stream，消息被调度到广播所在的
+事件循环上发送。未设置广播函数时 (CLI / 测试) 所有调用都是空操作。
+
+流式文本会被合并后再发送 (按字符数或时间间隔)，避免每个 token 一条消息。
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+BroadcastFunc = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# 合并流式增量：累计到这么多字符或超过这个间隔 (秒) 才发送一次
+STREAM_FLUSH_CHARS = 200
+STREAM_FLUSH_INTERVAL = 0.25
+
+
+class ProgressStream:
+    """Buffers streamed text for one task and emits coalesced deltas."""
+
+    def __init__(
+        self,
+        reporter: "ProgressReporter",
+        event_type: str,
+        data: Dict[str, Any],
+        flush_chars: int = STREAM_FLUSH_CHARS,
+        flush_interval: float = STREAM_FLUSH_INTERVAL,
+    ):
+        self.reporter = reporter
+        self.event_type = event_type
+        self.data = data
+        self.flush_chars = flush_chars
+        self.flush_interval = flush_interval
+        self.text_length = 0
+        self.closed = False
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def write(self, delta: str) -> None:
+        if not delta:
+            return
+        with self._lock:
+            if self.closed:
+                return
+            self._pending.append(delta)
+            self._pending_chars += len(delta)
+            self.text_length += len(delta)
+            due = (
+                self._pending_chars >= self.flush_chars
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            message = self._take_message(done=False) if due else None
+        if message:
+            self.reporter.emit(message)
+
+    def close(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            message = self._take_message(done=True, error=error)
+        self.reporter.emit(message)
+
+    def _take_message(self, done: bool, error: Optional[str] = None) -> Dict[str, Any]:
+        delta = "".join(self._pending)
+        self._pending = []
+        self._pending_chars = 0
+        self._last_flush = time.monotonic()
+        data = {**self.data, "delta": delta, "text_length": self.text_length, "done": done}
+        if error:
+            data["error"] = error
+        return {"type": self.event_type, "data": data}
+
+
+class ProgressReporter:
+    """Thread-safe bridge from graph nodes to an async broadcast function."""
+
+    def __init__(self):
+        self._broadcast_func: Optional[BroadcastFunc] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def set_broadcast_func(
+        self,
+        func: BroadcastFunc,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+    ) -> None:
+        """Register the broadcast coroutine and the loop it must run on."""
+        with self._lock:
+            self._broadcast_func = func
+            self._loop = loop or asyncio.get_running_loop()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._broadcast_func = None
+            self._loop = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._broadcast_func is not None
+
+    def emit(self, message: Dict[str, Any]) -> None:
+        """Schedule ``message`` for broadcast without blocking the caller."""
+        with self._lock:
+            func, loop = self._broadcast_func, self._loop
+        if func is None or loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        try:
+            if running is loop:
+                loop.create_task(func(message))
+            else:
+                asyncio.run_coroutine_threadsafe(func(message), loop)
+        except RuntimeError as e:
+            # 事件循环正在关闭：进度消息可以丢弃
+            print(f"[Progress] Dropped {message.get('type')} event: {e}")
+
+    def stream(self, event_type: str, data: Dict[str, Any]) -> ProgressStream:
+        """Open a coalescing text stream whose events carry ``data`` as metadata."""
+        return ProgressStream(self, event_type, data)
+
+
+# Global reporter instance
+progress_reporter = ProgressReporter()
@@ -8,6 +8,24 @@ import operator
 # but for now we might replace lists entirely or append.
 # For strategies, we usually want to replace the list or update it.
 
+def merge_chain_results(
+    left: Optional[List[Dict[str, Any]]],
+    right: Optional[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Reducer for fan-out chain results (execution_mode="fanout").
+
+    并行的 strategy_chain 各自追加一条结果 (按 task_id 去重，其他节点返回
+    {**state} 时不会重复追加)；返回 None 表示汇合后清空。
+    """
+    if right is None:
+        return []
+    merged = list(left or [])
+    seen = {r.get("task_id") for r in merged}
+    merged.extend(r for r in right if r.get("task_id") not in seen)
+    return merged
+
+
 # Strategy status values as defined in spec.md §3.3
 StrategyStatus = Literal["active", "pruned", "completed", "expanded", "pruned_synthesized"]
 
@@ -90,9 +108,20 @@ class DeepThinkState(TypedDict):
     # Distilled context for Judge (prevents context rot)
     judge_context: Optional[str]
     
+    # Judge score cache: strategy_id -> {key, score, reasoning, reuses}
+    # 未变化的策略复用上次评分 (见 judge.get_rejudge_policy)
+    judge_cache: Optional[Dict[str, Dict[str, Any]]]
+    
     # Architect decisions for Executor
     architect_decisions: Optional[List[Dict[str, Any]]]  # [{strategy_id, executor_instruction, context_injection}]
     
+    # Incrementally maintained context sizes (see core.context_ledger), updated by
+    # the nodes that append history / trajectory entries
+    context_ledger: Optional[Dict[str, Any]]
+    
+    # Fan-out mode: per-strategy executor→judge chain results, merged at chain_merge
+    chain_results: Annotated[Optional[List[Dict[str, Any]]], merge_chain_results]
+    
     # Final Report (generated dynamically by Executor when Architect assigns synthesis tasks)
     final_report: Optional[str]
     report_version: Optional[int]  # Report version number, supports incremental updates
@@ -202,3 +202,68 @@ def embed_text(document: str) -> list[float]:
     except Exception as error:
         print(f"[ERROR] Failed to embed text: {error}")
         return []
+
+
+def _get_modelscope_embeddings_batch(
+    documents: list[str], api_key: str, endpoint: str, model: str
+) -> list[list[float]]:
+    """Embed several documents in one request (OpenAI-compatible list input)."""
+
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "model": model,
+        "input": documents,
+        "encoding_format": "float"
+    }
+
+    response = requests.post(endpoint, json=payload, headers=headers, timeout=120)
+    response.raise_for_status()
+
+    data = response.json().get("data") or []
+    # Responses carry an "index" per item; order by it rather than trusting list order
+    ordered = sorted(data, key=lambda item: item.get("index", 0))
+    return [item.get("embedding", []) for item in ordered]
+
+
+def embed_texts(documents: list[str]) -> list[list[float]]:
+    """Embed many documents with a single batched request.
+
+    Blank documents map to an empty vector. If the batched request fails, each
+    document is retried individually through ``embed_text`` so one bad input
+    does not cost the whole batch.
+    """
+
+    results: list[list[float]] = [[] for _ in documents]
+    pending = [(i, doc) for i, doc in enumerate(documents) if doc and doc.strip()]
+    if not pending:
+        return results
+
+    if _resolve_use_mock(None):
+        dim = _mock_embedding_dimension()
+        for i, _ in pending:
+            results[i] = np.random.rand(dim).tolist()
+        return results
+
+    api_key = os.environ.get(MODELSCOPE_API_KEY_ENV)
+    if not api_key:
+        print(f"[ERROR] {MODELSCOPE_API_KEY_ENV} not set. Cannot embed text.")
+        return results
+
+    endpoint = os.environ.get("MODELSCOPE_API_ENDPOINT", DEFAULT_MODELSCOPE_API_ENDPOINT)
+    model = os.environ.get("MODELSCOPE_EMBEDDING_MODEL", DEFAULT_MODELSCOPE_MODEL)
+
+    try:
+        vectors = _get_modelscope_embeddings_batch([doc for _, doc in pending], api_key, endpoint, model)
+        if len(vectors) != len(pending):
+            raise ValueError(f"expected {len(pending)} embeddings, received {len(vectors)}")
+        for (i, _), vector in zip(pending, vectors):
+            results[i] = vector
+    except Exception as error:
+        print(f"[WARNING] Batched embedding failed ({error}); falling back to single requests.")
+        for i, doc in pending:
+            results[i] = embed_text(doc)
+
+    return results
@@ -0,0 +1,466 @@
+"""
+Fake LLM - 本地离线的 Gemini 替身 (压测 / 编排基准)
+
+USE_MOCK_AGENTS 会跳过 Agent 的 prompt 构造、调度与解析代码，无法反映真实的
+编排开销。这里提供 genai.Client 与 ChatGoogleGenerativeAI 的替身，Agent 走的是
+与真实模型完全相同的代码路径 (llm_scheduler / llm_call_policy / JSON 解析)：
+
+- 按 prompt 的输出格式识别调用方 Agent，返回符合其 schema 的 JSON
+  (任务拆解、研究背景、初始策略、子策略、调度决策、执行结果、综合报告、评分)
+- 可配置的延迟分布 (fixed / uniform / lognormal，可按 Agent 覆盖) 与失败率
+  (失败抛出 503 ServerError，会被 llm_call_policy 当作瞬时故障重试 / 熔断)
+- 响应带 usage_metadata，按 Agent 累计调用、失败与 token 数
+
+通过 llm_clients.use_fake(FakeLLM(...)) 注入，或设置环境变量 FAKE_LLM=true。
+Agent 仍会检查 GEMINI_API_KEY，设置任意值即可 (例如 GEMINI_API_KEY=fake)；
+嵌入不经过这里，离线运行时配合 USE_MOCK_EMBEDDING=true。
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from google.genai import errors, types
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from src.llm_call_policy import parse_agent_values
+
+
+LATENCY_FIXED = "fixed"
+LATENCY_UNIFORM = "uniform"
+LATENCY_LOGNORMAL = "lognormal"
+LATENCY_DISTRIBUTIONS = (LATENCY_FIXED, LATENCY_UNIFORM, LATENCY_LOGNORMAL)
+
+DEFAULT_FAKE_LATENCY = 0.05
+DEFAULT_FAKE_JITTER = 0.5
+STREAM_CHUNKS = 4
+
+# (prompt 中的输出格式标记, Agent 名)，按从具体到一般的顺序匹配
+_AGENT_MARKERS: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("feasibility_score", "[id: "), "judge_batch"),
+    (("feasibility_score",), "judge"),
+    (("report_summary",), "executor_synthesis"),
+    (("execution_result",), "executor"),
+    (("executor_instruction",), "architect"),
+    (("information_status",), "researcher"),
+    (("information_needs",), "task_decomposer"),
+    (("success_criteria",), "strategy_architect"),
+    (("strategy_name", "父策略"), "propagation"),
+    (("strategy_name",), "strategy_generator"),
+    (("Information Distiller",), "distiller"),
+)
+
+_NUM_CHILDREN_RE = re.compile(r"生成 \*\*(\d+)\*\* 个")
+_ARCHITECT_ID_RE = re.compile(r"\[([0-9a-fA-F-]{4,})\.\.\.\]")
+_JUDGE_ID_RE = re.compile(r"\[id: ([^\]]+)\]")
+
+
+def detect_agent(prompt: str) -> str:
+    """Name of the agent whose prompt this is (``chat`` if unknown)."""
+    for markers, agent in _AGENT_MARKERS:
+        if all(marker in prompt for marker in markers):
+            return agent
+    return "chat"
+
+
+def estimate_tokens(text: str) -> int:
+    # 与 distiller.estimate_token_count 相同的粗略估计: 约 4 个字符一个 token
+    return max(1, len(text) // 4) if text else 0
+
+
+def _prompt_text(contents: Any) -> str:
+    """Flatten genai ``contents`` / LangChain messages into plain text."""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, BaseMessage):
+        return _prompt_text(contents.content)
+    if isinstance(contents, dict):
+        return _prompt_text(contents.get("parts") or contents.get("text") or "")
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(_prompt_text(item) for item in contents)
+    if isinstance(contents, types.Content):
+        return "\n".join(part.text or "" for part in contents.parts or [])
+    if isinstance(contents, types.Part):
+        return contents.text or ""
+    return str(contents)
+
+
+@dataclass
+class _FakeStats:
+    calls: int = 0
+    failures: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    latency_total: float = 0.0
+
+
+class FakeLLM:
+    """Schema-aware stand-in for Gemini with configurable latency, failures and usage."""
+
+    def __init__(
+        self,
+        latency: float = DEFAULT_FAKE_LATENCY,
+        latency_dist: str = LATENCY_LOGNORMAL,
+        jitter: float = DEFAULT_FAKE_JITTER,
+        agent_latencies: Optional[Dict[str, float]] = None,
+        failure_rate: float = 0.0,
+        agent_failure_rates: Optional[Dict[str, float]] = None,
+        strategies_per_call: int = 3,
+        variant_rate: float = 0.1,
+        synthesis_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_dist}")
+        self.latency = max(0.0, latency)
+        self.latency_dist = latency_dist
+        self.jitter = max(0.0, jitter)
+        self.agent_latencies = dict(agent_latencies or {})
+        self.failure_rate = min(max(failure_rate, 0.0), 1.0)
+        self.agent_failure_rates = dict(agent_failure_rates or {})
+        self.strategies_per_call = max(1, strategies_per_call)
+        self.variant_rate = variant_rate
+        self.synthesis_rate = synthesis_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _FakeStats] = {}
+        self._counter = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLM":
+        seed = os.environ.get("FAKE_LLM_SEED")
+        dist = os.environ.get("FAKE_LLM_LATENCY_DIST", LATENCY_LOGNORMAL).lower()
+        if dist not in LATENCY_DISTRIBUTIONS:
+            print(f"[FakeLLM] Unknown FAKE_LLM_LATENCY_DIST {dist!r}, using {LATENCY_LOGNORMAL}")
+            dist = LATENCY_LOGNORMAL
+        return cls(
+            latency=float(os.environ.get("FAKE_LLM_LATENCY", DEFAULT_FAKE_LATENCY)),
+            latency_dist=dist,
+            jitter=float(os.environ.get("FAKE_LLM_LATENCY_JITTER", DEFAULT_FAKE_JITTER)),
+            agent_latencies=parse_agent_values(os.environ.get("FAKE_LLM_AGENT_LATENCIES")),
+            failure_rate=float(os.environ.get("FAKE_LLM_FAILURE_RATE", 0.0)),
+            agent_failure_rates=parse_agent_values(os.environ.get("FAKE_LLM_AGENT_FAILURE_RATES")),
+            synthesis_rate=float(os.environ.get("FAKE_LLM_SYNTHESIS_RATE", 0.0)),
+            seed=int(seed) if seed else None,
+        )
+
+    # ---- behaviour ----------------------------------------------------
+
+    def sample_latency(self, agent: str) -> float:
+        mean = self.agent_latencies.get(agent, self.latency)
+        if mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_dist == LATENCY_FIXED or self.jitter == 0:
+                return mean
+            if self.latency_dist == LATENCY_UNIFORM:
+                return self._rng.uniform(mean * max(0.0, 1 - self.jitter), mean * (1 + self.jitter))
+            # 对数正态: 长尾延迟，均值保持为 mean
+            sigma = self.jitter
+            return mean * self._rng.lognormvariate(-sigma * sigma / 2, sigma)
+
+    def _should_fail(self, agent: str) -> bool:
+        rate = self.agent_failure_rates.get(agent, self.failure_rate)
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def _stat(self, agent: str) -> _FakeStats:
+        stats = self._stats.get(agent)
+        if stats is None:
+            stats = self._stats[agent] = _FakeStats()
+        return stats
+
+    def _begin(self, prompt: str) -> Tuple[str, float]:
+        """Pick the agent and latency for a call; raises the injected failure if drawn."""
+        agent = detect_agent(prompt)
+        latency = self.sample_latency(agent)
+        fail = self._should_fail(agent)
+        with self._lock:
+            stats = self._stat(agent)
+            stats.calls += 1
+            stats.latency_total += latency
+            if fail:
+                stats.failures += 1
+        if fail:
+            raise errors.ServerError(
+                503, {"error": {"code": 503, "message": "fake overload", "status": "UNAVAILABLE"}}
+            )
+        return agent, latency
+
+    def _finish(self, agent: str, prompt: str) -> Tuple[str, Dict[str, int]]:
+        text = self.respond(agent, prompt)
+        usage = {"input_tokens": estimate_tokens(prompt), "output_tokens": estimate_tokens(text)}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        with self._lock:
+            stats = self._stat(agent)
+            stats.input_tokens += usage["input_tokens"]
+            stats.output_tokens += usage["output_tokens"]
+        return text, usage
+
+    def generate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        agent, latency = self._begin(prompt)
+        time.sleep(latency)
+        return self._finish(agent, prompt)
+
+    async def agenerate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        agent, latency = self._begin(prompt)
+        await asyncio.sleep(latency)
+        return self._finish(agent, prompt)
+
+    # ---- responses ----------------------------------------------------
+
+    def _next(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def _chance(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def _score(self) -> float:
+        with self._lock:
+            return round(self._rng.uniform(3.0, 9.0), 1)
+
+    def _strategies(self, count: int, prefix: str) -> List[Dict[str, Any]]:
+        items = []
+        for _ in range(count):
+            n = self._next()
+            items.append({
+                "strategy_name": f"{prefix} {n}",
+                "rationale": f"{prefix} {n} 的核心逻辑：从不同角度拆解问题并逐步验证。",
+                "initial_assumption": f"{prefix} {n} 所依赖的关键条件成立",
+                "milestones": [{"title": "分析", "summary": "明确约束与目标"}],
+            })
+        return items
+
+    def respond(self, agent: str, prompt: str) -> str:
+        """Schema-valid response body for ``agent``'s prompt."""
+        if agent == "task_decomposer":
+            return json.dumps({
+                "subtasks": ["分析问题的核心约束", "枚举候选方案", "评估方案可行性"],
+                "information_needs": [
+                    {"topic": "相关领域的现有方法", "type": "factual", "priority": 5},
+                    {"topic": "问题的基本原理", "type": "conceptual", "priority": 3},
+                ],
+            }, ensure_ascii=False)
+        if agent == "researcher":
+            return json.dumps({
+                "research_context": "模拟研究背景：相关定义、现有方法及其局限、潜在挑战。",
+                "information_status": "sufficient",
+                "missing_items": [],
+            }, ensure_ascii=False)
+        if agent == "strategy_generator":
+            return json.dumps(self._strategies(self.strategies_per_call, "策略"), ensure_ascii=False)
+        if agent == "propagation":
+            match = _NUM_CHILDREN_RE.search(prompt)
+            count = int(match.group(1)) if match else 1
+            return json.dumps(self._strategies(count, "子策略"), ensure_ascii=False)
+        if agent == "strategy_architect":
+            items = self._strategies(self.strategies_per_call, "策略")
+            for item in items:
+                item["milestones"] = {"阶段 1: 发现": [
+                    {"title": "分析", "summary": "明确约束与目标", "success_criteria": ["约束已列出"]}
+                ]}
+            return json.dumps(items, ensure_ascii=False)
+        if agent == "architect":
+            decisions = [
+                {"strategy_id": prefix, "executor_instruction": "深化此策略并验证其核心假设", "context_injection": ""}
+                for prefix in dict.fromkeys(_ARCHITECT_ID_RE.findall(prompt))
+            ]
+            if self._chance(self.synthesis_rate):
+                decisions.append({"strategy_id": None, "executor_instruction": "综合当前发现生成阶段性报告",
+                                  "context_injection": ""})
+            return json.dumps(decisions, ensure_ascii=False)
+        if agent == "executor":
+            variant = None
+            if self._chance(self.variant_rate):
+                variant = self._strategies(1, "变体策略")[0]
+                variant.pop("milestones")
+            return json.dumps({
+                "execution_result": f"模拟执行结果 #{self._next()}：完成了指令要求的分析。",
+                "new_insights": ["模拟洞见"],
+                "next_steps": ["继续验证假设"],
+                "variant_strategy": variant,
+            }, ensure_ascii=False)
+        if agent == "executor_synthesis":
+            return json.dumps({
+                "report": f"# 模拟阶段性报告 #{self._next()}\n\n## 主要发现\n- 模拟发现\n\n## 推荐方案\n模拟推荐。",
+                "report_summary": "模拟综合",
+                "key_findings": ["模拟发现"],
+                "branch_rationale": "模拟分支理由",
+            }, ensure_ascii=False)
+        if agent == "judge_batch":
+            return json.dumps([
+                {"id": strategy_id, "feasibility_score": self._score(), "reasoning": "模拟评语"}
+                for strategy_id in dict.fromkeys(_JUDGE_ID_RE.findall(prompt))
+            ], ensure_ascii=False)
+        if agent == "judge":
+            return json.dumps({"feasibility_score": self._score(), "reasoning": "模拟评语"}, ensure_ascii=False)
+        if agent == "distiller":
+            return "模拟背景摘要：核心定义、现有方案的优缺点以及主要约束。"
+        return f"模拟回复 #{self._next()}"
+
+    # ---- clients ------------------------------------------------------
+
+    def genai_client(self) -> "FakeGenaiClient":
+        return FakeGenaiClient(self)
+
+    def chat_model(self, model: str, temperature: float = 1.0) -> "FakeChatModel":
+        return FakeChatModel(fake=self, model=model, temperature=temperature)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            agents = {
+                agent: {
+                    "calls": s.calls,
+                    "failures": s.failures,
+                    "input_tokens": s.input_tokens,
+                    "output_tokens": s.output_tokens,
+                    "mean_latency": s.latency_total / s.calls if s.calls else 0.0,
+                }
+                for agent, s in self._stats.items()
+            }
+        return {
+            "agents": agents,
+            "calls": sum(a["calls"] for a in agents.values()),
+            "input_tokens": sum(a["input_tokens"] for a in agents.values()),
+            "output_tokens": sum(a["output_tokens"] for a in agents.values()),
+        }
+
+
+def fake_llm_from_env() -> Optional[FakeLLM]:
+    """FakeLLM configured from FAKE_LLM_* env vars, or None unless FAKE_LLM=true."""
+    if os.environ.get("FAKE_LLM", "false").lower() != "true":
+        return None
+    print("[FakeLLM] FAKE_LLM=true: all Gemini calls are served locally")
+    return FakeLLM.from_env()
+
+
+# ---- google-genai ---------------------------------------------------------
+
+def _response(text: str, model: str, usage: Optional[Dict[str, int]] = None) -> types.GenerateContentResponse:
+    response = types.GenerateContentResponse(
+        candidates=[types.Candidate(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            finish_reason=types.FinishReason.STOP,
+        )],
+        model_version=model,
+    )
+    if usage:
+        response.usage_metadata = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=usage["input_tokens"],
+            candidates_token_count=usage["output_tokens"],
+            total_token_count=usage["total_tokens"],
+        )
+    return response
+
+
+def _split(text: str, parts: int = STREAM_CHUNKS) -> List[str]:
+    size = max(1, math.ceil(len(text) / parts))
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class _FakeModels:
+    def __init__(self, fake: FakeLLM):
+        self._fake = fake
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Any:
+        text, usage = self._fake.generate(_prompt_text(contents))
+        return _response(text, model, usage)
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Iterator[Any]:
+        text, usage = self._fake.generate(_prompt_text(contents))
+        chunks = _split(text)
+        return iter([
+            _response(chunk, model, usage if i == len(chunks) - 1 else None) for i, chunk in enumerate(chunks)
+        ])
+
+
+class _FakeAsyncModels:
+    def __init__(self, fake: FakeLLM):
+        self._fake = fake
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Any:
+        text, usage = await self._fake.agenerate(_prompt_text(contents))
+        return _response(text, model, usage)
+
+    async def generate_content_stream(
+        self, *, model: str, contents: Any, config: Any = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        prompt = _prompt_text(contents)
+        agent, latency = self._fake._begin(prompt)
+        text, usage = self._fake._finish(agent, prompt)
+        return self._stream(text, model, usage, latency)
+
+    @staticmethod
+    async def _stream(text: str, model: str, usage: Dict[str, int], latency: float) -> AsyncIterator[Any]:
+        # 延迟均匀分摊到各个块上，模拟逐步输出
+        chunks = _split(text)
+        for i, chunk in enumerate(chunks):
+            await asyncio.sleep(latency / len(chunks))
+            yield _response(chunk, model, usage if i == len(chunks) - 1 else None)
+
+
+class _FakeAio:
+    def __init__(self, fake: FakeLLM):
+        self.models = _FakeAsyncModels(fake)
+
+
+class FakeGenaiClient:
+    """Drop-in for genai.Client (models / aio.models generate_content[_stream])."""
+
+    def __init__(self, fake: FakeLLM):
+        self.models = _FakeModels(fake)
+        self.aio = _FakeAio(fake)
+
+
+# ---- LangChain ------------------------------------------------------------
+
+class FakeChatModel(BaseChatModel):
+    """Drop-in for ChatGoogleGenerativeAI backed by a FakeLLM."""
+
+    fake: Any = Field(exclude=True)
+    model: str = "fake-gemini"
+    temperature: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-gemini"
+
+    @staticmethod
+    def _result(text: str, usage: Dict[str, int]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, usage_metadata=usage))])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self._result(*self.fake.generate(_prompt_text(messages)))
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return self._result(*(await self.fake.agenerate(_prompt_text(messages))))
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        # 替身从不发起工具调用 (例如 Judge 的 write_experience)
+        return self
@@ -12,6 +12,8 @@ export const useSimulation = () => {
     const [simulationStatus, setSimulationStatus] = useState<'idle' | 'running' | 'completed' | 'error' | 'awaiting_human'>('idle');
     const [hilRequest, setHilRequest] = useState<HilRequest | null>(null);
     const wsRef = useRef<WebSocket | null>(null);
+    // Accumulated executor_progress text per task_id
+    const executorStreamsRef = useRef<Record<string, string>>({});
 
     const addActivity = useCallback((activity: Omit<AgentActivity, 'id' | 'timestamp'>) => {
         const newActivity: AgentActivity = {
@@ -62,6 +64,7 @@ export const useSimulation = () => {
                             if (msg.data === 'started') {
                                 setSimulationStatus('running');
                                 setActivityLog([]); // Clear previous run
+                                executorStreamsRef.current = {};
                             } else if (msg.data === 'completed') {
                                 setSimulationStatus('completed');
                                 setCurrentAgent(null);
@@ -108,6 +111,36 @@ export const useSimulation = () => {
                             });
                             break;
 
+                        case 'executor_progress': {
+                            const progress = msg.data;
+                            const streamId = `executor-${progress.task_id}`;
+                            const text = (executorStreamsRef.current[progress.task_id] || '') + progress.delta;
+                            executorStreamsRef.current[progress.task_id] = text;
+                            if (progress.done) {
+                                delete executorStreamsRef.current[progress.task_id];
+                            }
+                            const label = progress.kind === 'synthesis'
+                                ? '综合报告'
+                                : `策略 "${progress.strategy_name}"`;
+                            const streamed: AgentActivity = {
+                                id: streamId,
+                                timestamp: new Date().toISOString(),
+                                agent: 'executor',
+                                message: progress.done ? `${label} 输出完成` : `${label} 输出中...`,
+                                // Only the tail is shown; the full result arrives with state_update
+                                detail: text.slice(-300),
+                                type: progress.done ? 'complete' : 'progress'
+                            };
+                            setActivityLog(prev => {
+                                const index = prev.findIndex(a => a.id === streamId);
+                                if (index === -1) return [...prev.slice(-99), streamed];
+                                const next = [...prev];
+                                next[index] = { ...streamed, timestamp: prev[index].timestamp };
+                                return next;
+                            });
+                            break;
+                        }
+
                         case 'hil_required':
                             console.log('[Simulation] HIL request received:', msg.data);
                             setHilRequest(msg.data);
@@ -0,0 +1,412 @@
+"""
+LLM Cache - 录制 / 回放 LLM 响应
+
+调试演化数学或前端时，此前只能调用真实 Gemini，或走 USE_MOCK_AGENTS 的硬编码
+分支 (跳过了真实的 prompt 构造与解析代码)。这里在客户端层缓存
+(模型, 配置, prompt) -> 响应，保存在本地 SQLite 中：
+
+- off (默认):     不缓存
+- record:        总是调用真实模型，并记录响应 (覆盖旧记录)
+- replay:        只从记录中返回，未命中抛出 LLMCacheMiss，绝不访问网络
+- read_through:  命中则复用，未命中调用真实模型并记录 (跨运行复用相同 prompt)
+
+由 LLM_CACHE_MODE / LLM_CACHE_PATH 配置。覆盖两条调用路径：
+- google-genai 客户端: llm_clients.get_genai_client 返回 CachingGenaiClient，
+  缓存 models / aio.models 的 generate_content 与 generate_content_stream
+  (流式响应按块记录，回放时按块重放)
+- LangChain 聊天模型: 通过 LangChain 的 BaseCache 接口 (含 bind_tools 的工具定义)
+
+回放时 Agent 仍会检查 GEMINI_API_KEY，离线运行时设置任意值即可
+(例如 GEMINI_API_KEY=offline)，请求不会发出。
+
+策略 / 任务 id 是每次运行随机生成的 uuid4 (Architect 的 prompt 中显示为 "[1a2b3c4d...]")，
+键中按出现顺序替换为占位符 (见 RunIds)，因此相同问题的不同运行可以互相回放。
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from google.genai import types
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+
+LLM_CACHE_MODE_OFF = "off"
+LLM_CACHE_MODE_RECORD = "record"
+LLM_CACHE_MODE_REPLAY = "replay"
+LLM_CACHE_MODE_READ_THROUGH = "read_through"
+LLM_CACHE_MODES = (
+    LLM_CACHE_MODE_OFF,
+    LLM_CACHE_MODE_RECORD,
+    LLM_CACHE_MODE_REPLAY,
+    LLM_CACHE_MODE_READ_THROUGH,
+)
+DEFAULT_LLM_CACHE_PATH = "llm_cache/llm_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    model TEXT,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+# 完整的 uuid，或 prompt 中以 "..." 截断显示的 8 位前缀
+_RUN_ID_RE = re.compile(
+    r"\b[0-9a-f]{8}(?:-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b|(?=\.\.\.))"
+)
+_PLACEHOLDER_RE = re.compile(r"@@run-id(8?)-(\d+)@@")
+
+
+class LLMCacheMiss(LookupError):
+    """Replay mode found no recorded response for a request."""
+
+
+class RunIds:
+    """
+    Run-random ids found in one request, numbered by first appearance.
+
+    请求中的 id 在键里替换为占位符；模型经常把 id 原样写回响应，
+    因此记录时响应中的 id 也替换为占位符，回放时再换回本次运行的 id。
+    """
+
+    def __init__(self) -> None:
+        self.stems: List[str] = []
+        self.full: Dict[int, str] = {}
+
+    def normalise(self, text: str) -> str:
+        def _replace(match: "re.Match[str]") -> str:
+            token = match.group(0)
+            stem = token[:8]
+            if stem not in self.stems:
+                self.stems.append(stem)
+            n = self.stems.index(stem)
+            if len(token) > 8:
+                self.full[n] = token
+                return f"@@run-id-{n}@@"
+            return f"@@run-id8-{n}@@"
+
+        return _RUN_ID_RE.sub(_replace, text)
+
+    def mask(self, payload: Any) -> Any:
+        if not self.stems:
+            return payload
+        data = json.dumps(payload, ensure_ascii=False)
+        # 先替换完整 id，再替换单独出现的前缀
+        for n, full in self.full.items():
+            data = data.replace(full, f"@@run-id-{n}@@")
+        for n, stem in enumerate(self.stems):
+            data = data.replace(stem, f"@@run-id8-{n}@@")
+        return json.loads(data)
+
+    def unmask(self, payload: Any) -> Any:
+        def _replace(match: "re.Match[str]") -> str:
+            n = int(match.group(2))
+            if match.group(1):
+                return self.stems[n] if n < len(self.stems) else match.group(0)
+            return self.full.get(n, match.group(0))
+
+        data = json.dumps(payload, ensure_ascii=False)
+        if "@@run-id" not in data:
+            return payload
+        return json.loads(_PLACEHOLDER_RE.sub(_replace, data))
+
+
+def _jsonable(value: Any) -> Any:
+    """Best-effort JSON form of request parts (pydantic types, lists, dicts)."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json", exclude_none=True)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def request_key(kind: str, model: str, contents: Any, config: Any = None, ids: Optional[RunIds] = None) -> str:
+    """Stable hash of one generation request (run-random ids collected into ``ids``)."""
+    raw = json.dumps(
+        {"kind": kind, "model": model, "contents": _jsonable(contents), "config": _jsonable(config)},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    raw = (ids if ids is not None else RunIds()).normalise(raw)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseStore:
+    """SQLite-backed key -> response payload store (thread-safe)."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM responses WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, kind: str, model: str, payload: Any) -> None:
+        data = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, kind, model, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, kind, model, data, time.time()),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """Mode + store shared by the genai wrapper and the LangChain cache."""
+
+    def __init__(self, mode: str = LLM_CACHE_MODE_OFF, path: str = DEFAULT_LLM_CACHE_PATH):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode: {mode}")
+        self.mode = mode
+        self.path = path
+        self._store: Optional[LLMResponseStore] = None
+        self._store_lock = threading.Lock()
+        self._langchain_cache: Optional["LangChainLLMCache"] = None
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMCache":
+        mode = os.environ.get("LLM_CACHE_MODE", LLM_CACHE_MODE_OFF).lower()
+        if mode not in LLM_CACHE_MODES:
+            print(f"[LLMCache] Unknown LLM_CACHE_MODE {mode!r}, caching disabled")
+            mode = LLM_CACHE_MODE_OFF
+        return cls(mode, os.environ.get("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH))
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != LLM_CACHE_MODE_OFF
+
+    @property
+    def store(self) -> LLMResponseStore:
+        with self._store_lock:
+            if self._store is None:
+                self._store = LLMResponseStore(self.path)
+                print(f"[LLMCache] Mode: {self.mode}, store: {self.path}")
+            return self._store
+
+    def lookup(self, key: str, model: str, ids: Optional[RunIds] = None) -> Optional[Any]:
+        """Recorded payload for ``key`` if this mode reads the cache; raises on a replay miss."""
+        if self.mode == LLM_CACHE_MODE_RECORD:
+            return None
+        payload = self.store.get(key)
+        if payload is not None:
+            self.hits += 1
+            return ids.unmask(payload) if ids is not None else payload
+        self.misses += 1
+        if self.mode == LLM_CACHE_MODE_REPLAY:
+            raise LLMCacheMiss(f"No recorded response for model {model} (replay mode)")
+        return None
+
+    def record(self, key: str, kind: str, model: str, payload: Any, ids: Optional[RunIds] = None) -> None:
+        self.store.put(key, kind, model, ids.mask(payload) if ids is not None else payload)
+        self.recorded += 1
+
+    def wrap_genai_client(self, client: Any) -> Any:
+        return CachingGenaiClient(client, self) if self.enabled else client
+
+    def langchain_cache(self) -> Optional["LangChainLLMCache"]:
+        if not self.enabled:
+            return None
+        if self._langchain_cache is None:
+            self._langchain_cache = LangChainLLMCache(self)
+        return self._langchain_cache
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+# ---- google-genai ---------------------------------------------------------
+
+def _dump_response(response: Any) -> Dict[str, Any]:
+    return response.model_dump(mode="json", exclude_none=True)
+
+
+def _load_response(data: Dict[str, Any]) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse.model_validate(data)
+
+
+class _CachingModels:
+    """Sync ``client.models`` replacement."""
+
+    def __init__(self, models: Any, cache: LLMCache):
+        self._models = models
+        self._cache = cache
+
+    def generate_content(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Any:
+        ids = RunIds()
+        key = request_key("generate", model, contents, config, ids)
+        recorded = self._cache.lookup(key, model, ids)
+        if recorded is not None:
+            return _load_response(recorded)
+        response = self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        self._cache.record(key, "generate", model, _dump_response(response), ids)
+        return response
+
+    def generate_content_stream(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Iterator[Any]:
+        ids = RunIds()
+        key = request_key("stream", model, contents, config, ids)
+        recorded = self._cache.lookup(key, model, ids)
+        if recorded is not None:
+            return iter([_load_response(chunk) for chunk in recorded])
+        return self._record_stream(key, model, ids, self._models.generate_content_stream(
+            model=model, contents=contents, config=config, **kwargs
+        ))
+
+    def _record_stream(self, key: str, model: str, ids: RunIds, stream: Iterator[Any]) -> Iterator[Any]:
+        chunks: List[Dict[str, Any]] = []
+        for chunk in stream:
+            chunks.append(_dump_response(chunk))
+            yield chunk
+        # 只记录完整的流
+        self._cache.record(key, "stream", model, chunks, ids)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._models, name)
+
+
+class _CachingAsyncModels:
+    """Async ``client.aio.models`` replacement."""
+
+    def __init__(self, models: Any, cache: LLMCache):
+        self._models = models
+        self._cache = cache
+
+    async def generate_content(self, *, model: str, contents: Any, config: Any = None, **kwargs: Any) -> Any:
+        ids = RunIds()
+        key = request_key("generate", model, contents, config, ids)
+        recorded = self._cache.lookup(key, model, ids)
+        if recorded is not None:
+            return _load_response(recorded)
+        response = await self._models.generate_content(model=model, contents=contents, config=config, **kwargs)
+        self._cache.record(key, "generate", model, _dump_response(response), ids)
+        return response
+
+    async def generate_content_stream(
+        self, *, model: str, contents: Any, config: Any = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        ids = RunIds()
+        key = request_key("stream", model, contents, config, ids)
+        recorded = self._cache.lookup(key, model, ids)
+        if recorded is not None:
+            return self._replay_stream(recorded)
+        stream = await self._models.generate_content_stream(model=model, contents=contents, config=config, **kwargs)
+        return self._record_stream(key, model, ids, stream)
+
+    @staticmethod
+    async def _replay_stream(chunks: Sequence[Dict[str, Any]]) -> AsyncIterator[Any]:
+        for chunk in chunks:
+            yield _load_response(chunk)
+
+    async def _record_stream(
+        self, key: str, model: str, ids: RunIds, stream: AsyncIterator[Any]
+    ) -> AsyncIterator[Any]:
+        chunks: List[Dict[str, Any]] = []
+        async for chunk in stream:
+            chunks.append(_dump_response(chunk))
+            yield chunk
+        self._cache.record(key, "stream", model, chunks, ids)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._models, name)
+
+
+class _CachingAio:
+    def __init__(self, aio: Any, cache: LLMCache):
+        self._aio = aio
+        self.models = _CachingAsyncModels(aio.models, cache)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._aio, name)
+
+
+class CachingGenaiClient:
+    """google-genai client wrapper that records / replays generate_content calls."""
+
+    def __init__(self, client: Any, cache: LLMCache):
+        self._client = client
+        self.models = _CachingModels(client.models, cache)
+        self.aio = _CachingAio(client.aio, cache)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+# ---- LangChain ------------------------------------------------------------
+
+class LangChainLLMCache(BaseCache):
+    """LangChain BaseCache backed by the shared response store."""
+
+    def __init__(self, cache: LLMCache):
+        self._cache = cache
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str, ids: RunIds) -> str:
+        return request_key("langchain", llm_string, prompt, ids=ids)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        ids = RunIds()
+        recorded = self._cache.lookup(self._key(prompt, llm_string, ids), "langchain", ids)
+        if recorded is None:
+            return None
+        generations: List[Generation] = []
+        for item in recorded:
+            if "message" in item:
+                message = messages_from_dict([item["message"]])[0]
+                generations.append(ChatGeneration(message=message, generation_info=item.get("generation_info")))
+            else:
+                generations.append(Generation(text=item.get("text", ""), generation_info=item.get("generation_info")))
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        payload = []
+        for generation in return_val:
+            item: Dict[str, Any] = {"generation_info": _jsonable(generation.generation_info)}
+            if isinstance(generation, ChatGeneration):
+                item["message"] = message_to_dict(generation.message)
+            else:
+                item["text"] = generation.text
+            payload.append(item)
+        ids = RunIds()
+        self._cache.record(self._key(prompt, llm_string, ids), "langchain", "langchain", payload, ids)
+
+    def clear(self, **kwargs: Any) -> None:
+        # 录制文件由用户管理 (删除 LLM_CACHE_PATH 即可)，这里不做破坏性操作
+        pass
+
+
+# Global cache instance
+llm_cache = LLMCache.from_env()
@@ -0,0 +1,452 @@
+"""
+LLM Call Policy - LLM 调用的截止时间、对冲、重试与熔断
+
+Propagation / Executor 等节点并发扇出 LLM 调用后要等全部返回才能进入下一步，
+一个异常缓慢的 Gemini 调用就会拖住整轮迭代。这里为每次调用提供：
+
+- 截止时间 (deadline): 超时后取消请求并抛出 LLMDeadlineExceeded，由各 Agent
+  现有的错误分支兜底 (LLM_CALL_TIMEOUT，按 Agent 覆盖 LLM_AGENT_TIMEOUTS)
+- 对冲请求 (hedging, 默认关闭): 调用耗时超过该 Agent 近期延迟的某个分位数
+  (LLM_HEDGE_PERCENTILE) 后再发一份相同请求，取先完成的结果，另一份被取消
+- 按 Agent 的对冲预算: 对冲次数不超过该 Agent 调用次数的一定比例
+  (LLM_HEDGE_BUDGET，按 Agent 覆盖 LLM_AGENT_HEDGE_BUDGETS)，避免成本失控
+- 分类重试: 429 / 5xx / 网络错误等瞬时故障按带抖动的指数退避重试
+  (LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY)；400 / 401 等
+  请求本身的错误立即抛出；超时已经耗尽了整个截止时间，不再重试
+- 按模型熔断: 连续 LLM_BREAKER_THRESHOLD 次瞬时故障后熔断
+  LLM_BREAKER_COOLDOWN 秒，期间直接抛出 LLMCircuitOpenError 而不再发请求；
+  冷却结束后放行一个试探请求，成功则恢复
+
+重试耗尽或熔断时抛出 LLMUnavailableError，Agent 据此走可预期的降级路径
+(而不是把瞬时 429 当成"信息不足"或空结果)。
+
+截止时间与对冲计时都从拿到 llm_scheduler 槽位之后开始，排队时间不计入；
+对冲请求同样需要单独的槽位。用法::
+
+    response = await llm_call_policy.call(
+        "propagation", model_name,
+        lambda: client.aio.models.generate_content(...),
+    )
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from src.llm_scheduler import llm_scheduler
+
+
+# 0 表示不设截止时间
+DEFAULT_LLM_CALL_TIMEOUT = 180.0
+DEFAULT_HEDGE_PERCENTILE = 95.0
+# 对冲次数占调用次数的上限比例
+DEFAULT_HEDGE_BUDGET = 0.1
+# 延迟样本少于这个数时不对冲 (分位数还不可信)
+HEDGE_MIN_SAMPLES = 10
+LATENCY_SAMPLE_SIZE = 256
+
+DEFAULT_LLM_MAX_RETRIES = 3
+DEFAULT_RETRY_BASE_DELAY = 1.0
+DEFAULT_RETRY_MAX_DELAY = 30.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.0
+
+# 瞬时故障: 配额 / 过载 / 服务端错误
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_STATUS_MARKERS = ("RESOURCE_EXHAUSTED", "UNAVAILABLE", "INTERNAL", "429", "503")
+
+ERROR_RETRYABLE = "retryable"
+ERROR_TIMEOUT = "timeout"
+ERROR_FATAL = "fatal"
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """Raised when an LLM call (including any hedge) misses its deadline."""
+
+
+class LLMUnavailableError(RuntimeError):
+    """The model is unavailable: retries exhausted or its circuit breaker is open."""
+
+
+class LLMCircuitOpenError(LLMUnavailableError):
+    """Raised without calling the model while its circuit breaker is open."""
+
+
+class LLMPartialOutputError(RuntimeError):
+    """A streamed call failed after emitting output; retrying would duplicate it."""
+
+
+def classify_error(exc: BaseException) -> str:
+    """Classify an LLM call failure as retryable, timeout or fatal."""
+    if isinstance(exc, LLMPartialOutputError):
+        return ERROR_FATAL
+    if isinstance(exc, (LLMDeadlineExceeded, asyncio.TimeoutError)):
+        return ERROR_TIMEOUT
+    if isinstance(exc, (httpx.TransportError, ConnectionError)):
+        return ERROR_RETRYABLE
+    # google.genai.errors.APIError / google.api_core 异常都带 HTTP code
+    code = getattr(exc, "code", None)
+    if isinstance(code, int):
+        return ERROR_RETRYABLE if code in RETRYABLE_STATUS_CODES else ERROR_FATAL
+    # langchain 会把底层错误包装成普通异常，只能看消息 / 原因链
+    cause = exc.__cause__
+    if cause is not None and cause is not exc and classify_error(cause) == ERROR_RETRYABLE:
+        return ERROR_RETRYABLE
+    message = str(exc)
+    if any(marker in message for marker in RETRYABLE_STATUS_MARKERS):
+        return ERROR_RETRYABLE
+    return ERROR_FATAL
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name)
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        print(f"[LLMCallPolicy] Ignoring invalid {name}: {raw!r}")
+        return default
+
+
+def parse_agent_values(raw: Optional[str]) -> Dict[str, float]:
+    """Parse ``"executor=300,propagation=60"`` into per-agent float settings."""
+    values: Dict[str, float] = {}
+    for item in (raw or "").split(","):
+        agent, sep, value = item.strip().partition("=")
+        if not sep or not agent.strip():
+            continue
+        try:
+            values[agent.strip()] = max(0.0, float(value))
+        except ValueError:
+            print(f"[LLMCallPolicy] Ignoring invalid agent setting: {item!r}")
+    return values
+
+
+class _AgentStats:
+    __slots__ = ("calls", "hedges", "hedge_wins", "timeouts", "errors", "retries", "latencies")
+
+    def __init__(self):
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+
+class _CircuitBreaker:
+    """Consecutive-failure breaker for one model (closed -> open -> half-open)."""
+
+    __slots__ = ("failures", "opened_at", "trial_in_flight", "trips")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.trips = 0
+
+    def state(self, cooldown: float) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if time.monotonic() - self.opened_at < cooldown else "half_open"
+
+
+def _percentile(samples, percentile: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(percentile / 100.0 * (len(ordered) - 1))]
+
+
+class LLMCallPolicy:
+    """Deadlines, budgeted hedging and retries per agent; circuit breakers per model."""
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_LLM_CALL_TIMEOUT,
+        hedging: bool = False,
+        hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        hedge_budget: float = DEFAULT_HEDGE_BUDGET,
+        agent_timeouts: Optional[Dict[str, float]] = None,
+        agent_hedge_budgets: Optional[Dict[str, float]] = None,
+        max_retries: int = DEFAULT_LLM_MAX_RETRIES,
+        retry_base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+        retry_max_delay: float = DEFAULT_RETRY_MAX_DELAY,
+        breaker_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+        breaker_cooldown: float = DEFAULT_BREAKER_COOLDOWN,
+    ):
+        self.timeout = max(0.0, timeout)
+        self.hedging = hedging
+        self.hedge_percentile = min(100.0, max(0.0, hedge_percentile))
+        self.hedge_budget = max(0.0, hedge_budget)
+        self.agent_timeouts: Dict[str, float] = dict(agent_timeouts or {})
+        self.agent_hedge_budgets: Dict[str, float] = dict(agent_hedge_budgets or {})
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = max(0.0, retry_base_delay)
+        self.retry_max_delay = max(self.retry_base_delay, retry_max_delay)
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = max(0.0, breaker_cooldown)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _AgentStats] = {}
+        self._breakers: Dict[str, _CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> "LLMCallPolicy":
+        return cls(
+            timeout=_env_float("LLM_CALL_TIMEOUT", DEFAULT_LLM_CALL_TIMEOUT),
+            hedging=os.environ.get("LLM_HEDGING", "false").lower() == "true",
+            hedge_percentile=_env_float("LLM_HEDGE_PERCENTILE", DEFAULT_HEDGE_PERCENTILE),
+            hedge_budget=_env_float("LLM_HEDGE_BUDGET", DEFAULT_HEDGE_BUDGET),
+            agent_timeouts=parse_agent_values(os.environ.get("LLM_AGENT_TIMEOUTS")),
+            agent_hedge_budgets=parse_agent_values(os.environ.get("LLM_AGENT_HEDGE_BUDGETS")),
+            max_retries=int(_env_float("LLM_MAX_RETRIES", DEFAULT_LLM_MAX_RETRIES)),
+            retry_base_delay=_env_float("LLM_RETRY_BASE_DELAY", DEFAULT_RETRY_BASE_DELAY),
+            retry_max_delay=_env_float("LLM_RETRY_MAX_DELAY", DEFAULT_RETRY_MAX_DELAY),
+            breaker_threshold=int(_env_float("LLM_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+            breaker_cooldown=_env_float("LLM_BREAKER_COOLDOWN", DEFAULT_BREAKER_COOLDOWN),
+        )
+
+    def timeout_for(self, agent: str) -> Optional[float]:
+        timeout = self.agent_timeouts.get(agent, self.timeout)
+        return timeout if timeout > 0 else None
+
+    def _agent_stats(self, agent: str) -> _AgentStats:
+        stats = self._stats.get(agent)
+        if stats is None:
+            stats = self._stats[agent] = _AgentStats()
+        return stats
+
+    def hedge_delay(self, agent: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None if this agent can't hedge yet."""
+        if not self.hedging:
+            return None
+        with self._lock:
+            stats = self._agent_stats(agent)
+            if len(stats.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            return _percentile(stats.latencies, self.hedge_percentile)
+
+    def _take_hedge_budget(self, agent: str) -> bool:
+        budget = self.agent_hedge_budgets.get(agent, self.hedge_budget)
+        with self._lock:
+            stats = self._agent_stats(agent)
+            if stats.hedges + 1 > budget * stats.calls:
+                return False
+            stats.hedges += 1
+            return True
+
+    def _record(self, agent: str, latency: Optional[float] = None, hedge_won: bool = False,
+                timed_out: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._agent_stats(agent)
+            if latency is not None:
+                stats.latencies.append(latency)
+            stats.hedge_wins += int(hedge_won)
+            stats.timeouts += int(timed_out)
+            stats.errors += int(failed)
+
+    # ---- circuit breaker -----------------------------------------------
+
+    def _breaker(self, model: str) -> _CircuitBreaker:
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = _CircuitBreaker()
+        return breaker
+
+    def _admit(self, model: str) -> bool:
+        """
+        Fail fast while ``model``'s breaker is open; let one trial through when half-open.
+
+        返回本次调用是否占用了半开试探名额。
+        """
+        with self._lock:
+            breaker = self._breaker(model)
+            state = breaker.state(self.breaker_cooldown)
+            if state == "closed":
+                return False
+            if state == "half_open" and not breaker.trial_in_flight:
+                breaker.trial_in_flight = True
+                return True
+        raise LLMCircuitOpenError(f"Circuit breaker open for model {model}")
+
+    def _on_success(self, model: str) -> None:
+        with self._lock:
+            breaker = self._breaker(model)
+            if breaker.opened_at is not None:
+                print(f"[LLMCallPolicy] Circuit breaker closed for {model}")
+            breaker.failures = 0
+            breaker.opened_at = None
+            breaker.trial_in_flight = False
+
+    def _on_failure(self, model: str, kind: str) -> None:
+        with self._lock:
+            breaker = self._breaker(model)
+            if kind == ERROR_FATAL:
+                # 请求本身的错误不代表模型不可用；半开试探也算结束
+                breaker.trial_in_flight = False
+                return
+            breaker.failures += 1
+            if breaker.trial_in_flight or breaker.failures >= self.breaker_threshold:
+                if breaker.opened_at is None or breaker.trial_in_flight:
+                    breaker.trips += 1
+                    print(f"[LLMCallPolicy] Circuit breaker opened for {model} "
+                          f"({breaker.failures} consecutive failures)")
+                breaker.opened_at = time.monotonic()
+                breaker.trial_in_flight = False
+
+    def _abandon_trial(self, model: str) -> None:
+        with self._lock:
+            self._breaker(model).trial_in_flight = False
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt)))
+
+    # ---- calls ---------------------------------------------------------
+
+    async def _slotted(self, model: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        async with llm_scheduler.aslot(model):
+            return await factory()
+
+    async def call(
+        self,
+        agent: str,
+        model: str,
+        factory: Callable[[], Awaitable[Any]],
+        hedge: bool = True,
+        retry: bool = True,
+    ) -> Any:
+        """
+        Run ``factory()`` with the agent's deadline, hedging, retries and the model's breaker.
+
+        factory 每次调用都必须发起一个新的请求 (对冲 / 重试时会被多次调用)；
+        流式输出不能对冲 (hedge=False)，已输出部分文本后失败应抛出
+        LLMPartialOutputError 以阻止重试。
+
+        Raises:
+            LLMCircuitOpenError: 模型熔断中，未发出请求
+            LLMUnavailableError: 瞬时故障重试耗尽 (原异常在 __cause__ 中)
+            LLMDeadlineExceeded: 超过截止时间
+            其他异常: 不可重试的请求错误，原样抛出
+        """
+        with self._lock:
+            self._agent_stats(agent).calls += 1
+        attempt = 0
+        while True:
+            trial = self._admit(model)
+            try:
+                result = await self._attempt(agent, model, factory, hedge)
+            except Exception as e:
+                kind = classify_error(e)
+                self._on_failure(model, kind)
+                if kind != ERROR_RETRYABLE:
+                    raise
+                if not retry or attempt >= self.max_retries:
+                    raise LLMUnavailableError(
+                        f"{agent} LLM call failed after {attempt + 1} attempts: {e}"
+                    ) from e
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                with self._lock:
+                    self._agent_stats(agent).retries += 1
+                print(f"[LLMCallPolicy] {agent}: transient error ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # 被取消 (停止模拟 / 兄弟任务失败 / 对冲落败) 不说明模型状态，
+                # 但必须释放半开试探名额，否则熔断器永远停在半开
+                if trial:
+                    self._abandon_trial(model)
+                raise
+            self._on_success(model)
+            return result
+
+    async def _attempt(
+        self,
+        agent: str,
+        model: str,
+        factory: Callable[[], Awaitable[Any]],
+        hedge: bool,
+    ) -> Any:
+        """One attempt: scheduler slot + deadline + optional hedge."""
+        timeout = self.timeout_for(agent)
+        delay = self.hedge_delay(agent) if hedge else None
+
+        async with llm_scheduler.aslot(model):
+            started = time.monotonic()
+            deadline = started + timeout if timeout is not None else None
+            primary = asyncio.ensure_future(factory())
+            pending = {primary}
+            hedge_task: Optional[asyncio.Future] = None
+            error: Optional[BaseException] = None
+            try:
+                if delay is not None and (deadline is None or started + delay < deadline):
+                    done, _ = await asyncio.wait(pending, timeout=delay)
+                    if not done and self._take_hedge_budget(agent):
+                        print(f"[LLMCallPolicy] {agent}: no response after {delay:.1f}s, hedging request")
+                        hedge_task = asyncio.ensure_future(self._slotted(model, factory))
+                        pending.add(hedge_task)
+
+                while pending:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        break
+                    done, pending = await asyncio.wait(
+                        pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            self._record(agent, time.monotonic() - started, hedge_won=task is hedge_task)
+                            return task.result()
+                        error = task.exception()
+            finally:
+                for task in pending:
+                    task.cancel()
+
+        if pending:
+            self._record(agent, timed_out=True)
+            raise LLMDeadlineExceeded(f"{agent} LLM call exceeded {timeout:.0f}s deadline")
+        self._record(agent, failed=True)
+        raise error
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-agent call counts, hedge usage, timeouts and latency percentiles."""
+        with self._lock:
+            agents = {}
+            for agent, stats in self._stats.items():
+                samples = list(stats.latencies)
+                agents[agent] = {
+                    "calls": stats.calls,
+                    "hedges": stats.hedges,
+                    "hedge_wins": stats.hedge_wins,
+                    "timeouts": stats.timeouts,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "p50_latency_ms": round(_percentile(samples, 50) * 1000, 2) if samples else 0.0,
+                    "p95_latency_ms": round(_percentile(samples, 95) * 1000, 2) if samples else 0.0,
+                    "timeout_s": self.timeout_for(agent),
+                    "hedge_budget": self.agent_hedge_budgets.get(agent, self.hedge_budget),
+                }
+            breakers = {
+                model: {
+                    "state": breaker.state(self.breaker_cooldown),
+                    "consecutive_failures": breaker.failures,
+                    "trips": breaker.trips,
+                }
+                for model, breaker in self._breakers.items()
+            }
+            return {
+                "hedging": self.hedging,
+                "hedge_percentile": self.hedge_percentile,
+                "max_retries": self.max_retries,
+                "agents": agents,
+                "breakers": breakers,
+            }
+
+
+# Global call policy instance
+llm_call_policy = LLMCallPolicy.from_env()
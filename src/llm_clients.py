@@ -0,0 +1,152 @@
+"""
+LLM Client Registry - 进程级共享的 Gemini 客户端
+
+此前每个节点在每次调用时都新建客户端 (Propagation / Executor 甚至每个任务一个)，
+每次都要重新建立 TLS 连接。这里按配置缓存客户端实例，使其底层 HTTP 连接池
+在所有 Agent 与 server.py 之间复用：
+
+- genai.Client: 按 (api_key, http_options) 缓存；模型名是每次请求的参数，不影响客户端
+- ChatGoogleGenerativeAI: 按 (model, api_key, temperature, generation_config, 其他参数) 缓存
+
+客户端的异步连接池绑定在创建它的事件循环上，因此缓存按调用时所在的事件循环
+分区：同步节点 (经 run_coroutine_sync 在后台循环执行) 与服务器事件循环上的
+异步节点各自持有一份，事件循环关闭后对应条目自动重建。
+
+LLM_CACHE_MODE 开启时 (见 llm_cache)，两类客户端都会经过录制 / 回放缓存。
+注入 FakeLLM 后 (use_fake 或 FAKE_LLM=true，见 fake_llm)，两类客户端都由本地替身提供。
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google import genai
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from src.fake_llm import FakeLLM, fake_llm_from_env
+from src.llm_cache import llm_cache
+
+
+DEFAULT_MAX_CLIENTS = 32
+
+
+def _freeze(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _fingerprint(api_key: Optional[str]) -> str:
+    # 缓存键中不保存明文 API key
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LLMClientRegistry:
+    """Thread-safe LRU registry of Gemini clients keyed by (model, config)."""
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS, fake: Optional[FakeLLM] = None):
+        self.max_clients = max(1, max_clients)
+        self.fake = fake
+        # key -> (client, weakref to the event loop it was created on, or None)
+        self._clients: "OrderedDict[Tuple[str, ...], Tuple[Any, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+
+    def _get_or_create(self, key: Tuple[str, ...], factory: Callable[[], Any]) -> Any:
+        loop = _current_loop()
+        key = key + (str(id(loop)) if loop else "-",)
+        with self._lock:
+            cached = self._clients.get(key)
+            if cached is not None:
+                client, loop_ref = cached
+                owner = loop_ref() if loop_ref else None
+                # id() 可能被新循环复用：只有创建时的循环仍然存活才命中
+                if loop_ref is None or (owner is loop and not owner.is_closed()):
+                    self._clients.move_to_end(key)
+                    self.hits += 1
+                    return client
+            client = factory()
+            self._clients[key] = (client, weakref.ref(loop) if loop else None)
+            self.created += 1
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return client
+
+    def get_genai_client(
+        self,
+        api_key: str,
+        http_options: Optional[Dict[str, Any]] = None,
+    ) -> genai.Client:
+        """Shared google-genai client (models are chosen per request)."""
+        if self.fake is not None:
+            return self.fake.genai_client()
+        key = ("genai", _fingerprint(api_key), _freeze(http_options))
+        if http_options:
+            return self._get_or_create(
+                key, lambda: llm_cache.wrap_genai_client(genai.Client(api_key=api_key, http_options=http_options))
+            )
+        return self._get_or_create(key, lambda: llm_cache.wrap_genai_client(genai.Client(api_key=api_key)))
+
+    def get_chat_model(
+        self,
+        model: str,
+        api_key: str,
+        temperature: float = 1.0,
+        generation_config: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> ChatGoogleGenerativeAI:
+        """Shared LangChain chat model for a given model + configuration."""
+        if self.fake is not None:
+            return self.fake.chat_model(model, temperature)
+        key = (
+            "chat",
+            model,
+            _fingerprint(api_key),
+            _freeze(temperature),
+            _freeze(generation_config),
+            _freeze(kwargs),
+        )
+
+        def _create() -> ChatGoogleGenerativeAI:
+            params: Dict[str, Any] = {
+                "model": model,
+                "google_api_key": api_key,
+                "temperature": temperature,
+                **kwargs,
+            }
+            if generation_config is not None:
+                params["generation_config"] = generation_config
+            cache = llm_cache.langchain_cache()
+            if cache is not None:
+                params["cache"] = cache
+            return ChatGoogleGenerativeAI(**params)
+
+        return self._get_or_create(key, _create)
+
+    def use_fake(self, fake: Optional[FakeLLM]) -> None:
+        """Serve every client from ``fake`` (None restores real clients)."""
+        with self._lock:
+            self.fake = fake
+            self._clients.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+# Global registry instance
+llm_clients = LLMClientRegistry(fake=fake_llm_from_env())
@@ -0,0 +1,267 @@
+"""
+LLM Scheduler - 全局 LLM 并发调度器
+
+多个节点可能同时扇出 LLM 调用 (Propagation / Executor / Judge 并发、知识库
+批量嵌入、聊天流)，此前没有任何机制协调它们对配额的总压力，交互式请求也会
+排在后台图计算之后。所有 LLM 调用都通过这里获取执行槽位：
+
+- 全局并发上限 (LLM_MAX_CONCURRENCY) 与按模型的并发上限 (LLM_MODEL_CONCURRENCY)
+- 优先级: interactive (聊天 / 节点展开) 总是先于 background (图节点、知识库写入)
+- 同一优先级内按 tenant (每次模拟运行一个) 轮询，避免一次模拟独占全部槽位
+- 可观测: 排队深度、在途数量、等待时间统计 (metrics())
+
+同步调用用 ``with llm_scheduler.slot(model)``，异步调用用
+``async with llm_scheduler.aslot(model)``。优先级与 tenant 默认从上下文
+(``llm_scheduler.context(...)``) 读取，会随 asyncio 任务、asyncio.to_thread 与
+run_coroutine_sync 传播，节点代码无需逐层传参。
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Iterator, AsyncIterator, Optional
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+# 数值越靠前优先级越高
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND)
+
+DEFAULT_LLM_MAX_CONCURRENCY = 8
+DEFAULT_TENANT = "default"
+# 嵌入请求 (知识库写入 / 反思归档) 使用的模型键，可在 LLM_MODEL_CONCURRENCY 中单独限流
+EMBEDDING_MODEL_KEY = "embedding"
+# 用于等待时间分位数统计的最近样本数
+WAIT_SAMPLE_SIZE = 512
+
+_priority_var: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default=PRIORITY_BACKGROUND)
+_tenant_var: contextvars.ContextVar[str] = contextvars.ContextVar("llm_tenant", default=DEFAULT_TENANT)
+
+
+def parse_model_limits(raw: Optional[str]) -> Dict[str, int]:
+    """Parse ``"model-a=4,model-b=2"`` into per-model concurrency limits."""
+    limits: Dict[str, int] = {}
+    for item in (raw or "").split(","):
+        model, sep, value = item.strip().partition("=")
+        if not sep or not model.strip():
+            continue
+        try:
+            limits[model.strip()] = max(1, int(value))
+        except ValueError:
+            print(f"[LLMScheduler] Ignoring invalid model limit: {item!r}")
+    return limits
+
+
+class _Waiter:
+    __slots__ = ("model", "priority", "tenant", "enqueued_at", "granted", "_event", "_loop", "_future")
+
+    def __init__(self, model: str, priority: str, tenant: str):
+        self.model = model
+        self.priority = priority
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self._event: Optional[threading.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._future: Optional[asyncio.Future] = None
+
+    def wake(self) -> None:
+        if self._future is not None:
+            self._loop.call_soon_threadsafe(_resolve, self._future)
+        else:
+            self._event.set()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class LLMScheduler:
+    """Priority + fair-share admission control for LLM calls (thread- and loop-safe)."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_LLM_MAX_CONCURRENCY,
+        model_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.model_limits: Dict[str, int] = dict(model_limits or {})
+        self._lock = threading.Lock()
+        # priority -> tenant -> FIFO of waiters (OrderedDict order = round-robin order)
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._in_flight = 0
+        self._in_flight_by_model: Dict[str, int] = {}
+        self._granted: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._wait_total: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._wait_max: Dict[str, float] = {p: 0.0 for p in PRIORITIES}
+        self._wait_samples: Dict[str, Deque[float]] = {p: deque(maxlen=WAIT_SAMPLE_SIZE) for p in PRIORITIES}
+
+    @classmethod
+    def from_env(cls) -> "LLMScheduler":
+        raw = os.environ.get("LLM_MAX_CONCURRENCY")
+        try:
+            max_concurrency = int(raw) if raw else DEFAULT_LLM_MAX_CONCURRENCY
+        except ValueError:
+            max_concurrency = DEFAULT_LLM_MAX_CONCURRENCY
+        return cls(max_concurrency, parse_model_limits(os.environ.get("LLM_MODEL_CONCURRENCY")))
+
+    # ---- context -------------------------------------------------------
+
+    @contextmanager
+    def context(self, priority: Optional[str] = None, tenant: Optional[str] = None) -> Iterator[None]:
+        """Set the default priority / tenant for LLM calls made in this context."""
+        tokens = []
+        if priority is not None:
+            if priority not in PRIORITIES:
+                raise ValueError(f"Unknown LLM priority: {priority}")
+            tokens.append((_priority_var, _priority_var.set(priority)))
+        if tenant is not None:
+            tokens.append((_tenant_var, _tenant_var.set(tenant)))
+        try:
+            yield
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
+
+    def _new_waiter(self, model: str, priority: Optional[str], tenant: Optional[str]) -> _Waiter:
+        priority = priority or _priority_var.get()
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown LLM priority: {priority}")
+        return _Waiter(model or "default", priority, tenant or _tenant_var.get())
+
+    # ---- admission -----------------------------------------------------
+
+    def _has_capacity(self, model: str) -> bool:
+        limit = self.model_limits.get(model)
+        return limit is None or self._in_flight_by_model.get(model, 0) < limit
+
+    def _grant_locked(self, waiter: _Waiter) -> None:
+        waiter.granted = True
+        self._in_flight += 1
+        self._in_flight_by_model[waiter.model] = self._in_flight_by_model.get(waiter.model, 0) + 1
+        waited = time.monotonic() - waiter.enqueued_at
+        self._granted[waiter.priority] += 1
+        self._wait_total[waiter.priority] += waited
+        self._wait_max[waiter.priority] = max(self._wait_max[waiter.priority], waited)
+        self._wait_samples[waiter.priority].append(waited)
+
+    def _dispatch_locked(self) -> None:
+        """Grant queued waiters while capacity remains (priority first, then round-robin)."""
+        while self._in_flight < self.max_concurrency:
+            waiter = self._next_waiter_locked()
+            if waiter is None:
+                return
+            self._grant_locked(waiter)
+            waiter.wake()
+
+    def _next_waiter_locked(self) -> Optional[_Waiter]:
+        for priority in PRIORITIES:
+            tenants = self._queues[priority]
+            for tenant in list(tenants):
+                queue = tenants[tenant]
+                # 队首模型已满时允许同一 tenant 中其他模型的请求先行 (work-conserving)
+                for waiter in queue:
+                    if self._has_capacity(waiter.model):
+                        queue.remove(waiter)
+                        if queue:
+                            tenants.move_to_end(tenant)
+                        else:
+                            del tenants[tenant]
+                        return waiter
+        return None
+
+    def _enqueue_locked(self, waiter: _Waiter) -> None:
+        self._queues[waiter.priority].setdefault(waiter.tenant, deque()).append(waiter)
+        self._dispatch_locked()
+
+    def _remove_locked(self, waiter: _Waiter) -> None:
+        tenants = self._queues[waiter.priority]
+        queue = tenants.get(waiter.tenant)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            if not queue:
+                del tenants[waiter.tenant]
+
+    def _release(self, waiter: _Waiter) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            remaining = self._in_flight_by_model.get(waiter.model, 1) - 1
+            if remaining > 0:
+                self._in_flight_by_model[waiter.model] = remaining
+            else:
+                self._in_flight_by_model.pop(waiter.model, None)
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, model: str, priority: Optional[str] = None, tenant: Optional[str] = None) -> Iterator[None]:
+        """Block the calling thread until an execution slot for ``model`` is granted."""
+        waiter = self._new_waiter(model, priority, tenant)
+        waiter._event = threading.Event()
+        with self._lock:
+            self._enqueue_locked(waiter)
+        waiter._event.wait()
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, priority: Optional[str] = None, tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """Await an execution slot for ``model`` without blocking the event loop."""
+        waiter = self._new_waiter(model, priority, tenant)
+        waiter._loop = asyncio.get_running_loop()
+        waiter._future = waiter._loop.create_future()
+        with self._lock:
+            self._enqueue_locked(waiter)
+        try:
+            await waiter._future
+        except BaseException:
+            with self._lock:
+                if not waiter.granted:
+                    self._remove_locked(waiter)
+                    raise
+            # 已被授予槽位但等待方被取消：归还槽位
+            self._release(waiter)
+            raise
+        try:
+            yield
+        finally:
+            self._release(waiter)
+
+    # ---- observability -------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, in-flight calls and wait-time statistics."""
+        with self._lock:
+            queues = {
+                priority: {tenant: len(queue) for tenant, queue in tenants.items()}
+                for priority, tenants in self._queues.items()
+            }
+            waits = {}
+            for priority in PRIORITIES:
+                samples = sorted(self._wait_samples[priority])
+                count = self._granted[priority]
+                waits[priority] = {
+                    "granted": count,
+                    "avg_wait_ms": round(self._wait_total[priority] / count * 1000, 2) if count else 0.0,
+                    "p95_wait_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 2) if samples else 0.0,
+                    "max_wait_ms": round(self._wait_max[priority] * 1000, 2),
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "model_limits": dict(self.model_limits),
+                "in_flight": self._in_flight,
+                "in_flight_by_model": dict(self._in_flight_by_model),
+                "queue_depth": {p: sum(q.values()) for p, q in queues.items()},
+                "queue_depth_by_tenant": queues,
+                "waits": waits,
+            }
+
+
+# Global scheduler instance
+llm_scheduler = LLMScheduler.from_env()
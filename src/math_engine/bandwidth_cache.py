@@ -0,0 +1,116 @@
+"""
+Population-versioned bandwidth (ε) cache.
+
+Evolution 节点在 compute_kde_optimized 中已经得到了当前种群的带宽 h。
+知识库召回用同一个 h 作为距离阈值 ε，没必要再做一次 O(N²·D) 的两两距离计算。
+
+- Evolution 每轮调用 publish() 发布 (种群指纹 -> 带宽)，版本号单调递增
+- 知识库搜索调用 lookup() 按指纹命中；未命中时才回退到 estimate_bandwidth
+- latest() 返回最近一次发布的带宽，用于调用方没有种群嵌入的场景
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from src.math_engine.kde import estimate_bandwidth
+
+
+DEFAULT_MAX_ENTRIES = 8
+
+
+def population_fingerprint(embeddings: np.ndarray) -> str:
+    """
+    Content hash of an (N, D) embedding matrix.
+
+    Hashing is O(N·D), which is what makes the cache worthwhile compared to
+    recomputing the O(N²·D) pairwise distances behind the bandwidth.
+    """
+    arr = np.ascontiguousarray(np.asarray(embeddings, dtype=float))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(arr.shape).encode("ascii"))
+    digest.update(arr.tobytes())
+    return digest.hexdigest()
+
+
+class BandwidthCache:
+    """Thread-safe LRU of population fingerprint -> (version, bandwidth)."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._latest: Optional[Tuple[int, float]] = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def publish(self, embeddings: np.ndarray, bandwidth: float) -> int:
+        """
+        Record the bandwidth computed by Evolution for the current population.
+
+        Returns:
+            The population version assigned to this publication.
+        """
+        return self._store(population_fingerprint(embeddings), bandwidth, mark_latest=True)
+
+    def _store(self, key: str, bandwidth: float, mark_latest: bool) -> int:
+        with self._lock:
+            self._version += 1
+            entry = (self._version, float(bandwidth))
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if mark_latest:
+                self._latest = entry
+            return self._version
+
+    def lookup(self, embeddings: np.ndarray) -> Optional[float]:
+        """Return the cached bandwidth for exactly this population, if any."""
+        key = population_fingerprint(embeddings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def latest(self) -> Optional[Tuple[int, float]]:
+        """Return (version, bandwidth) of the most recent publication."""
+        with self._lock:
+            return self._latest
+
+    def get_or_compute(self, embeddings: np.ndarray) -> float:
+        """
+        Cached bandwidth for the population, computing and caching it on a miss.
+
+        A miss does not move latest(): only Evolution publishes the canonical ε.
+        """
+        key = population_fingerprint(embeddings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        bandwidth = estimate_bandwidth(embeddings)
+        self._store(key, bandwidth, mark_latest=False)
+        return bandwidth
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest = None
+            self.hits = 0
+            self.misses = 0
+
+
+# Global cache instance shared by Evolution (writer) and the knowledge base (reader)
+bandwidth_cache = BandwidthCache()
@@ -4,7 +4,9 @@ from typing import Any, Iterable, List, TypedDict, Union
 
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
+from src.llm_cache import LLMCacheMiss
+from src.llm_clients import llm_clients
+from src.llm_scheduler import llm_scheduler
 
 import os
 DEFAULT_MODEL_NAME = os.environ.get("GEMINI_MODEL_ARCHITECT", os.environ.get("GEMINI_MODEL", "gemini-1.5-flash"))
@@ -89,9 +91,9 @@ def generate_strategic_blueprint(
             "thinking_budget": thinking_budget
         }
 
-    llm = ChatGoogleGenerativeAI(
+    llm = llm_clients.get_chat_model(
         model=model_name,
-        google_api_key=api_key,
+        api_key=api_key,
         temperature=0.7,
         generation_config=generation_config
     )
@@ -134,7 +136,10 @@ def generate_strategic_blueprint(
     chain = prompt | llm | parser
 
     try:
-        response = chain.invoke({"problem_state": problem_state})
+        with llm_scheduler.slot(model_name):
+            response = chain.invoke({"problem_state": problem_state})
+    except LLMCacheMiss:
+        raise
     except Exception as error:
         print(f"An error occurred during LangChain execution: {error}")
         return []
@@ -168,9 +173,9 @@ def expand_strategy_node(
         return "Error: GEMINI_API_KEY not set."
 
     # Use a simpler setup for expansion - standard chat
-    llm = ChatGoogleGenerativeAI(
+    llm = llm_clients.get_chat_model(
         model=model_name,
-        google_api_key=api_key,
+        api_key=api_key,
         temperature=0.7
     )
 
@@ -183,7 +188,10 @@ def expand_strategy_node(
     )
 
     try:
-        response = llm.invoke(prompt)
+        with llm_scheduler.slot(model_name):
+            response = llm.invoke(prompt)
         return response.content
+    except LLMCacheMiss:
+        raise
     except Exception as e:
         return f"Error expanding node: {str(e)}"
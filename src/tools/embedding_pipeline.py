@@ -0,0 +1,113 @@
+"""
+Embedding pipeline - 子策略生成后立即提交嵌入
+
+Propagation 生成的子策略要到下一次 evolution_node 才嵌入，而中间还要经过
+Architect / Executor / Distiller / Judge；嵌入延迟完全落在关键路径上。
+这里把嵌入提前到每个父策略的子节点生成完成的那一刻，在后台线程中与
+其余父策略的生成以及后续节点并行执行：
+
+- submit(children) 立即返回，嵌入在后台线程池中进行 (经过 llm_scheduler 的
+  embedding 限流，并继承提交方的 tenant / priority 上下文)
+- collect(strategies) 在 Evolution 中按策略 id 取回结果并写入 embedding；
+  尚未完成的会在这里等待，失败的留给 Evolution 原有的同步嵌入兜底
+
+结果按 id 保存而不是直接修改状态中的字典，因此与 LangGraph 是否复制状态无关。
+设置 EMBEDDING_PIPELINE=false 可关闭 (回到 Evolution 中同步嵌入)。
+"""
+
+import concurrent.futures
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from src import embedding_client
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+
+
+DEFAULT_PIPELINE_WORKERS = 2
+# 未被 collect 的结果上限 (运行中途结束时遗留的结果按提交顺序淘汰)
+MAX_PENDING_EMBEDDINGS = 1024
+
+
+def pipeline_enabled() -> bool:
+    return os.environ.get("EMBEDDING_PIPELINE", "true").lower() != "false"
+
+
+class EmbeddingPipeline:
+    """Background strategy embedding keyed by strategy id."""
+
+    def __init__(self, max_workers: int = DEFAULT_PIPELINE_WORKERS, max_pending: int = MAX_PENDING_EMBEDDINGS):
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._futures: "OrderedDict[str, concurrent.futures.Future]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.collected = 0
+
+    def _ensure_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="embedding-pipeline"
+            )
+        return self._executor
+
+    @staticmethod
+    def _embed(children: List[dict]) -> Dict[str, List[float]]:
+        # 在副本上嵌入：后台线程不触碰图状态中的策略字典
+        copies = [dict(child) for child in children]
+        with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+            embedding_client.embed_strategies(copies)
+        return {copy["id"]: copy.get("embedding") or [] for copy in copies}
+
+    def submit(self, children: List[dict]) -> None:
+        """Start embedding ``children`` in the background (one request batch per call)."""
+        children = [c for c in children if c.get("id") and not c.get("embedding")]
+        if not children:
+            return
+        context = contextvars.copy_context()
+        with self._lock:
+            future = self._ensure_executor().submit(context.run, self._embed, children)
+            for child in children:
+                self._futures[child["id"]] = future
+            while len(self._futures) > self.max_pending:
+                self._futures.popitem(last=False)
+            self.submitted += len(children)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def collect(self, strategies: List[dict], timeout: Optional[float] = None) -> int:
+        """
+        Fill in embeddings for strategies submitted earlier; returns how many were filled.
+
+        未提交过的、失败的或超时的策略保持原样，由调用方继续同步嵌入。
+        """
+        with self._lock:
+            wanted = [(s, self._futures.pop(s["id"], None)) for s in strategies if s.get("id") and not s.get("embedding")]
+        filled = 0
+        for strategy, future in wanted:
+            if future is None:
+                continue
+            try:
+                embedding = future.result(timeout=timeout).get(strategy["id"])
+            except Exception as e:
+                print(f"  [EmbeddingPipeline] Background embedding failed for '{strategy.get('name')}': {e}")
+                continue
+            if embedding:
+                strategy["embedding"] = embedding
+                filled += 1
+        with self._lock:
+            self.collected += filled
+        return filled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._futures.clear()
+
+
+# Global pipeline instance
+embedding_pipeline = EmbeddingPipeline()
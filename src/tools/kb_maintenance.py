@@ -0,0 +1,415 @@
+"""
+Knowledge Base Maintenance - 知识库容量管理
+
+知识库没有上限：每次运行都会新增分支归档，近似重复的经验不断堆积，
+搜索成本和快照体积随之无限增长。本模块提供一个维护引擎：
+
+1. 近似去重: 同类型条目之间嵌入距离 < duplicate_ratio * ε 视为重复，合并为一条
+   (保留最新条目，合并标签，记录 merged_from / merge_count)
+2. TTL: 按类型配置过期时间 (branch_archive 默认 30 天，抽象经验默认永久)
+3. 容量淘汰: 超过 max_entries 时按 "类型权重 × 年龄衰减 × 合并次数" 的保留分淘汰最低者
+
+增量模式只拿上次维护后新增/修改的条目与全量比较 (O(M·N·D) 而非 O(N²·D))，
+可以由 KnowledgeBaseMaintainer 在后台线程周期执行，也可以按需调用 run_maintenance。
+"""
+
+import json
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.math_engine.kde import estimate_bandwidth
+from src.tools.knowledge_base import get_kb_path
+
+
+MAINTENANCE_STATE_FILENAME = ".maintenance_state"  # 非 .json 后缀，避免被当作知识库条目
+SECONDS_PER_DAY = 86400.0
+
+# 保留权重: 抽象经验比具体的分支归档更值得长期保存
+DEFAULT_TYPE_WEIGHTS: Dict[str, float] = {
+    "meta_insight": 1.0,
+    "branching_heuristic": 0.9,
+    "lesson_learned": 0.9,
+    "success_pattern": 0.8,
+    "reflection": 0.5,
+    "branch_archive": 0.3,
+}
+
+# TTL (天)，None 表示永不过期
+DEFAULT_TTL_DAYS: Dict[str, Optional[float]] = {
+    "branch_archive": 30.0,
+    "reflection": 90.0,
+}
+
+
+@dataclass
+class MaintenancePolicy:
+    """Tunable knobs for knowledge-base capacity management."""
+
+    duplicate_ratio: float = 0.1  # 重复阈值 = duplicate_ratio * ε
+    duplicate_distance: Optional[float] = None  # 显式绝对阈值 (覆盖 ratio)
+    ttl_days: Dict[str, Optional[float]] = field(default_factory=lambda: dict(DEFAULT_TTL_DAYS))
+    max_entries: Optional[int] = 2000
+    type_weights: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_TYPE_WEIGHTS))
+    default_type_weight: float = 0.5
+    half_life_days: float = 30.0
+
+
+@dataclass
+class KBEntry:
+    """A knowledge-base file loaded for maintenance."""
+
+    path: Path
+    record: Dict[str, Any]
+    mtime: float
+
+    @property
+    def entry_type(self) -> str:
+        return self.record.get("type") or "reflection"
+
+    @property
+    def embedding(self) -> Optional[List[float]]:
+        return self.record.get("embedding") or None
+
+    @property
+    def created_ts(self) -> float:
+        created = self.record.get("created_at")
+        if created:
+            try:
+                parsed = datetime.fromisoformat(created)
+                if parsed.tzinfo is None:
+                    parsed = parsed.astimezone()
+                return parsed.timestamp()
+            except ValueError:
+                pass
+        return self.mtime
+
+    @property
+    def merge_count(self) -> int:
+        return int((self.record.get("metadata") or {}).get("merge_count", 0))
+
+
+@dataclass
+class MaintenanceReport:
+    """Outcome of a maintenance pass."""
+
+    scanned: int = 0
+    merged: int = 0
+    expired: int = 0
+    evicted: int = 0
+    remaining: int = 0
+    duplicate_threshold: Optional[float] = None
+    dry_run: bool = False
+    removed_paths: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scanned": self.scanned,
+            "merged": self.merged,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "remaining": self.remaining,
+            "duplicate_threshold": self.duplicate_threshold,
+            "dry_run": self.dry_run,
+        }
+
+
+def load_entries(kb_path: Path) -> List[KBEntry]:
+    """Load every parseable JSON entry in the knowledge base directory."""
+    entries = []
+    for path in sorted(kb_path.glob("*.json")):
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(record, dict):
+                entries.append(KBEntry(path=path, record=record, mtime=path.stat().st_mtime))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[KB Maintenance] Warning: Skipping {path.name}: {e}")
+    return entries
+
+
+def _cross_dist_sq(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Squared Euclidean distances between rows of a (M, D) and b (N, D)."""
+    a_sq = np.sum(a * a, axis=1)[:, np.newaxis]
+    b_sq = np.sum(b * b, axis=1)[np.newaxis, :]
+    return np.maximum(a_sq + b_sq - 2 * a @ b.T, 0.0)
+
+
+def find_duplicate_groups(
+    entries: List[KBEntry],
+    threshold: float,
+    candidates: Optional[List[KBEntry]] = None,
+) -> List[List[KBEntry]]:
+    """
+    Group near-duplicate entries of the same type and embedding dimension.
+
+    Args:
+        entries: Full set of entries to compare against.
+        threshold: Euclidean distance below which two entries are duplicates.
+        candidates: Optional subset (new/changed entries) for incremental runs;
+            only pairs involving a candidate are considered.
+
+    Returns:
+        Groups with at least two members.
+    """
+    parent = list(range(len(entries)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    candidate_ids = {id(e) for e in candidates} if candidates is not None else None
+
+    buckets: Dict[tuple, List[int]] = {}
+    for idx, entry in enumerate(entries):
+        emb = entry.embedding
+        if emb:
+            buckets.setdefault((entry.entry_type, len(emb)), []).append(idx)
+
+    threshold_sq = threshold * threshold
+    for indices in buckets.values():
+        if len(indices) < 2:
+            continue
+        matrix = np.array([entries[i].embedding for i in indices], dtype=float)
+        if candidate_ids is None:
+            rows = list(range(len(indices)))
+        else:
+            rows = [k for k, i in enumerate(indices) if id(entries[i]) in candidate_ids]
+            if not rows:
+                continue
+        dist_sq = _cross_dist_sq(matrix[rows], matrix)
+        for r, k in enumerate(rows):
+            for j in np.nonzero(dist_sq[r] < threshold_sq)[0]:
+                if j != k:
+                    ra, rb = find(indices[k]), find(indices[int(j)])
+                    if ra != rb:
+                        parent[rb] = ra
+
+    groups: Dict[int, List[KBEntry]] = {}
+    for idx in range(len(entries)):
+        if entries[idx].embedding:
+            groups.setdefault(find(idx), []).append(entries[idx])
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def merge_group(group: List[KBEntry]) -> KBEntry:
+    """
+    Merge a duplicate group into its newest member.
+
+    The survivor keeps its own title/content/embedding, gains the union of
+    tags and records which entries were folded into it.
+    """
+    survivor = max(group, key=lambda e: e.created_ts)
+    record = survivor.record
+
+    tags: List[str] = list(record.get("tags") or [])
+    merged_from: List[str] = []
+    total_merges = survivor.merge_count
+    for entry in group:
+        if entry is survivor:
+            continue
+        for tag in entry.record.get("tags") or []:
+            if tag not in tags:
+                tags.append(tag)
+        merged_from.append(entry.record.get("id", entry.path.stem))
+        total_merges += 1 + entry.merge_count
+
+    record["tags"] = tags
+    metadata = dict(record.get("metadata") or {})
+    metadata["merged_from"] = list(metadata.get("merged_from", [])) + merged_from
+    metadata["merge_count"] = total_merges
+    metadata["last_merged_at"] = datetime.now(timezone.utc).isoformat()
+    record["metadata"] = metadata
+    return survivor
+
+
+def retention_score(entry: KBEntry, policy: MaintenancePolicy, now: float) -> float:
+    """Type weight × exponential age decay × bonus for entries that absorbed duplicates."""
+    weight = policy.type_weights.get(entry.entry_type, policy.default_type_weight)
+    age_days = max(0.0, (now - entry.created_ts) / SECONDS_PER_DAY)
+    decay = 0.5 ** (age_days / policy.half_life_days) if policy.half_life_days > 0 else 1.0
+    return weight * decay * (1.0 + math.log1p(entry.merge_count))
+
+
+def _duplicate_threshold(entries: List[KBEntry], policy: MaintenancePolicy) -> Optional[float]:
+    if policy.duplicate_distance is not None:
+        return policy.duplicate_distance
+
+    # ε estimated over the dominant embedding dimension of the knowledge base
+    by_dim: Dict[int, List[List[float]]] = {}
+    for entry in entries:
+        if entry.embedding:
+            by_dim.setdefault(len(entry.embedding), []).append(entry.embedding)
+    if not by_dim:
+        return None
+    vectors = max(by_dim.values(), key=len)
+    if len(vectors) < 2:
+        return None
+    return policy.duplicate_ratio * estimate_bandwidth(np.array(vectors, dtype=float))
+
+
+def _load_state(kb_path: Path) -> Dict[str, Any]:
+    state_path = kb_path / MAINTENANCE_STATE_FILENAME
+    try:
+        return json.loads(state_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _save_state(kb_path: Path, state: Dict[str, Any]) -> None:
+    (kb_path / MAINTENANCE_STATE_FILENAME).write_text(json.dumps(state), encoding="utf-8")
+
+
+def run_maintenance(
+    kb_path: Optional[Path] = None,
+    policy: Optional[MaintenancePolicy] = None,
+    incremental: bool = False,
+    dry_run: bool = False,
+    now: Optional[float] = None,
+) -> MaintenanceReport:
+    """
+    Run one maintenance pass: merge near-duplicates, apply TTL, then evict to capacity.
+
+    Args:
+        kb_path: Knowledge base directory (defaults to get_kb_path()).
+        policy: Maintenance policy (defaults to MaintenancePolicy()).
+        incremental: Only compare entries changed since the last pass for duplicates.
+        dry_run: Compute the report without touching any file.
+        now: Override the current time (epoch seconds), mainly for tests.
+
+    Returns:
+        MaintenanceReport summarising what was (or would be) removed.
+    """
+    kb_path = kb_path or get_kb_path()
+    policy = policy or MaintenancePolicy()
+    now = now if now is not None else datetime.now(timezone.utc).timestamp()
+    report = MaintenanceReport(dry_run=dry_run)
+
+    entries = load_entries(kb_path)
+    report.scanned = len(entries)
+    removed: Dict[Path, KBEntry] = {}
+    rewritten: Dict[Path, KBEntry] = {}
+
+    # 1. Near-duplicate merging
+    state = _load_state(kb_path) if incremental else {}
+    threshold = state.get("duplicate_threshold") if policy.duplicate_distance is None else None
+    if threshold is None:
+        threshold = _duplicate_threshold(entries, policy)
+    report.duplicate_threshold = threshold
+    if threshold is not None and threshold > 0:
+        candidates = None
+        if incremental and state.get("last_run_mtime") is not None:
+            candidates = [e for e in entries if e.mtime > state["last_run_mtime"]]
+        for group in find_duplicate_groups(entries, threshold, candidates):
+            survivor = merge_group(group)
+            rewritten[survivor.path] = survivor
+            for entry in group:
+                if entry is not survivor:
+                    removed[entry.path] = entry
+                    report.merged += 1
+
+    # 2. TTL expiry
+    for entry in entries:
+        if entry.path in removed:
+            continue
+        ttl = policy.ttl_days.get(entry.entry_type)
+        if ttl is not None and now - entry.created_ts > ttl * SECONDS_PER_DAY:
+            removed[entry.path] = entry
+            rewritten.pop(entry.path, None)
+            report.expired += 1
+
+    # 3. Capacity eviction
+    survivors = [e for e in entries if e.path not in removed]
+    if policy.max_entries is not None and len(survivors) > policy.max_entries:
+        survivors.sort(key=lambda e: retention_score(e, policy, now))
+        overflow = len(survivors) - policy.max_entries
+        for entry in survivors[:overflow]:
+            removed[entry.path] = entry
+            rewritten.pop(entry.path, None)
+            report.evicted += 1
+
+    report.remaining = report.scanned - len(removed)
+    report.removed_paths = [str(p) for p in removed]
+
+    if dry_run:
+        return report
+
+    for entry in rewritten.values():
+        entry.path.write_text(json.dumps(entry.record, ensure_ascii=False), encoding="utf-8")
+    for path in removed:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    remaining_mtimes = [p.stat().st_mtime for p in kb_path.glob("*.json")]
+    _save_state(kb_path, {
+        "last_run_at": now,
+        "last_run_mtime": max(remaining_mtimes) if remaining_mtimes else now,
+        # ε 的估计是 O(N²·D)，增量模式复用上次的阈值
+        "duplicate_threshold": threshold,
+    })
+
+    print(
+        f"[KB Maintenance] scanned={report.scanned}, merged={report.merged}, "
+        f"expired={report.expired}, evicted={report.evicted}, remaining={report.remaining}"
+    )
+    return report
+
+
+class KnowledgeBaseMaintainer:
+    """Runs incremental maintenance periodically on a daemon thread."""
+
+    def __init__(
+        self,
+        interval_seconds: float = 600.0,
+        policy: Optional[MaintenancePolicy] = None,
+        kb_path: Optional[Path] = None,
+    ):
+        self.interval_seconds = interval_seconds
+        self.policy = policy or MaintenancePolicy()
+        self.kb_path = kb_path
+        self.last_report: Optional[MaintenanceReport] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._run_lock = threading.Lock()
+
+    def run_once(self, incremental: bool = True, dry_run: bool = False) -> MaintenanceReport:
+        """Run a pass now (serialised with the background loop)."""
+        with self._run_lock:
+            self.last_report = run_maintenance(
+                kb_path=self.kb_path,
+                policy=self.policy,
+                incremental=incremental,
+                dry_run=dry_run,
+            )
+            return self.last_report
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="kb-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once(incremental=True)
+            except Exception as e:  # pragma: no cover - defensive guard
+                print(f"[KB Maintenance] Warning: background pass failed: {e}")
+
+
+# Global maintainer instance (server starts it when KB_MAINTENANCE_INTERVAL_SECONDS is set)
+kb_maintainer = KnowledgeBaseMaintainer()
@@ -0,0 +1,417 @@
+"""
+SQLite-backed Knowledge Base Index - 混合检索 (词法 + 向量)
+
+JSON 文件仍是知识库的唯一事实来源；本模块在其旁边维护一个 SQLite 索引
+(标准库 sqlite3)，按文件 mtime 增量同步：
+
+- entries: 元数据 + 嵌入 (float32 BLOB)
+- entry_tags: 标签精确查找 (如 report_vN、branch_decision)
+- entries_fts: FTS5 全文索引 (title / content / tags)，优先使用 trigram 分词以支持中文子串
+
+混合查询流程:
+1. 元数据预过滤 (experience_type / tags) —— 纯元数据查询直接返回，不需要嵌入
+2. FTS5 按 bm25 取候选短名单，并计算查询 n-gram 覆盖率
+3. 高覆盖命中数 <= limit 且调用方允许 (allow_ungated_lexical): 词法即可回答，跳过嵌入 API
+   否则嵌入查询，对元数据过滤后的条目做向量扫描，只保留距离 < ε 阈值的条目；
+   词法命中与纯向量命中在同一候选池中按距离排序 (分别标记为 hybrid / vector)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from src.embedding_client import embed_text
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+from src.tools.knowledge_base import get_kb_path, resolve_search_epsilon
+
+
+INDEX_FILENAME = "kb_index.sqlite3"
+INDEX_PATH_ENV_VAR = "KB_INDEX_PATH"
+DEFAULT_SHORTLIST = 50
+DEFAULT_MIN_COVERAGE = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    rowid INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    entry_id TEXT,
+    type TEXT,
+    title TEXT,
+    content TEXT,
+    tags TEXT,
+    created_at TEXT,
+    mtime REAL NOT NULL,
+    dim INTEGER NOT NULL DEFAULT 0,
+    embedding BLOB
+);
+CREATE INDEX IF NOT EXISTS idx_entries_type ON entries(type);
+CREATE TABLE IF NOT EXISTS entry_tags (
+    rowid INTEGER NOT NULL REFERENCES entries(rowid) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags(tag);
+"""
+
+_TOKEN_SPLIT = re.compile(r"[\s\.,;:!?'\"()\[\]{}<>，。；：！？、“”‘’（）【】《》]+")
+
+
+def _encode_embedding(embedding: Optional[Sequence[float]]) -> Optional[bytes]:
+    if not embedding:
+        return None
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _decode_embedding(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+class KnowledgeBaseStore:
+    """SQLite index over the JSON knowledge base with hybrid lexical/vector search."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._lock = threading.RLock()
+        self.embedding_calls = 0
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+            self.tokenizer = self._create_fts_table()
+
+    def _create_fts_table(self) -> str:
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'entries_fts'"
+        ).fetchone()
+        if row is not None:
+            return "trigram" if "trigram" in row["sql"] else "unicode61"
+        try:
+            # trigram (SQLite >= 3.34) 支持中文等无空格文本的子串匹配
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE entries_fts USING fts5(title, content, tags, tokenize = 'trigram')"
+            )
+            return "trigram"
+        except sqlite3.OperationalError:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE entries_fts USING fts5(title, content, tags)"
+            )
+            return "unicode61"
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def upsert(self, path: Path, record: Dict[str, Any], mtime: float) -> None:
+        """Index (or re-index) a single knowledge-base record."""
+        tags = [str(t) for t in (record.get("tags") or [])]
+        embedding = record.get("embedding") or []
+        content = record.get("content") or record.get("reflection") or ""
+        title = record.get("title") or record.get("thread_label") or ""
+        entry_type = record.get("type") or "reflection"
+        with self._lock, self._conn:
+            existing = self._conn.execute(
+                "SELECT rowid FROM entries WHERE path = ?", (str(path),)
+            ).fetchone()
+            if existing is not None:
+                self._delete_rowid(existing["rowid"])
+            cur = self._conn.execute(
+                "INSERT INTO entries (path, entry_id, type, title, content, tags, created_at, mtime, dim, embedding) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path), record.get("id"), entry_type, title, content,
+                    json.dumps(tags, ensure_ascii=False), record.get("created_at"),
+                    mtime, len(embedding), _encode_embedding(embedding),
+                ),
+            )
+            rowid = cur.lastrowid
+            self._conn.executemany(
+                "INSERT INTO entry_tags (rowid, tag) VALUES (?, ?)", [(rowid, t) for t in tags]
+            )
+            self._conn.execute(
+                "INSERT INTO entries_fts (rowid, title, content, tags) VALUES (?, ?, ?, ?)",
+                (rowid, title, content, " ".join(tags)),
+            )
+
+    def _delete_rowid(self, rowid: int) -> None:
+        self._conn.execute("DELETE FROM entries_fts WHERE rowid = ?", (rowid,))
+        self._conn.execute("DELETE FROM entry_tags WHERE rowid = ?", (rowid,))
+        self._conn.execute("DELETE FROM entries WHERE rowid = ?", (rowid,))
+
+    def remove(self, path: Path) -> None:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT rowid FROM entries WHERE path = ?", (str(path),)
+            ).fetchone()
+            if row is not None:
+                self._delete_rowid(row["rowid"])
+
+    def sync_from_directory(self, kb_path: Path) -> int:
+        """
+        Bring the index in line with the JSON files (mtime-based, incremental).
+
+        Returns:
+            Number of files (re)indexed or removed.
+        """
+        with self._lock:
+            known = {
+                row["path"]: row["mtime"]
+                for row in self._conn.execute("SELECT path, mtime FROM entries")
+            }
+        changes = 0
+        seen = set()
+        for path in kb_path.glob("*.json"):
+            key = str(path)
+            seen.add(key)
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if known.get(key) == mtime:
+                continue
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[KB Index] Warning: Skipping {path.name}: {e}")
+                continue
+            if isinstance(record, dict):
+                self.upsert(path, record, mtime)
+                changes += 1
+        for key in set(known) - seen:
+            self.remove(Path(key))
+            changes += 1
+        return changes
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def _query_grams(self, text: str) -> List[str]:
+        tokens = [t.lower() for t in _TOKEN_SPLIT.split(text) if t]
+        if self.tokenizer != "trigram":
+            return list(dict.fromkeys(tokens))
+        grams: List[str] = []
+        for token in tokens:
+            if len(token) < 3:
+                grams.append(token)  # 过短无法走 trigram，交给子串扫描
+                continue
+            grams.extend(token[i:i + 3] for i in range(len(token) - 2))
+        return list(dict.fromkeys(grams))
+
+    def _filtered_rows(
+        self,
+        experience_type: Optional[str],
+        tags: Optional[Iterable[str]],
+        rowids: Optional[List[int]] = None,
+    ) -> List[sqlite3.Row]:
+        clauses, params = [], []
+        if experience_type:
+            clauses.append("e.type = ?")
+            params.append(experience_type)
+        for tag in tags or []:
+            clauses.append("EXISTS (SELECT 1 FROM entry_tags t WHERE t.rowid = e.rowid AND t.tag = ?)")
+            params.append(tag)
+        if rowids is not None:
+            if not rowids:
+                return []
+            clauses.append(f"e.rowid IN ({','.join('?' * len(rowids))})")
+            params.extend(rowids)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT e.* FROM entries e {where} ORDER BY e.created_at DESC", params
+            ).fetchall()
+
+    def _lexical_shortlist(self, grams: List[str], shortlist: int) -> List[tuple]:
+        """(rowid, bm25) pairs for rows matching any query gram, best first."""
+        if not grams:
+            return []
+        fts_grams = [g for g in grams if self.tokenizer != "trigram" or len(g) >= 3]
+        if not fts_grams:
+            # 只有 1-2 字的查询 (如 "偏见")：trigram 无法索引，退化为子串扫描
+            clauses = " OR ".join(
+                "instr(lower(title || ' ' || content || ' ' || tags), ?) > 0" for _ in grams
+            )
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT rowid FROM entries WHERE {clauses} ORDER BY created_at DESC LIMIT ?",
+                    (*grams, shortlist),
+                ).fetchall()
+            return [(row["rowid"], -1.0) for row in rows]
+        match = " OR ".join('"' + g.replace('"', '""') + '"' for g in fts_grams)
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT rowid, bm25(entries_fts) AS rank FROM entries_fts "
+                    "WHERE entries_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, shortlist),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                print(f"[KB Index] Warning: FTS query failed: {e}")
+                return []
+        return [(row["rowid"], row["rank"]) for row in rows]
+
+    def _coverage(self, row: sqlite3.Row, grams: List[str]) -> float:
+        haystack = f"{row['title']}\n{row['content']}\n{row['tags']}".lower()
+        return sum(1 for g in grams if g in haystack) / len(grams)
+
+    def search(
+        self,
+        query: str = "",
+        query_embedding: Optional[List[float]] = None,
+        experience_type: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = 3,
+        shortlist: int = DEFAULT_SHORTLIST,
+        min_coverage: float = DEFAULT_MIN_COVERAGE,
+        current_embeddings: Optional[List[List[float]]] = None,
+        epsilon_threshold: float = 1.0,
+        embed_fn: Callable[[str], List[float]] = embed_text,
+        use_published_epsilon: bool = False,
+        allow_ungated_lexical: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Hybrid lexical + vector search.
+
+        Args:
+            query: Free-text query; empty means a pure metadata lookup.
+            query_embedding: Optional precomputed query embedding.
+            experience_type: Exact type filter.
+            tags: Exact tag filters (all must match).
+            limit: Maximum number of results.
+            shortlist: FTS candidates considered for reranking.
+            min_coverage: Fraction of query n-grams a row must contain to count as a lexical hit.
+            current_embeddings: Strategy population used to resolve ε for the vector fallback.
+            epsilon_threshold: Distance threshold multiplier for the vector fallback.
+            embed_fn: Embedding function (injectable for tests).
+            use_published_epsilon: Fall back to Evolution's latest published ε instead of the default.
+            allow_ungated_lexical: Return lexical hits without an ε distance check (skips the
+                embedding call for keyword queries); otherwise every text match is gated by ε.
+
+        Returns:
+            Result dicts shaped like _search_experiences_impl output, plus a "match" key.
+        """
+        query = (query or "").strip()
+
+        # 1. Pure metadata lookup (tags / type): no text, no embedding
+        if not query and query_embedding is None:
+            rows = self._filtered_rows(experience_type, tags)[:limit]
+            return [self._result(row, match="metadata", relevance=1.0) for row in rows]
+
+        # 2. Lexical shortlist restricted by metadata filters
+        grams = self._query_grams(query) if query else []
+        ranked = self._lexical_shortlist(grams, shortlist)
+        rank_by_rowid = dict(ranked)
+        candidates = self._filtered_rows(experience_type, tags, [rid for rid, _ in ranked]) if ranked else []
+        hits = [row for row in candidates if self._coverage(row, grams) >= min_coverage]
+        hits.sort(key=lambda row: rank_by_rowid[row["rowid"]])
+
+        # 3a. Lexically answerable: skip the embedding round trip (opt-in, no ε gate)
+        if allow_ungated_lexical and hits and len(hits) <= limit and query_embedding is None:
+            best = -min(rank_by_rowid[row["rowid"]] for row in hits) or 1.0
+            return [
+                self._result(row, match="lexical", relevance=max(0.0, -rank_by_rowid[row["rowid"]] / best))
+                for row in hits
+            ]
+
+        if query_embedding is None:
+            self.embedding_calls += 1
+            with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+                query_embedding = embed_fn(query)
+        if not query_embedding:
+            print("[KB] Warning: Could not generate query embedding")
+            if not allow_ungated_lexical:
+                return []
+            return [self._result(row, match="lexical", relevance=1.0) for row in hits[:limit]]
+        q = np.asarray(query_embedding, dtype=np.float32)
+        distance_threshold = epsilon_threshold * resolve_search_epsilon(current_embeddings, use_published_epsilon)
+
+        # 3b. Vector scan over metadata-filtered rows within ε; lexical hits share the same pool
+        # (marked "hybrid") so incidental keyword overlap never hides closer vector-only rows
+        lexical_rowids = {row["rowid"] for row in hits}
+        results = []
+        for row in self._filtered_rows(experience_type, tags):
+            emb = _decode_embedding(row["embedding"])
+            if emb is None or emb.shape != q.shape:
+                continue
+            distance = float(np.linalg.norm(emb - q))
+            if distance < distance_threshold:
+                results.append(self._result(
+                    row, match="hybrid" if row["rowid"] in lexical_rowids else "vector",
+                    distance=distance, relevance=1.0 - distance / distance_threshold,
+                ))
+        results.sort(key=lambda r: r["distance"])
+        return results[:limit]
+
+    @staticmethod
+    def _result(
+        row: sqlite3.Row,
+        match: str,
+        relevance: float,
+        distance: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        content = row["content"] or ""
+        return {
+            "title": row["title"],
+            "type": row["type"],
+            "content": content[:300],
+            "tags": json.loads(row["tags"] or "[]"),
+            "distance": distance,
+            "score": relevance,  # 兼容 _search_experiences_impl 输出
+            "relevance": relevance,
+            "match": match,
+        }
+
+
+_stores: Dict[str, KnowledgeBaseStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_kb_store(kb_path: Optional[Path] = None) -> KnowledgeBaseStore:
+    """Process-wide store for the knowledge base directory (one connection per index file)."""
+    kb_path = kb_path or get_kb_path()
+    db_path = Path(os.environ.get(INDEX_PATH_ENV_VAR) or kb_path / INDEX_FILENAME)
+    key = str(db_path.resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = KnowledgeBaseStore(db_path)
+            _stores[key] = store
+        return store
+
+
+def hybrid_search_experiences(
+    query: str = "",
+    experience_type: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    limit: int = 3,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """Sync the SQLite index with the knowledge base directory, then run a hybrid search."""
+    kb_path = get_kb_path()
+    store = get_kb_store(kb_path)
+    store.sync_from_directory(kb_path)
+    return store.search(
+        query=query,
+        experience_type=experience_type,
+        tags=tags,
+        limit=limit,
+        **kwargs,
+    )
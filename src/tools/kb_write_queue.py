@@ -0,0 +1,224 @@
+"""
+Write-behind queue for knowledge-base archival.
+
+硬剪枝时 Executor 会为每个被剪枝策略调用 write_strategy_archive，
+每次都是一次阻塞的嵌入 HTTP 请求 + 一次 JSON 写入；Judge 的 write_experience
+工具调用也是同样的内联写入。这里把这些写入移到后台线程：
+
+- 调用方 enqueue 后立即返回 (文件名已确定)，不再阻塞演化循环
+- 后台线程按批取出记录，用 embed_texts 一次请求完成整批嵌入
+- 整批文件写完后统一 fsync (文件 + 所在目录各一次)
+- drain() 在运行结束时等待队列清空 (server / main 以及 atexit 都会调用，默认最多等待 30 秒)
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src import embedding_client
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+from src.tools.knowledge_base import (
+    VALID_EXPERIENCE_TYPES,
+    build_experience_record,
+    build_strategy_archive_record,
+)
+
+
+DEFAULT_BATCH_SIZE = 16
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.5
+# 运行结束时最多等待这么久，避免嵌入服务卡住时拖住进程退出
+DEFAULT_DRAIN_TIMEOUT_SECONDS = 30.0
+
+
+@dataclass
+class PendingWrite:
+    """A knowledge-base record waiting for its embedding and disk write."""
+
+    file_path: Path
+    record: Dict[str, Any]
+    embedding_text: str
+    label: str
+
+
+class KnowledgeBaseWriteQueue:
+    """Background writer that batches embeddings and groups fsyncs."""
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[PendingWrite]" = queue.Queue()
+        self._outstanding = 0
+        self._idle = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    # ------------------------------------------------------------------
+    # Producer API
+    # ------------------------------------------------------------------
+
+    def submit(self, item: PendingWrite) -> Path:
+        """Queue a prepared record; returns the path it will be written to."""
+        self._ensure_worker()
+        with self._idle:
+            self._outstanding += 1
+        self._queue.put(item)
+        return item.file_path
+
+    def enqueue_strategy_archive(
+        self,
+        strategy: Dict[str, Any],
+        synthesis_context: str,
+        branch_rationale: str,
+        report_version: int,
+    ) -> str:
+        """Non-blocking counterpart of write_strategy_archive."""
+        file_path, archive, embedding_text = build_strategy_archive_record(
+            strategy, synthesis_context, branch_rationale, report_version
+        )
+        self.submit(PendingWrite(file_path, archive, embedding_text, label=strategy.get("name", "Unknown")))
+        return f"Branch archive queued: {file_path.name}"
+
+    def enqueue_experience(self, args: Dict[str, Any]) -> str:
+        """
+        Non-blocking counterpart of the write_experience tool.
+
+        Takes the tool-call argument dict so the Judge can forward
+        ``tool_call['args']`` unchanged.
+        """
+        experience_type = args.get("experience_type")
+        if experience_type not in VALID_EXPERIENCE_TYPES:
+            return f"Error: experience_type must be one of {VALID_EXPERIENCE_TYPES}"
+
+        file_path, experience, embedding_text = build_experience_record(
+            title=args.get("title", ""),
+            content=args.get("content", ""),
+            experience_type=experience_type,
+            tags=args.get("tags"),
+            related_strategy=args.get("related_strategy"),
+        )
+        self.submit(PendingWrite(file_path, experience, embedding_text, label=args.get("title", "")))
+        return f"Experience queued: {file_path.name}"
+
+    def drain(self, timeout: Optional[float] = DEFAULT_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """
+        Block until every queued record has been written (None waits indefinitely).
+
+        Returns:
+            True if the queue is empty, False if the timeout elapsed first.
+        """
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._outstanding == 0, timeout=timeout)
+            if not drained:
+                print(f"[KB] Warning: write-behind drain timed out with {self._outstanding} records pending")
+            return drained
+
+    @property
+    def pending(self) -> int:
+        with self._idle:
+            return self._outstanding
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(
+                target=self._run, name="kb-write-behind", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            # Let a burst (e.g. a whole pruned beam) accumulate into one batch
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except Exception as e:  # pragma: no cover - defensive guard
+                with self._idle:
+                    self.failed += len(batch)
+                print(f"[KB] Warning: write-behind batch failed: {e}")
+            finally:
+                with self._idle:
+                    self._outstanding -= len(batch)
+                    self._idle.notify_all()
+
+    def _write_batch(self, batch: List[PendingWrite]) -> None:
+        with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+            embeddings = embedding_client.embed_texts([item.embedding_text for item in batch])
+
+        written_paths: List[Path] = []
+        for item, embedding in zip(batch, embeddings):
+            if embedding:
+                item.record["embedding"] = embedding
+            try:
+                item.file_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(item.file_path, "w", encoding="utf-8") as f:
+                    json.dump(item.record, f, ensure_ascii=False)
+                written_paths.append(item.file_path)
+            except OSError as e:
+                with self._idle:
+                    self.failed += 1
+                print(f"[KB] Warning: Failed to write {item.label}: {e}")
+
+        _fsync_group(written_paths)
+        with self._idle:
+            self.written += len(written_paths)
+            self.batches += 1
+        print(f"[KB] Write-behind flushed {len(written_paths)}/{len(batch)} records")
+
+
+def _fsync_group(paths: List[Path]) -> None:
+    """fsync a batch of files, then each containing directory once."""
+    directories = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            directories.add(path.parent)
+        except OSError:
+            continue
+
+    dir_flag = getattr(os, "O_DIRECTORY", None)
+    if dir_flag is None:
+        return  # Windows: directories cannot be opened for fsync
+    for directory in directories:
+        try:
+            fd = os.open(directory, os.O_RDONLY | dir_flag)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
+            continue
+
+
+# Global write-behind queue instance
+kb_write_queue = KnowledgeBaseWriteQueue()
+atexit.register(kb_write_queue.drain)
@@ -18,13 +18,14 @@ import json
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 import numpy as np
 from langchain_core.tools import tool
 
 from src.embedding_client import embed_text
-from src.math_engine.kde import estimate_bandwidth
+from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+from src.math_engine.bandwidth_cache import bandwidth_cache
 
 
 # Default knowledge base directory
@@ -51,50 +52,53 @@ def get_current_epsilon(embeddings: List[List[float]]) -> float:
     
     ε 代表向量空间中的"一个标准差"距离。
     如果没有足够的嵌入数据，返回默认值。
+    优先读取 Evolution 已发布的种群带宽 (bandwidth_cache)，未命中才重新估计。
     """
     if len(embeddings) < 2:
         return 1.0  # 默认值
     
     embeddings_array = np.array(embeddings, dtype=float)
-    return estimate_bandwidth(embeddings_array)
+    return bandwidth_cache.get_or_compute(embeddings_array)
 
 
-@tool
-def write_experience(
+def resolve_search_epsilon(
+    current_embeddings: Optional[List[List[float]]] = None,
+    use_published_epsilon: bool = False,
+) -> float:
+    """
+    召回时使用的 ε。
+
+    优先级: 传入的种群嵌入 > Evolution 最近发布的 ε (需 use_published_epsilon=True)
+    > 高维空间保守默认值。种群带宽通常远小于默认值，因此不会自动替换默认阈值。
+    """
+    if current_embeddings and len(current_embeddings) >= 2:
+        return get_current_epsilon(current_embeddings)
+    published = bandwidth_cache.latest() if use_published_epsilon else None
+    if published is not None:
+        # 调用方显式选择时，使用 Evolution 最近发布的 ε
+        return published[1]
+    # 使用默认 ε (基于高维空间的典型距离)
+    return 10.0  # 高维空间的保守默认值
+
+
+VALID_EXPERIENCE_TYPES = {"lesson_learned", "success_pattern", "branching_heuristic", "meta_insight"}
+
+
+def build_experience_record(
     title: str,
     content: str,
     experience_type: str,
     tags: Optional[List[str]] = None,
     related_strategy: Optional[str] = None,
-) -> str:
+) -> Tuple[Path, Dict[str, Any], str]:
     """
-    将真正有价值的经验写入知识库。
-    
-    ⚠️ 重要: 只有当你确信这是一个值得长期保存的普遍性经验时才调用此工具。
-    不要为每个策略评估都调用此工具。
-    
-    适合保存的经验类型:
-    - 可泛化的抽象教训 (不是具体问题的具体答案)
-    - 分支决策的元策略 (如何决定何时探索 vs 利用)
-    - 反复出现的失败模式 (可在未来问题中避免)
-    
-    Args:
-        title: 简短的描述性标题
-        content: 抽象化的经验描述 (避免包含具体问题细节)
-        experience_type: "lesson_learned", "success_pattern", "branching_heuristic", "meta_insight"
-        tags: 可选的标签列表
-        related_strategy: 可选的相关策略名称
-        
+    构建经验记录 (不含嵌入)。
+
     Returns:
-        确认消息
+        (目标文件路径, 记录字典, 用于生成嵌入的文本)
     """
     kb_path = get_kb_path()
     
-    # 验证 experience_type
-    valid_types = {"lesson_learned", "success_pattern", "branching_heuristic", "meta_insight"}
-    if experience_type not in valid_types:
-        return f"Error: experience_type must be one of {valid_types}"
-    
     # Generate unique filename
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     short_id = str(uuid.uuid4())[:8]
@@ -116,41 +120,20 @@ def write_experience(
         }
     }
 
-    # Generate embedding (用于语义搜索)
-    embedding_text = f"{title}\n{content}"
-    embedding = embed_text(embedding_text)
-    if embedding:
-        experience["embedding"] = embedding
-    
-    # Write to file
-    file_path = kb_path / filename
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(experience, f, ensure_ascii=False, indent=2)
-    
-    print(f"[KB] Experience saved: {file_path.name}")
-    return f"Experience saved: {file_path.name}"
+    return kb_path / filename, experience, f"{title}\n{content}"
 
 
-def write_strategy_archive(
+def build_strategy_archive_record(
     strategy: Dict[str, Any],
     synthesis_context: str,
     branch_rationale: str,
     report_version: int
-) -> str:
+) -> Tuple[Path, Dict[str, Any], str]:
     """
-    在硬剪枝时归档有价值的策略信息。
-    
-    这是硬剪枝流程的一部分，不是由 Agent 自主调用的工具。
-    只保存分支决策逻辑和抽象经验，不保存完整的策略内容。
-    
-    Args:
-        strategy: 被剪枝的策略节点
-        synthesis_context: 综合上下文 (为什么这个策略被综合)
-        branch_rationale: 分支决策理由 (为什么选择了这个方向)
-        report_version: 报告版本号
-        
+    构建分支归档记录 (不含嵌入)。
+
     Returns:
-        确认消息
+        (目标文件路径, 记录字典, 用于生成嵌入的文本)
     """
     kb_path = get_kb_path()
     
@@ -181,14 +164,92 @@ def write_strategy_archive(
         }
     }
     
+    return kb_path / filename, archive, f"分支决策: {branch_rationale}"
+
+
+@tool
+def write_experience(
+    title: str,
+    content: str,
+    experience_type: str,
+    tags: Optional[List[str]] = None,
+    related_strategy: Optional[str] = None,
+) -> str:
+    """
+    将真正有价值的经验写入知识库。
+    
+    ⚠️ 重要: 只有当你确信这是一个值得长期保存的普遍性经验时才调用此工具。
+    不要为每个策略评估都调用此工具。
+    
+    适合保存的经验类型:
+    - 可泛化的抽象教训 (不是具体问题的具体答案)
+    - 分支决策的元策略 (如何决定何时探索 vs 利用)
+    - 反复出现的失败模式 (可在未来问题中避免)
+    
+    Args:
+        title: 简短的描述性标题
+        content: 抽象化的经验描述 (避免包含具体问题细节)
+        experience_type: "lesson_learned", "success_pattern", "branching_heuristic", "meta_insight"
+        tags: 可选的标签列表
+        related_strategy: 可选的相关策略名称
+        
+    Returns:
+        确认消息
+    """
+    # 验证 experience_type
+    if experience_type not in VALID_EXPERIENCE_TYPES:
+        return f"Error: experience_type must be one of {VALID_EXPERIENCE_TYPES}"
+    
+    file_path, experience, embedding_text = build_experience_record(
+        title, content, experience_type, tags, related_strategy
+    )
+
+    # Generate embedding (用于语义搜索)
+    with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+        embedding = embed_text(embedding_text)
+    if embedding:
+        experience["embedding"] = embedding
+    
+    # Write to file
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(experience, f, ensure_ascii=False, indent=2)
+    
+    print(f"[KB] Experience saved: {file_path.name}")
+    return f"Experience saved: {file_path.name}"
+
+
+def write_strategy_archive(
+    strategy: Dict[str, Any],
+    synthesis_context: str,
+    branch_rationale: str,
+    report_version: int
+) -> str:
+    """
+    在硬剪枝时归档有价值的策略信息。
+    
+    这是硬剪枝流程的一部分，不是由 Agent 自主调用的工具。
+    只保存分支决策逻辑和抽象经验，不保存完整的策略内容。
+    
+    Args:
+        strategy: 被剪枝的策略节点
+        synthesis_context: 综合上下文 (为什么这个策略被综合)
+        branch_rationale: 分支决策理由 (为什么选择了这个方向)
+        report_version: 报告版本号
+        
+    Returns:
+        确认消息
+    """
+    file_path, archive, embedding_text = build_strategy_archive_record(
+        strategy, synthesis_context, branch_rationale, report_version
+    )
+    
     # 只为分支决策理由生成嵌入 (更轻量)
-    embedding_text = f"分支决策: {branch_rationale}"
-    embedding = embed_text(embedding_text)
+    with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+        embedding = embed_text(embedding_text)
     if embedding:
         archive["embedding"] = embedding
     
     # Write to file
-    file_path = kb_path / filename
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(archive, f, ensure_ascii=False, indent=2)
     
@@ -203,6 +264,7 @@ def _search_experiences_impl(
     experience_type: Optional[str] = None,
     limit: int = 3,
     epsilon_threshold: float = 1.0,  # 距离阈值: 1ε = 一个标准差
+    use_published_epsilon: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     基于向量距离搜索知识库中的相关经验 (内部实现)。
@@ -217,6 +279,7 @@ def _search_experiences_impl(
         experience_type: 可选的类型过滤
         limit: 最大返回数量
         epsilon_threshold: 距离阈值倍数 (1.0 = 1ε, 0.25 = 1/4ε)
+        use_published_epsilon: 未传入种群嵌入时使用 Evolution 最近发布的 ε
         
     Returns:
         匹配的经验列表 (只返回高度相关的)
@@ -228,19 +291,14 @@ def _search_experiences_impl(
     
     # 计算查询嵌入
     if query_embedding is None:
-        query_embedding = embed_text(query)
+        with llm_scheduler.slot(EMBEDDING_MODEL_KEY):
+            query_embedding = embed_text(query)
     
     if not query_embedding:
         print("[KB] Warning: Could not generate query embedding")
         return []
     
-    # 计算当前空间的 ε (如果有嵌入数据)
-    if current_embeddings and len(current_embeddings) >= 2:
-        epsilon = get_current_epsilon(current_embeddings)
-    else:
-        # 使用默认 ε (基于高维空间的典型距离)
-        epsilon = 10.0  # 高维空间的保守默认值
-    
+    epsilon = resolve_search_epsilon(current_embeddings, use_published_epsilon)
     distance_threshold = epsilon_threshold * epsilon
     print(f"[KB] Searching with ε={epsilon:.4f}, threshold={distance_threshold:.4f}")
     
@@ -295,24 +353,45 @@ def _search_experiences_impl(
 def search_experiences(
     query: str,
     experience_type: Optional[str] = None,
+    tags: Optional[List[str]] = None,
     limit: int = 3,
 ) -> str:
     """
-    基于向量距离搜索知识库中的相关经验。
+    混合检索知识库中的相关经验 (SQLite 词法索引 + 向量重排)。
+    
+    精确的关键词 / 标签查询直接由本地索引回答，不调用嵌入 API；
+    设置 KB_SEARCH_BACKEND=files 可回退到逐文件向量扫描。
     
     Args:
-        query: 搜索查询文本
+        query: 搜索查询文本 (可为空，仅按类型/标签查找)
         experience_type: 可选的类型过滤 ("lesson_learned", "success_pattern", 等)
+        tags: 可选的标签过滤 (需全部匹配，如 ["report_v2"])
         limit: 最大返回数量
         
     Returns:
         JSON 格式的经验列表，或 "No matching experiences found."
     """
-    results = _search_experiences_impl(
-        query=query,
-        experience_type=experience_type,
-        limit=limit
-    )
+    # Agent 召回使用 Evolution 发布的当前种群 ε (尚未发布时回退到默认值)
+    if os.environ.get("KB_SEARCH_BACKEND", "sqlite").lower() == "files":
+        results = _search_experiences_impl(
+            query=query,
+            experience_type=experience_type,
+            limit=limit,
+            use_published_epsilon=True,
+        )
+        if tags:
+            results = [r for r in results if set(tags) <= set(r.get("tags", []))]
+    else:
+        # 延迟导入: kb_store 依赖本模块的 get_kb_path / resolve_search_epsilon
+        from src.tools.kb_store import hybrid_search_experiences
+        results = hybrid_search_experiences(
+            query=query,
+            experience_type=experience_type,
+            tags=tags,
+            limit=limit,
+            allow_ungated_lexical=True,  # 显式的关键词 / 标签查询
+            use_published_epsilon=True,
+        )
     
     if not results:
         return "No matching experiences found."
@@ -7,13 +7,19 @@ export type KnowledgeEntry = {
     created_at: string;
     reflection: string;
     embedding_dimensions: number;
-    embedding_preview: number[];
+    // Snapshot/update frames are summaries: reflection is an excerpt and the
+    // vector preview is only present once details were requested.
+    reflection_truncated?: boolean;
+    embedding_preview?: number[];
 };
 
 export type KnowledgeMessage =
-    | { type: "snapshot"; data: KnowledgeEntry[] }
+    | { type: "snapshot"; data: KnowledgeEntry[]; next_cursor: string | null; total: number }
+    | { type: "page"; data: KnowledgeEntry[]; next_cursor: string | null; total: number }
     | { type: "update"; data: KnowledgeEntry }
-    | { type: "delete"; data: { id: string } };
+    | { type: "detail"; data: KnowledgeEntry }
+    | { type: "delete"; data: { id: string } }
+    | { type: "error"; data: { id: string; message: string } };
 
 // Strategy status values - synced with backend state.py (spec.md §3.3)
 export type StrategyStatus = "active" | "pruned" | "completed" | "expanded" | "pruned_synthesized";
@@ -120,11 +126,24 @@ export type SimulationMessage =
     | { type: "agent_start"; data: { agent: AgentPhase; message: string } }
     | { type: "agent_progress"; data: { agent: AgentPhase; message: string; detail?: string } }
     | { type: "agent_complete"; data: { agent: AgentPhase; message: string; duration_ms?: number } }
+    // Streamed partial Executor output (deltas grouped by task_id)
+    | { type: "executor_progress"; data: ExecutorProgress }
     // Human-in-the-Loop messages
     | { type: "hil_required"; data: HilRequest }
     // Final report (generated dynamically by Executor when Architect assigns synthesis tasks)
     | { type: "final_report"; data: string };
 
+export interface ExecutorProgress {
+    task_id: string;
+    kind: 'task' | 'synthesis';
+    strategy_id: string | null;
+    strategy_name: string | null;
+    delta: string;
+    text_length: number;
+    done: boolean;
+    error?: string;
+}
+
 // Human-in-the-Loop request type
 export interface HilRequest {
     request_id: string;
@@ -0,0 +1,91 @@
+"""
+Tests for the async agent nodes and how graph_builder wires them.
+"""
+
+import asyncio
+
+import pytest
+
+
+def _strategy(i, quota=1):
+    return {
+        "id": f"id{i}",
+        "name": f"s{i}",
+        "rationale": "理由",
+        "assumption": "假设",
+        "status": "active",
+        "child_quota": quota,
+        "score": 0.5,
+        "trajectory": [],
+    }
+
+
+@pytest.fixture
+def mock_mode(monkeypatch):
+    monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+
+
+class TestGraphWiring:
+    """Async node implementations are used when the graph is built inside a loop."""
+
+    def _node_callable(self, app, name):
+        # Sync nodes keep .func (afunc is a run_in_executor shim); async nodes only have .afunc
+        runnable = app.builder.nodes[name].runnable
+        return runnable.func or runnable.afunc
+
+    def test_sync_build_uses_sync_nodes(self):
+        from src.agents.judge import judge_node
+        from src.core.graph_builder import build_deep_think_graph
+
+        app = build_deep_think_graph()
+
+        assert self._node_callable(app, "judge") is judge_node
+
+    async def test_build_inside_event_loop_uses_async_nodes(self):
+        from src.core.graph_builder import NODE_IMPLEMENTATIONS, build_deep_think_graph
+
+        app = build_deep_think_graph()
+
+        for name, (sync_impl, async_impl) in NODE_IMPLEMENTATIONS.items():
+            assert self._node_callable(app, name) is (async_impl or sync_impl), name
+        assert asyncio.iscoroutinefunction(self._node_callable(app, "executor"))
+
+    def test_explicit_override(self):
+        from src.agents.executor import executor_node_async
+        from src.core.graph_builder import build_deep_think_graph
+
+        app = build_deep_think_graph(use_async=True)
+
+        assert self._node_callable(app, "executor") is executor_node_async
+
+
+class TestAsyncNodes:
+    """Async nodes produce the same state updates as their sync wrappers."""
+
+    async def test_propagation_expands_parents_in_order(self, mock_mode):
+        from src.agents.propagation import propagation_node_async
+
+        state = {
+            "problem_state": "p",
+            "strategies": [_strategy(0, quota=2), _strategy(1, quota=0), _strategy(2, quota=1)],
+            "config": {},
+            "history": [],
+        }
+
+        result = await propagation_node_async(state)
+
+        children = result["strategies"][3:]
+        assert [c["parent_id"] for c in children] == ["id0", "id0", "id2"]
+        assert [s["status"] for s in result["strategies"][:3]] == ["expanded", "active", "expanded"]
+
+    def test_sync_wrapper_matches_async_node(self, mock_mode):
+        from src.agents.architect import architect_scheduler_node, architect_scheduler_node_async
+
+        state = {"problem_state": "p", "strategies": [_strategy(0), _strategy(1)], "history": []}
+
+        sync_result = architect_scheduler_node(dict(state))
+        async_result = asyncio.run(architect_scheduler_node_async(dict(state)))
+
+        assert sync_result["architect_decisions"] == async_result["architect_decisions"]
+        assert [d["strategy_id"] for d in sync_result["architect_decisions"]] == ["id0", "id1"]
@@ -0,0 +1,162 @@
+"""
+Tests for the population-versioned bandwidth (ε) cache shared by
+Evolution and knowledge-base recall.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+
+class TestBandwidthCache:
+    """Tests for BandwidthCache publish/lookup semantics."""
+
+    def test_publish_then_lookup_hits(self):
+        from src.math_engine.bandwidth_cache import BandwidthCache
+
+        cache = BandwidthCache()
+        embeddings = np.random.rand(6, 16)
+
+        version = cache.publish(embeddings, 0.42)
+
+        assert version == 1
+        assert cache.lookup(embeddings) == pytest.approx(0.42)
+        assert cache.latest() == (1, pytest.approx(0.42))
+        assert cache.hits == 1
+
+    def test_different_population_misses(self):
+        from src.math_engine.bandwidth_cache import BandwidthCache
+
+        cache = BandwidthCache()
+        cache.publish(np.random.rand(6, 16), 0.42)
+
+        assert cache.lookup(np.random.rand(6, 16)) is None
+        assert cache.misses == 1
+
+    def test_get_or_compute_matches_estimate_and_keeps_latest(self):
+        from src.math_engine.bandwidth_cache import BandwidthCache
+        from src.math_engine.kde import estimate_bandwidth
+
+        cache = BandwidthCache()
+        published = np.random.rand(5, 8)
+        cache.publish(published, 1.5)
+
+        other = np.random.rand(7, 8)
+        h = cache.get_or_compute(other)
+
+        assert h == pytest.approx(estimate_bandwidth(other))
+        # A reader-side miss must not replace Evolution's canonical ε
+        assert cache.latest()[1] == pytest.approx(1.5)
+        # Second call is served from the cache
+        assert cache.get_or_compute(other) == pytest.approx(h)
+        assert cache.hits == 1
+
+    def test_lru_eviction(self):
+        from src.math_engine.bandwidth_cache import BandwidthCache
+
+        cache = BandwidthCache(max_entries=2)
+        first = np.random.rand(3, 4)
+        cache.publish(first, 1.0)
+        cache.publish(np.random.rand(3, 4), 2.0)
+        cache.publish(np.random.rand(3, 4), 3.0)
+
+        assert cache.lookup(first) is None
+
+
+class TestKnowledgeBaseUsesPublishedEpsilon:
+    """Knowledge-base recall should read ε from the cache instead of recomputing it."""
+
+    def test_search_reuses_published_bandwidth(self, tmp_path, monkeypatch):
+        from src.math_engine import bandwidth_cache as bc
+        from src.tools import knowledge_base as kb
+
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+        monkeypatch.setattr(kb, "bandwidth_cache", bc.BandwidthCache())
+
+        population = np.random.rand(4, 3).tolist()
+        kb.bandwidth_cache.publish(np.array(population), 0.5)
+
+        def _fail(*_args, **_kwargs):
+            raise AssertionError("estimate_bandwidth should not run on a cache hit")
+
+        monkeypatch.setattr(bc, "estimate_bandwidth", _fail)
+
+        (tmp_path / "near.json").write_text(json.dumps({
+            "title": "near", "type": "meta_insight", "content": "c",
+            "embedding": [0.0, 0.0, 0.1],
+        }), encoding="utf-8")
+        (tmp_path / "far.json").write_text(json.dumps({
+            "title": "far", "type": "meta_insight", "content": "c",
+            "embedding": [5.0, 5.0, 5.0],
+        }), encoding="utf-8")
+
+        results = kb._search_experiences_impl(
+            query="q",
+            query_embedding=[0.0, 0.0, 0.0],
+            current_embeddings=population,
+        )
+
+        assert [r["title"] for r in results] == ["near"]
+
+    def test_search_without_population_uses_latest(self, tmp_path, monkeypatch):
+        from src.math_engine import bandwidth_cache as bc
+        from src.tools import knowledge_base as kb
+
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+        monkeypatch.setattr(kb, "bandwidth_cache", bc.BandwidthCache())
+        kb.bandwidth_cache.publish(np.random.rand(4, 3), 0.05)
+
+        (tmp_path / "mid.json").write_text(json.dumps({
+            "title": "mid", "type": "meta_insight", "content": "c",
+            "embedding": [0.5, 0.0, 0.0],
+        }), encoding="utf-8")
+
+        # Default ε (10.0) would recall this entry; the published ε (0.05) must not
+        results = kb._search_experiences_impl(
+            query="q", query_embedding=[0.0, 0.0, 0.0], use_published_epsilon=True
+        )
+
+        assert results == []
+
+    def test_search_keeps_default_epsilon_unless_opted_in(self, tmp_path, monkeypatch):
+        from src.math_engine import bandwidth_cache as bc
+        from src.tools import knowledge_base as kb
+
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+        monkeypatch.setattr(kb, "bandwidth_cache", bc.BandwidthCache())
+        kb.bandwidth_cache.publish(np.random.rand(4, 3), 0.05)
+
+        (tmp_path / "mid.json").write_text(json.dumps({
+            "title": "mid", "type": "meta_insight", "content": "c",
+            "embedding": [0.5, 0.0, 0.0],
+        }), encoding="utf-8")
+
+        assert kb.resolve_search_epsilon() == 10.0
+        assert kb.resolve_search_epsilon(use_published_epsilon=True) == 0.05
+        results = kb._search_experiences_impl(query="q", query_embedding=[0.0, 0.0, 0.0])
+
+        assert [r["title"] for r in results] == ["mid"]
+
+    def test_search_tool_opts_into_published_epsilon(self, tmp_path, monkeypatch):
+        from src.math_engine import bandwidth_cache as bc
+        from src.tools import knowledge_base as kb
+
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+        monkeypatch.setenv("KB_SEARCH_BACKEND", "files")
+        monkeypatch.setattr(kb, "bandwidth_cache", bc.BandwidthCache())
+        monkeypatch.setattr(kb, "embed_text", lambda _text: [0.0, 0.0, 0.0])
+
+        (tmp_path / "mid.json").write_text(json.dumps({
+            "title": "mid", "type": "meta_insight", "content": "c",
+            "embedding": [0.5, 0.0, 0.0],
+        }), encoding="utf-8")
+
+        # Nothing published yet: the default ε (10.0) applies
+        assert "mid" in kb.search_experiences.invoke({"query": "q"})
+
+        # The agent-facing tool follows the population ε Evolution published last
+        kb.bandwidth_cache.publish(np.random.rand(4, 3), 0.05)
+        assert kb.search_experiences.invoke({"query": "q"}) == "No matching experiences found."
+        kb.bandwidth_cache.publish(np.random.rand(4, 3), 1.0)
+        assert "mid" in kb.search_experiences.invoke({"query": "q"})
@@ -0,0 +1,143 @@
+"""
+Tests for the incrementally maintained context-size ledger.
+"""
+
+import pytest
+
+
+def _full_scan(state):
+    """The original estimate_token_count: walk everything, 4 chars per token."""
+    total = len(state.get("problem_state", "")) + len(state.get("research_context") or "")
+    total += len(state.get("judge_context") or "")
+    for s in state.get("strategies", []):
+        total += len(s.get("rationale", "")) + len(s.get("assumption", ""))
+        total += sum(len(t) for t in s.get("trajectory", []))
+    total += sum(len(h) for h in state.get("history", []))
+    return total // 4
+
+
+def _state():
+    return {
+        "problem_state": "问题" * 50,
+        "research_context": "背景资料 " * 40,
+        "judge_context": None,
+        "strategies": [
+            {"id": f"id{i}", "rationale": "理由" * (i + 3), "assumption": "assumption",
+             "trajectory": [f"[Executor] step {j}" for j in range(i + 1)]}
+            for i in range(3)
+        ],
+        "history": ["TaskDecomposer: 3 subtasks", "Researcher: 100 chars"],
+    }
+
+
+@pytest.fixture
+def counting_tokenizer():
+    """One token per character; records every text it is asked to measure."""
+    from src.core.context_ledger import set_context_tokenizer
+
+    seen = []
+
+    def count(text):
+        seen.append(text)
+        return len(text)
+
+    set_context_tokenizer("test", count)
+    yield seen
+    set_context_tokenizer(None)
+
+
+class TestEstimate:
+    def test_matches_full_scan(self):
+        from src.agents.distiller import estimate_token_count
+        from src.core.context_ledger import with_context_ledger
+
+        state = _state()
+        assert estimate_token_count(state) == _full_scan(state)
+
+        # 账本更新后追加轨迹 / 历史、替换文本，结果仍与全量扫描一致
+        state = with_context_ledger(state)
+        state["strategies"][0]["trajectory"].append("[Judge] Score: 7.0")
+        state["history"] = state["history"] + ["Judge evaluated 3 strategies"]
+        state["judge_context"] = "## 问题概述"
+        state["strategies"][1]["rationale"] = "新的理由"
+        assert estimate_token_count(state) == _full_scan(state)
+
+    def test_should_distill_uses_threshold(self):
+        from src.agents.distiller import should_distill
+
+        state = {**_state(), "config": {"distill_threshold": 10}}
+        assert should_distill(state)
+        state["config"]["distill_threshold"] = 10_000
+        assert not should_distill(state)
+
+
+class TestIncrementalUpdate:
+    """Only entries appended since the last update are measured."""
+
+    def test_appends_measure_only_new_entries(self, counting_tokenizer):
+        from src.core.context_ledger import ledger_token_count, update_context_ledger
+
+        state = _state()
+        state["context_ledger"] = update_context_ledger(state)
+        counting_tokenizer.clear()
+
+        state["strategies"][2]["trajectory"].append("[Judge] Score: 8.0")
+        state["history"] = state["history"] + ["Evolution iter 1"]
+        ledger = update_context_ledger(state)
+
+        assert sorted(counting_tokenizer) == ["Evolution iter 1", "[Judge] Score: 8.0"]
+        texts = [state["problem_state"], state["research_context"], *state["history"]]
+        for strategy in state["strategies"]:
+            texts += [strategy["rationale"], strategy["assumption"], *strategy["trajectory"]]
+        assert ledger_token_count(ledger) == sum(len(t) for t in texts)
+
+        # 未变化时不读取任何文本
+        counting_tokenizer.clear()
+        update_context_ledger({**state, "context_ledger": ledger})
+        assert counting_tokenizer == []
+
+    def test_replaced_lists_and_removed_strategies(self):
+        from src.agents.distiller import estimate_token_count
+        from src.core.context_ledger import update_context_ledger
+
+        state = _state()
+        state["context_ledger"] = update_context_ledger(state)
+
+        # 历史被整体替换 (不是追加)、策略被移除
+        state["history"] = ["Graph initialized via Server", "x" * 400]
+        state["strategies"] = state["strategies"][1:]
+        ledger = update_context_ledger(state)
+        assert set(ledger["strategies"]) == {"id1", "id2"}
+        assert estimate_token_count({**state, "context_ledger": ledger}) == _full_scan(state)
+
+    def test_tokenizer_change_rebuilds(self, counting_tokenizer):
+        from src.core.context_ledger import ledger_token_count, set_context_tokenizer, update_context_ledger
+
+        state = _state()
+        state["context_ledger"] = update_context_ledger(state)
+        set_context_tokenizer("chars")
+        assert ledger_token_count(update_context_ledger(state)) == _full_scan(state)
+
+
+class TestTokenizerConfig:
+    def test_gemini_tokenizer_falls_back_without_sentencepiece(self, monkeypatch):
+        from src.core import context_ledger
+
+        monkeypatch.setenv("CONTEXT_TOKENIZER", "gemini")
+        monkeypatch.setattr(context_ledger, "_load_gemini_tokenizer", lambda model: None)
+        context_ledger.set_context_tokenizer(None)
+        try:
+            assert context_ledger.get_context_tokenizer() == ("chars", None)
+        finally:
+            context_ledger.set_context_tokenizer(None)
+
+
+class TestNodes:
+    def test_nodes_attach_ledger(self):
+        from src.agents.distiller import distiller_for_judge_node
+        from src.core.context_ledger import ledger_token_count
+
+        state = {**_state(), "iteration_count": 1}
+        result = distiller_for_judge_node(state)
+        assert result["judge_context"]
+        assert ledger_token_count(result["context_ledger"]) == _full_scan(result)
@@ -53,6 +53,18 @@ def test_record_reflection_persists_payload(tmp_path, monkeypatch):
     assert payload["source"]["metadata"] == {"score": 0.95}
 
 
+def _history_lines_on_disk(thread_id: str) -> list[dict]:
+    history_path = cm.CONTEXT_ROOT / cm._sanitize_thread_id(thread_id) / cm.HISTORY_FILENAME
+    cm.context_writer_pool.flush(history_path)
+    segments = cm._sealed_segments(history_path) + [history_path]
+    return [
+        json.loads(line)
+        for segment in segments
+        for line in segment.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+
+
 def test_append_step_enforces_history_limit(tmp_path, monkeypatch):
     _configure_temp_roots(tmp_path, monkeypatch)
 
@@ -60,16 +72,19 @@ def test_append_step_enforces_history_limit(tmp_path, monkeypatch):
     cm.create_context(thread_id)
 
     limit = cm.get_history_limit()
-    total_entries = limit + 5
+    total_entries = limit * 3 + 5
     for index in range(total_entries):
         cm.append_step(thread_id, {"index": index})
 
-    history_path = cm.CONTEXT_ROOT / cm._sanitize_thread_id(thread_id) / "history.log"
-    lines = [line for line in history_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    entries = cm._load_history(thread_id)
+    assert len(entries) == limit
+    assert entries[0].data["index"] == total_entries - limit
+    assert entries[-1].data["index"] == total_entries - 1
 
-    assert len(lines) == limit
-    first_entry = json.loads(lines[0])
-    assert first_entry["data"]["index"] == total_entries - limit
+    # Old segments are dropped whole, so disk usage stays within two segments of the limit
+    on_disk = _history_lines_on_disk(thread_id)
+    assert limit <= len(on_disk) < limit + 2 * cm._segment_capacity(limit)
+    assert on_disk[-1]["data"]["index"] == total_entries - 1
 
 
 def test_append_step_respects_custom_history_limit(tmp_path, monkeypatch):
@@ -84,8 +99,244 @@ def test_append_step_respects_custom_history_limit(tmp_path, monkeypatch):
     for index in range(custom_limit + 3):
         cm.append_step(thread_id, {"index": index})
 
-    history_path = cm.CONTEXT_ROOT / cm._sanitize_thread_id(thread_id) / "history.log"
-    lines = [json.loads(line) for line in history_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    entries = cm._load_history(thread_id)
+    assert len(entries) == custom_limit
+    assert entries[0].data["index"] == 3
+    assert len(_history_lines_on_disk(thread_id)) < custom_limit + 2 * cm._segment_capacity(custom_limit)
+
+
+def test_append_step_rotates_instead_of_rewriting(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+    monkeypatch.setenv(cm.HISTORY_LIMIT_ENV_VAR, "8")
+
+    thread_id = "Delta"
+    cm.create_context(thread_id)
+    history_path = cm.CONTEXT_ROOT / cm._sanitize_thread_id(thread_id) / cm.HISTORY_FILENAME
+
+    for index in range(100):
+        cm.append_step(thread_id, {"index": index})
+
+    cm.context_writer_pool.flush(history_path)
+    sealed = cm._sealed_segments(history_path)
+    assert len(sealed) == cm.HISTORY_SEGMENTS_RETAINED
+    # The active segment never grows beyond one segment's worth of lines
+    active = [line for line in history_path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    assert len(active) <= cm._segment_capacity(8)
+
+
+def test_load_history_reads_tail_of_legacy_log(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+    monkeypatch.setenv(cm.HISTORY_LIMIT_ENV_VAR, "3")
+
+    thread_id = "Legacy"
+    context_dir = cm.create_context(thread_id)
+    lines = [json.dumps({"timestamp": str(i), "data": {"index": i}}) for i in range(5000)]
+    (context_dir / cm.HISTORY_FILENAME).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    entries = cm._load_history(thread_id)
+    assert [entry.data["index"] for entry in entries] == [4997, 4998, 4999]
+
+
+def test_summarize_reuses_cached_summary_and_sends_only_new_steps(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+
+    calls = []
+
+    def _fake_generate(thread_id, prompt_text, history_block, previous_summary=None):
+        calls.append((history_block, previous_summary))
+        return f"summary #{len(calls)}", False
+
+    monkeypatch.setattr(cm, "_generate_summary", _fake_generate)
+
+    thread_id = "Epsilon"
+    cm.create_context(thread_id)
+    cm.append_step(thread_id, {"step": "first"})
+    cm.append_step(thread_id, {"step": "second"})
+
+    first = cm.summarize(thread_id)
+    assert first.read_text(encoding="utf-8") == "summary #1"
+    assert calls[0][1] is None
+
+    # Nothing appended: cached summary, no model call
+    cm.summarize(thread_id)
+    assert len(calls) == 1
+
+    cm.append_step(thread_id, {"step": "third"})
+    cm.summarize(thread_id)
+
+    assert len(calls) == 2
+    block, previous = calls[1]
+    assert previous == "summary #1"
+    assert "third" in block
+    assert "first" not in block and "second" not in block
+    meta = json.loads((first.parent / cm.SUMMARY_META_FILENAME).read_text(encoding="utf-8"))
+    assert meta["incremental"] is True
+
+
+def test_summarize_falls_back_to_full_when_anchor_rotated_out(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+    monkeypatch.setenv(cm.HISTORY_LIMIT_ENV_VAR, "4")
+
+    calls = []
+
+    def _fake_generate(thread_id, prompt_text, history_block, previous_summary=None):
+        calls.append(previous_summary)
+        return "summary", False
+
+    monkeypatch.setattr(cm, "_generate_summary", _fake_generate)
+
+    thread_id = "Zeta"
+    cm.create_context(thread_id)
+    cm.append_step(thread_id, {"index": 0})
+    cm.summarize(thread_id)
+
+    for index in range(1, 12):
+        cm.append_step(thread_id, {"index": index})
+    cm.summarize(thread_id)
+
+    assert calls == [None, None]
+
+
+def test_summarize_retries_model_after_fallback(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+
+    calls = []
+    outcomes = iter([("# Thread Eta Summary (Fallback)", True), ("real summary", False)])
+
+    def _flaky_generate(thread_id, prompt_text, history_block, previous_summary=None):
+        calls.append(previous_summary)
+        return next(outcomes)
+
+    monkeypatch.setattr(cm, "_generate_summary", _flaky_generate)
+
+    thread_id = "Eta"
+    cm.create_context(thread_id)
+    cm.append_step(thread_id, {"step": "first"})
+
+    path = cm.summarize(thread_id)
+    meta = json.loads((path.parent / cm.SUMMARY_META_FILENAME).read_text(encoding="utf-8"))
+    assert meta["fallback"] is True and "content_hash" not in meta
+
+    # Unchanged history: the fallback is not served from cache nor merged incrementally
+    cm.summarize(thread_id)
+    assert calls == [None, None]
+    assert path.read_text(encoding="utf-8") == "real summary"
+
+    cm.summarize(thread_id)
+    assert len(calls) == 2
+
+
+async def test_generate_summaries_bounds_concurrency(tmp_path, monkeypatch):
+    import threading
+    import time
+
+    _configure_temp_roots(tmp_path, monkeypatch)
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _slow_generate(thread_id, prompt_text, history_block, previous_summary=None):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return f"summary of {thread_id}", False
+
+    monkeypatch.setattr(cm, "_generate_summary", _slow_generate)
+
+    thread_ids = [f"thread-{i}" for i in range(6)]
+    for thread_id in thread_ids:
+        cm.create_context(thread_id)
+        cm.append_step(thread_id, {"event": "done"})
+
+    results = await cm.generate_summaries(thread_ids + ["missing"], max_concurrency=2)
+
+    assert sorted(results) == sorted(thread_ids)
+    assert results["thread-3"].text == "summary of thread-3"
+    assert peak == 2
+
+
+def test_record_reflections_batches_embeddings(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+
+    batches = []
+
+    def _fake_embed_texts(documents):
+        batches.append(list(documents))
+        return [[float(i)] for i, _ in enumerate(documents)]
+
+    monkeypatch.setattr(cm, "embed_texts", _fake_embed_texts)
+    monkeypatch.setattr(cm, "embed_text", lambda _: pytest.fail("per-item embedding call"))
+
+    requests = []
+    for i in range(5):
+        cm.create_context(f"T{i}")
+        requests.append(cm.ReflectionRequest(f"T{i}", f"reflection {i}", outcome="success", metadata={"i": i}))
+
+    paths = cm.record_reflections(requests)
+
+    assert len(batches) == 1 and len(batches[0]) == 5
+    payloads = [json.loads(path.read_text(encoding="utf-8")) for path in paths]
+    assert [p["reflection"] for p in payloads] == [f"reflection {i}" for i in range(5)]
+    assert payloads[3]["embedding"] == [3.0]
+    assert payloads[3]["source"]["metadata"] == {"i": 3}
+
+
+def test_writer_pool_buffers_until_flush(tmp_path):
+    history_path = tmp_path / cm.HISTORY_FILENAME
+    history_path.write_text("", encoding="utf-8")
+    pool = cm.ContextWriterPool(flush_bytes=1024 * 1024, flush_interval=60.0)
+
+    try:
+        pool.append(history_path, '{"data": 1}\n')
+        pool.append(history_path, '{"data": 2}\n')
+        assert history_path.read_text(encoding="utf-8") == ""
+
+        pool.flush(history_path)
+        assert history_path.read_text(encoding="utf-8").splitlines() == ['{"data": 1}', '{"data": 2}']
+    finally:
+        pool.shutdown()
+
+
+def test_writer_pool_flushes_on_size_and_evicts_lru(tmp_path):
+    pool = cm.ContextWriterPool(flush_bytes=16, flush_interval=60.0, max_open=2)
+    paths = [tmp_path / f"h{i}.log" for i in range(3)]
+
+    try:
+        pool.append(paths[0], "x" * 20 + "\n")
+        assert paths[0].read_text(encoding="utf-8").strip() == "x" * 20
+
+        pool.append(paths[1], "a\n")
+        pool.append(paths[2], "b\n")  # evicts (and closes) the writer for paths[0]
+        pool.append(paths[1], "c\n")
+        assert paths[1].read_text(encoding="utf-8") == ""
+        pool.close_all()
+        assert paths[1].read_text(encoding="utf-8") == "a\nc\n"
+        assert paths[2].read_text(encoding="utf-8") == "b\n"
+    finally:
+        pool.shutdown()
+
+
+def test_context_dir_resolution_is_cached(tmp_path, monkeypatch):
+    _configure_temp_roots(tmp_path, monkeypatch)
+
+    mkdir_calls = []
+    original_mkdir = Path.mkdir
+
+    def _counting_mkdir(self, *args, **kwargs):
+        mkdir_calls.append(self)
+        return original_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "mkdir", _counting_mkdir)
+
+    cm.create_context("Cached")
+    before = len(mkdir_calls)
+    for index in range(20):
+        cm.append_step("Cached", {"index": index})
 
-    assert len(lines) == custom_limit
-    assert lines[0]["data"]["index"] == 3
+    assert len(mkdir_calls) == before
+    assert len(cm._load_history("Cached")) == 20
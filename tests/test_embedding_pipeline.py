@@ -0,0 +1,128 @@
+"""
+Tests for the propagation -> embedding pipeline.
+"""
+
+import threading
+
+import pytest
+
+
+def _child(i):
+    return {"id": f"c{i}", "name": f"child {i}", "rationale": "r", "assumption": "a",
+            "status": "active", "embedding": None}
+
+
+@pytest.fixture
+def fake_embed(monkeypatch):
+    from src.tools import embedding_pipeline
+
+    calls = []
+    release = threading.Event()
+
+    def embed_strategies(strategies, use_mock=None):
+        calls.append([s["id"] for s in strategies])
+        release.wait(timeout=5)
+        for s in strategies:
+            s["embedding"] = [float(len(calls)), 1.0]
+        return strategies
+
+    monkeypatch.setattr(embedding_pipeline.embedding_client, "embed_strategies", embed_strategies)
+    release.calls = calls
+    return release
+
+
+class TestEmbeddingPipeline:
+    """Embeddings are submitted early and collected by strategy id."""
+
+    def test_submit_runs_in_background_and_collect_fills(self, fake_embed):
+        from src.tools.embedding_pipeline import EmbeddingPipeline
+
+        pipeline = EmbeddingPipeline()
+        children = [_child(0), _child(1)]
+        pipeline.submit(children)
+
+        # submit 不阻塞，也不修改传入的字典
+        assert children[0]["embedding"] is None
+        assert pipeline.pending_count() == 2
+
+        # 状态可能被复制：按 id 取回
+        copies = [dict(c) for c in children]
+        fake_embed.set()
+        assert pipeline.collect(copies, timeout=5) == 2
+        assert copies[0]["embedding"] == [1.0, 1.0]
+        assert pipeline.pending_count() == 0
+
+    def test_unknown_and_failed_strategies_are_left_for_fallback(self, monkeypatch):
+        from src.tools import embedding_pipeline
+
+        def failing(strategies, use_mock=None):
+            raise RuntimeError("modelscope down")
+
+        monkeypatch.setattr(embedding_pipeline.embedding_client, "embed_strategies", failing)
+        pipeline = embedding_pipeline.EmbeddingPipeline()
+        pipeline.submit([_child(0)])
+
+        strategies = [_child(0), _child(9)]
+        assert pipeline.collect(strategies, timeout=5) == 0
+        assert all(s["embedding"] is None for s in strategies)
+
+    def test_pending_results_are_bounded(self, fake_embed):
+        from src.tools.embedding_pipeline import EmbeddingPipeline
+
+        fake_embed.set()
+        pipeline = EmbeddingPipeline(max_pending=3)
+        for i in range(5):
+            pipeline.submit([_child(i)])
+        assert pipeline.pending_count() == 3
+
+
+class TestPropagationPipeline:
+    """Propagation submits each parent's children as soon as they are generated."""
+
+    def test_children_embedded_before_evolution(self, monkeypatch, fake_embed):
+        from src.agents import evolution, propagation
+        from src.tools.embedding_pipeline import EmbeddingPipeline
+
+        pipeline = EmbeddingPipeline()
+        monkeypatch.setattr(propagation, "embedding_pipeline", pipeline)
+        monkeypatch.setattr(evolution, "embedding_pipeline", pipeline)
+        monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+        monkeypatch.delenv("EMBEDDING_PIPELINE", raising=False)
+
+        parents = [
+            {"id": f"p{i}", "name": f"parent {i}", "status": "active", "child_quota": 2,
+             "trajectory": [], "assumption": ""}
+            for i in range(2)
+        ]
+        state = propagation.propagation_node({"problem_state": "p", "strategies": parents, "config": {}})
+
+        children = [s for s in state["strategies"] if s.get("parent_id")]
+        assert pipeline.pending_count() == len(children) == 4
+
+        # Evolution 取回预先计算的嵌入，不再同步嵌入
+        def no_sync_embedding(strategies, use_mock=None):
+            raise AssertionError(f"unexpected sync embedding of {len(strategies)} strategies")
+
+        monkeypatch.setattr(evolution, "embed_strategies", no_sync_embedding)
+        for parent in parents:
+            parent["embedding"] = [0.5, 0.5]
+        fake_embed.set()
+        result = evolution.evolution_node(state)
+
+        assert all(s["embedding"] for s in result["strategies"])
+        assert pipeline.pending_count() == 0
+        # 每个父策略一批
+        assert sorted(len(batch) for batch in fake_embed.calls) == [2, 2]
+
+    def test_pipeline_can_be_disabled(self, monkeypatch):
+        from src.agents import propagation
+        from src.tools.embedding_pipeline import EmbeddingPipeline
+
+        pipeline = EmbeddingPipeline()
+        monkeypatch.setattr(propagation, "embedding_pipeline", pipeline)
+        monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+        monkeypatch.setenv("EMBEDDING_PIPELINE", "false")
+
+        parent = {"id": "p", "name": "parent", "status": "active", "child_quota": 1, "trajectory": []}
+        propagation.propagation_node({"problem_state": "p", "strategies": [parent], "config": {}})
+        assert pipeline.pending_count() == 0
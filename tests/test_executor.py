@@ -0,0 +1,232 @@
+"""
+Tests for concurrent Executor task execution (no network: task runners are faked).
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+
+def _strategy(i):
+    return {"id": f"id{i}", "name": f"s{i}", "status": "active", "trajectory": [], "score": 0.0}
+
+
+@pytest.fixture
+def fake_executor(monkeypatch):
+    from src.agents import executor
+
+    monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+    monkeypatch.setattr(executor.kb_write_queue, "enqueue_strategy_archive", lambda **kwargs: "queued")
+    events = []
+    inflight = {"now": 0, "peak": 0}
+
+    async def fake_single(problem, strategy, decision, api_key, use_mock=False, thinking_level="HIGH", on_text=None):
+        inflight["now"] += 1
+        inflight["peak"] = max(inflight["peak"], inflight["now"])
+        # Earlier tasks finish last, so merge order must not follow completion order
+        await asyncio.sleep(0.05 / (1 + int(strategy["name"][1:])))
+        inflight["now"] -= 1
+        events.append(("task", strategy["name"]))
+        return {
+            "execution_result": f"done {strategy['name']}",
+            "new_insights": [],
+            "variant_strategy": {"strategy_name": f"v{strategy['name']}"},
+        }
+
+    async def fake_synthesis(problem, strategies, decision, research_context, existing_report,
+                             report_version, api_key, use_mock=False, thinking_level="HIGH", on_text=None):
+        events.append(("synthesis", inflight["now"]))
+        active = [s["id"] for s in strategies if s.get("status") == "active"]
+        return {"report": f"report {report_version + 1}", "prune_strategy_ids": active}
+
+    monkeypatch.setattr(executor, "execute_single_task_async", fake_single)
+    monkeypatch.setattr(executor, "execute_synthesis_task_async", fake_synthesis)
+    return executor, events, inflight
+
+
+class TestConcurrentExecutor:
+    """Strategy tasks run on a bounded pool; synthesis waits for the tasks before it."""
+
+    def test_tasks_run_concurrently_and_merge_in_decision_order(self, fake_executor):
+        executor, events, inflight = fake_executor
+        strategies = [_strategy(i) for i in range(4)]
+        state = {
+            "problem_state": "p",
+            "strategies": strategies,
+            "architect_decisions": [{"strategy_id": f"id{i}"} for i in range(4)],
+            "config": {"executor_concurrency": 2},
+            "history": [],
+        }
+
+        result = executor.executor_node(state)
+
+        assert inflight["peak"] == 2
+        assert [s["name"] for s in result["strategies"][4:]] == ["vs0", "vs1", "vs2", "vs3"]
+        assert [s["trajectory"] for s in result["strategies"][:4]] == [
+            [f"[Executor] done s{i}..."] for i in range(4)
+        ]
+
+    def test_synthesis_is_a_barrier(self, fake_executor):
+        executor, events, _ = fake_executor
+        strategies = [_strategy(i) for i in range(3)]
+        state = {
+            "problem_state": "p",
+            "strategies": strategies,
+            "architect_decisions": [
+                {"strategy_id": "id0"},
+                {"strategy_id": "id1"},
+                {"strategy_id": None},
+                {"strategy_id": "id2"},
+            ],
+            "config": {"executor_concurrency": 4},
+            "history": [],
+        }
+
+        result = executor.executor_node(state)
+
+        kinds = [e[0] for e in events]
+        assert kinds == ["task", "task", "synthesis", "task"]
+        assert events[2] == ("synthesis", 0)  # nothing in flight when synthesis starts
+        assert result["report_version"] == 1
+        # Synthesis pruned the strategies that were active when it ran
+        assert [s["status"] for s in strategies] == ["pruned_synthesized"] * 3
+        assert "Executor: 3 tasks, 1 synthesis, 3 variants" in result["history"][-1]
+
+    def test_plan_execution_waves(self):
+        from src.agents.executor import plan_execution_waves
+
+        decisions = [{"strategy_id": "a"}, {"strategy_id": "null"}, {"strategy_id": "b"}, {"strategy_id": "c"}]
+
+        waves = plan_execution_waves(decisions)
+
+        assert [([d["strategy_id"] for d in tasks], synth and synth["strategy_id"]) for tasks, synth in waves] == [
+            (["a"], "null"),
+            (["b", "c"], None),
+        ]
+
+
+class FakeStreamingClient:
+    """Mimics client.aio.models.generate_content(_stream) for a fixed JSON response."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.aio = SimpleNamespace(models=self)
+        self.calls = []
+
+    async def generate_content(self, model, contents, config):
+        self.calls.append("blocking")
+        return SimpleNamespace(text="".join(self.chunks))
+
+    async def generate_content_stream(self, model, contents, config):
+        self.calls.append("stream")
+
+        async def chunks():
+            for chunk in self.chunks:
+                yield SimpleNamespace(text=chunk)
+
+        return chunks()
+
+
+class TestStreamingExecutor:
+    """Streaming mode forwards partial text but produces the same parsed result."""
+
+    CHUNKS = ['{"execution_result": "grounded ', 'answer", "new_insights": ["i1"], ', '"next_steps": []}', ""]
+
+    def _patch_client(self, monkeypatch):
+        from src.agents import executor
+
+        client = FakeStreamingClient(self.CHUNKS)
+        monkeypatch.setattr(executor.llm_clients, "get_genai_client", lambda api_key: client)
+        return executor, client
+
+    def test_streaming_result_matches_blocking_result(self, monkeypatch):
+        executor, client = self._patch_client(monkeypatch)
+        strategy = _strategy(0)
+        received = []
+
+        blocking = executor.execute_single_task("p", strategy, {}, "key")
+        streamed = executor.execute_single_task("p", strategy, {}, "key", on_text=received.append)
+
+        assert client.calls == ["blocking", "stream"]
+        assert streamed == blocking
+        assert streamed["new_insights"] == ["i1"]
+        assert received == self.CHUNKS[:3]
+
+    def test_executor_node_broadcasts_progress_events(self, monkeypatch):
+        from src.core.progress import ProgressReporter
+
+        executor, client = self._patch_client(monkeypatch)
+        monkeypatch.setenv("GEMINI_API_KEY", "key")
+        monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+        reporter = ProgressReporter()
+        monkeypatch.setattr(executor, "progress_reporter", reporter)
+        messages = []
+
+        async def run():
+            async def broadcast(message):
+                messages.append(message)
+
+            reporter.set_broadcast_func(broadcast)
+            state = {
+                "problem_state": "p",
+                "strategies": [_strategy(0)],
+                "architect_decisions": [{"strategy_id": "id0"}],
+                "config": {"executor_streaming": True},
+                "history": [],
+            }
+            result = await asyncio.to_thread(executor.executor_node, state)
+            await asyncio.sleep(0.05)  # let scheduled broadcasts run
+            return result
+
+        result = asyncio.run(run())
+
+        assert client.calls == ["stream"]
+        assert result["strategies"][0]["trajectory"] == ["[Executor] grounded answer..."]
+        assert {m["type"] for m in messages} == {"executor_progress"}
+        assert "".join(m["data"]["delta"] for m in messages) == "".join(self.CHUNKS)
+        assert messages[-1]["data"]["done"] is True
+        assert messages[-1]["data"]["strategy_name"] == "s0"
+        assert len({m["data"]["task_id"] for m in messages}) == 1
+
+    def test_streaming_resolution(self, monkeypatch):
+        from src.agents.executor import get_executor_streaming
+
+        monkeypatch.delenv("EXECUTOR_STREAMING", raising=False)
+        assert get_executor_streaming({}) is False
+        monkeypatch.setenv("EXECUTOR_STREAMING", "true")
+        assert get_executor_streaming({}) is True
+        assert get_executor_streaming({"executor_streaming": False}) is False
+
+
+class TestUnavailableModel:
+    """When the LLM is unavailable, tasks are skipped instead of polluting strategy state."""
+
+    def test_skipped_task_leaves_trajectory_and_report(self, monkeypatch):
+        from src.agents import executor
+        from src.llm_call_policy import LLMCircuitOpenError
+
+        class DownPolicy:
+            async def call(self, agent, model, factory, hedge=True, retry=True):
+                raise LLMCircuitOpenError(f"Circuit breaker open for model {model}")
+
+        monkeypatch.setattr(executor, "llm_call_policy", DownPolicy())
+        monkeypatch.setattr(executor.llm_clients, "get_genai_client", lambda api_key: FakeStreamingClient([]))
+        monkeypatch.setenv("GEMINI_API_KEY", "key")
+        monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+
+        strategy = _strategy(0)
+        state = {
+            "problem_state": "p",
+            "strategies": [strategy],
+            "architect_decisions": [{"strategy_id": "id0"}, {"strategy_id": None}],
+            "final_report": "existing report",
+            "report_version": 3,
+            "config": {},
+        }
+
+        result = executor.executor_node(state)
+
+        assert result["strategies"][0]["trajectory"] == []
+        assert result["final_report"] == "existing report"
+        assert result["report_version"] == 3
@@ -0,0 +1,180 @@
+"""
+Tests for the local fake Gemini client used for offline load testing.
+"""
+
+import json
+
+import pytest
+
+
+class TestAgentDetection:
+    """Every agent's real prompt template is recognised (guards against prompt drift)."""
+
+    def test_prompt_templates(self):
+        from src.agents.architect import ARCHITECT_SCHEDULER_PROMPT
+        from src.agents.executor import EXECUTOR_PROMPT_TEMPLATE, SYNTHESIS_PROMPT_TEMPLATE
+        from src.agents.judge import BATCH_EVALUATION_HUMAN_PROMPT, JUDGE_SYSTEM_PROMPT
+        from src.agents.propagation import PROPAGATION_PROMPT
+        from src.agents.researcher import RESEARCHER_PROMPT_TEMPLATE
+        from src.agents.strategy_generator import STRATEGY_GENERATOR_PROMPT
+        from src.agents.task_decomposer import TASK_DECOMPOSER_PROMPT
+        from src.fake_llm import detect_agent
+
+        assert detect_agent(TASK_DECOMPOSER_PROMPT) == "task_decomposer"
+        assert detect_agent(RESEARCHER_PROMPT_TEMPLATE) == "researcher"
+        assert detect_agent(STRATEGY_GENERATOR_PROMPT) == "strategy_generator"
+        assert detect_agent(PROPAGATION_PROMPT) == "propagation"
+        assert detect_agent(ARCHITECT_SCHEDULER_PROMPT) == "architect"
+        assert detect_agent(EXECUTOR_PROMPT_TEMPLATE) == "executor"
+        assert detect_agent(SYNTHESIS_PROMPT_TEMPLATE) == "executor_synthesis"
+        assert detect_agent(JUDGE_SYSTEM_PROMPT + '"feasibility_score"') == "judge"
+        assert detect_agent(BATCH_EVALUATION_HUMAN_PROMPT) == "judge_batch"
+        assert detect_agent("hello") == "chat"
+
+
+class TestResponses:
+    """Responses follow each agent's output schema and carry usage metadata."""
+
+    async def test_propagation_children_and_usage(self):
+        from src.agents.propagation import PROPAGATION_PROMPT
+        from src.fake_llm import FakeLLM
+
+        fake = FakeLLM(latency=0, seed=1)
+        prompt = PROPAGATION_PROMPT.format(
+            problem="p", parent_name="A", parent_rationale="r", parent_assumption="a",
+            parent_score=0.5, parent_ucb=0.6, parent_trajectory="", num_children=4,
+        )
+        response = await fake.genai_client().aio.models.generate_content(model="m", contents=prompt)
+        children = json.loads(response.text)
+        assert len(children) == 4 and all(c["strategy_name"] for c in children)
+        assert response.usage_metadata.prompt_token_count == len(prompt) // 4
+        assert response.usage_metadata.total_token_count > response.usage_metadata.prompt_token_count
+
+        stats = fake.metrics()["agents"]["propagation"]
+        assert stats["calls"] == 1 and stats["input_tokens"] == len(prompt) // 4
+
+    def test_architect_and_batch_judge_echo_prompt_ids(self):
+        from src.fake_llm import FakeLLM
+
+        fake = FakeLLM(latency=0, synthesis_rate=1.0)
+        decisions = json.loads(fake.respond("architect", "1. [1a2b3c4d...] A\n2. [5e6f7a8b...] B"))
+        assert [d["strategy_id"] for d in decisions] == ["1a2b3c4d", "5e6f7a8b", None]
+
+        scores = json.loads(fake.respond("judge_batch", "### [id: x1] s\n### [id: x2] t"))
+        assert [s["id"] for s in scores] == ["x1", "x2"]
+        assert all(0 <= s["feasibility_score"] <= 10 for s in scores)
+
+    async def test_stream_reassembles_to_full_text(self):
+        from src.agents.executor import EXECUTOR_PROMPT_TEMPLATE
+        from src.fake_llm import FakeLLM
+
+        client = FakeLLM(latency=0).genai_client()
+        stream = await client.aio.models.generate_content_stream(model="m", contents=EXECUTOR_PROMPT_TEMPLATE)
+        chunks = [chunk async for chunk in stream]
+        assert len(chunks) > 1
+        assert "execution_result" in json.loads("".join(c.text for c in chunks))
+        assert chunks[-1].usage_metadata is not None
+
+    async def test_chat_model_with_json_parser(self):
+        from langchain_core.output_parsers import JsonOutputParser
+        from langchain_core.prompts import PromptTemplate
+
+        from src.agents.task_decomposer import TASK_DECOMPOSER_PROMPT
+        from src.fake_llm import FakeLLM
+
+        llm = FakeLLM(latency=0).chat_model("m")
+        chain = PromptTemplate(template=TASK_DECOMPOSER_PROMPT, input_variables=["problem"]) | llm | JsonOutputParser()
+        result = await chain.ainvoke({"problem": "p"})
+        assert result["subtasks"] and result["information_needs"]
+        assert llm.bind_tools([]) is llm
+
+
+class TestLatencyAndFailures:
+    def test_latency_distributions(self):
+        from src.fake_llm import FakeLLM
+
+        assert FakeLLM(latency=0.2, latency_dist="fixed").sample_latency("judge") == 0.2
+        assert FakeLLM(latency=0.2, agent_latencies={"executor": 1.0}, latency_dist="fixed").sample_latency("executor") == 1.0
+
+        uniform = FakeLLM(latency=1.0, latency_dist="uniform", jitter=0.5, seed=3)
+        assert all(0.5 <= uniform.sample_latency("x") <= 1.5 for _ in range(100))
+
+        lognormal = FakeLLM(latency=1.0, latency_dist="lognormal", jitter=0.5, seed=3)
+        samples = [lognormal.sample_latency("x") for _ in range(4000)]
+        assert 0.9 < sum(samples) / len(samples) < 1.1
+        assert max(samples) > 2.0  # 长尾
+
+        with pytest.raises(ValueError):
+            FakeLLM(latency_dist="normal")
+
+    async def test_injected_failures_are_retried_by_call_policy(self):
+        from src.fake_llm import FakeLLM
+        from src.llm_call_policy import ERROR_RETRYABLE, LLMCallPolicy, LLMUnavailableError, classify_error
+
+        client = FakeLLM(latency=0, failure_rate=1.0).genai_client()
+        policy = LLMCallPolicy(timeout=1, max_retries=2, retry_base_delay=0, retry_max_delay=0)
+        with pytest.raises(LLMUnavailableError) as info:
+            await policy.call("judge", "m", lambda: client.aio.models.generate_content(model="m", contents="x"))
+        assert classify_error(info.value.__cause__) == ERROR_RETRYABLE
+        assert policy.metrics()["agents"]["judge"]["retries"] == 2
+
+
+@pytest.fixture
+def fake_registry(monkeypatch):
+    from src.fake_llm import FakeLLM
+    from src.llm_clients import llm_clients
+
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+    monkeypatch.setenv("USE_MOCK_EMBEDDING", "true")
+    monkeypatch.setenv("MOCK_EMBEDDING_DIM", "8")
+    fake = FakeLLM(latency=0.001, seed=7)
+    llm_clients.use_fake(fake)
+    yield fake
+    llm_clients.use_fake(None)
+
+
+class TestRegistryInjection:
+    def test_registry_serves_fakes(self, fake_registry):
+        from src.fake_llm import FakeChatModel, FakeGenaiClient
+        from src.llm_clients import llm_clients
+
+        assert isinstance(llm_clients.get_genai_client("k"), FakeGenaiClient)
+        assert isinstance(llm_clients.get_chat_model("m", "k"), FakeChatModel)
+
+    def test_full_graph_runs_real_agent_code_on_fake(self, fake_registry, monkeypatch):
+        from src.agents import executor
+        from src.core.graph_builder import build_deep_think_graph
+
+        monkeypatch.setattr(executor.kb_write_queue, "enqueue_strategy_archive", lambda **kwargs: "queued")
+
+        state = {
+            "problem_state": "p", "subtasks": [], "information_needs": [], "strategies": [],
+            "research_context": None, "research_status": "insufficient", "spatial_entropy": 0.0,
+            "effective_temperature": 0.0, "normalized_temperature": 0.0,
+            "config": {"max_iterations": 3, "entropy_change_threshold": 0.0},
+            "virtual_filesystem": {}, "history": [], "iteration_count": 0, "research_iteration": 0,
+            "judge_context": None, "architect_decisions": [],
+        }
+        app = build_deep_think_graph(use_async=False)
+        result = app.invoke(state, config={"recursion_limit": 100})
+
+        agents = fake_registry.metrics()["agents"]
+        for agent in ("task_decomposer", "researcher", "strategy_generator", "propagation", "judge"):
+            assert agents[agent]["calls"] > 0, agent
+        assert result["strategies"] and all(s["score"] > 0 for s in result["strategies"] if s["status"] == "active")
+
+    async def test_architect_id_prefixes_resolve_to_strategies(self, fake_registry):
+        from src.agents.architect import architect_scheduler_node_async
+
+        strategies = [
+            {"id": f"{i}abcdef0-0000-4000-8000-00000000000{i}", "name": f"s{i}", "rationale": "r",
+             "assumption": "a", "status": "active", "score": 0.5, "ucb_score": 0.5, "child_quota": 1,
+             "trajectory": []}
+            for i in range(2)
+        ]
+        state = {"problem_state": "p", "strategies": strategies, "history": [], "config": {}}
+        result = await architect_scheduler_node_async(state)
+
+        # prompt 中只显示 8 位 id 前缀，Executor 需要完整 id
+        assert [d["strategy_id"] for d in result["architect_decisions"]] == [s["id"] for s in strategies]
@@ -0,0 +1,288 @@
+"""
+Tests for Judge evaluation scheduling (no network: the chat model is faked).
+"""
+
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeJudgeLLM:
+    """Stands in for ChatGoogleGenerativeAI; scores are derived from the strategy name."""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        FakeJudgeLLM.instances.append(self)
+
+    def bind_tools(self, tools):
+        return self
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        name = re.search(r'待评估策略 "([^"]+)"', prompt).group(1)
+        self.calls.append(name)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        # Later strategies finish first, so writeback order must not follow completion order
+        await asyncio.sleep(0.05 / (1 + int(name[1:])))
+        self.active -= 1
+        if name == "s3":
+            raise RuntimeError("model unavailable")
+        tool_calls = []
+        if name == "s1":
+            tool_calls = [{"name": "write_experience", "args": {"title": "t", "content": "c", "experience_type": "meta_insight"}}]
+        score = int(name[1:])
+        return SimpleNamespace(
+            content=f'{{"feasibility_score": {score}, "reasoning": "r{score}"}}',
+            tool_calls=tool_calls,
+        )
+
+
+def _strategy(i, status="active"):
+    return {
+        "id": f"id{i}",
+        "name": f"s{i}",
+        "rationale": "理由",
+        "assumption": "假设",
+        "status": status,
+        "trajectory": [],
+    }
+
+
+@pytest.fixture
+def fake_judge(monkeypatch):
+    from src import llm_clients as llm_clients_module
+    from src.agents import judge
+
+    FakeJudgeLLM.instances.clear()
+    llm_clients_module.llm_clients.clear()
+    monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+    monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+    monkeypatch.setattr(llm_clients_module, "ChatGoogleGenerativeAI", FakeJudgeLLM)
+    queued = []
+    monkeypatch.setattr(judge.kb_write_queue, "enqueue_experience", lambda args: queued.append(args) or "queued")
+    yield judge, queued
+    llm_clients_module.llm_clients.clear()
+
+
+class TestParallelJudge:
+    """Judge evaluations run concurrently but are written back by index."""
+
+    def test_scores_written_back_by_index_with_concurrency_cap(self, fake_judge):
+        judge, queued = fake_judge
+        strategies = [_strategy(i) for i in range(6)] + [_strategy(6, status="pruned")]
+        state = {
+            "strategies": strategies,
+            "judge_context": "ctx",
+            "config": {"judge_concurrency": 2},
+            "history": [],
+        }
+
+        result = judge.judge_node(state)
+
+        llm = FakeJudgeLLM.instances[0]
+        assert llm.peak == 2
+        assert sorted(llm.calls) == ["s0", "s1", "s2", "s3", "s4", "s5"]
+        scores = [s.get("score") for s in result["strategies"]]
+        assert scores[:3] == [0.0, 0.1, 0.2]
+        assert scores[4:6] == [0.4, 0.5]
+        # Failed call leaves that strategy unscored; pruned strategy untouched
+        assert scores[3] is None and scores[6] is None
+        assert len(queued) == 1
+        assert "Judge evaluated 5 strategies" in result["history"][-1]
+
+    def test_concurrency_resolution(self, monkeypatch):
+        from src.agents.judge import DEFAULT_JUDGE_CONCURRENCY, get_judge_concurrency
+
+        monkeypatch.delenv("JUDGE_CONCURRENCY", raising=False)
+        assert get_judge_concurrency({}) == DEFAULT_JUDGE_CONCURRENCY
+        monkeypatch.setenv("JUDGE_CONCURRENCY", "7")
+        assert get_judge_concurrency({}) == 7
+        assert get_judge_concurrency({"judge_concurrency": 3}) == 3
+
+    async def test_runs_inside_running_event_loop(self, fake_judge):
+        judge, _ = fake_judge
+        state = {"strategies": [_strategy(0), _strategy(1)], "judge_context": "ctx", "config": {}, "history": []}
+
+        result = judge.judge_node(state)
+
+        assert [s["score"] for s in result["strategies"]] == [0.0, 0.1]
+
+
+class FakeBatchJudgeLLM(FakeJudgeLLM):
+    """Answers batched prompts with a JSON array, omitting/mangling some entries."""
+
+    async def ainvoke(self, messages):
+        prompt = messages[-1].content
+        ids = re.findall(r"### \[id: ([^\]]+)\]", prompt)
+        if not ids:
+            self.calls.append(("single", re.search(r'待评估策略 "([^"]+)"', prompt).group(1)))
+            return SimpleNamespace(content='{"feasibility_score": 1, "reasoning": "single"}', tool_calls=[])
+
+        self.calls.append(("batch", tuple(ids)))
+        items = []
+        for strategy_id in ids:
+            if strategy_id == "id2":
+                continue  # missing from the array
+            if strategy_id == "id4":
+                items.append({"id": strategy_id, "feasibility_score": "n/a", "reasoning": "bad"})
+                continue
+            items.append({"id": strategy_id, "feasibility_score": 8, "reasoning": "batch"})
+        import json as _json
+        return SimpleNamespace(content="```json\n" + _json.dumps(items) + "\n```", tool_calls=[])
+
+
+class TestBatchedJudge:
+    """K strategies per call, with per-strategy fallback for missing/malformed scores."""
+
+    def test_batch_mode_falls_back_for_missing_entries(self, fake_judge, monkeypatch):
+        from src import llm_clients as llm_clients_module
+
+        judge, _ = fake_judge
+        monkeypatch.setattr(llm_clients_module, "ChatGoogleGenerativeAI", FakeBatchJudgeLLM)
+        state = {
+            "strategies": [_strategy(i) for i in range(5)],
+            "judge_context": "ctx",
+            "config": {"judge_batch_size": 3},
+            "history": [],
+        }
+
+        result = judge.judge_node(state)
+
+        llm = FakeJudgeLLM.instances[-1]
+        batches = [c for c in llm.calls if c[0] == "batch"]
+        singles = sorted(c[1] for c in llm.calls if c[0] == "single")
+        assert [b[1] for b in batches] == [("id0", "id1", "id2"), ("id3", "id4")]
+        assert singles == ["s2", "s4"]
+        assert [s["score"] for s in result["strategies"]] == [0.8, 0.8, 0.1, 0.8, 0.1]
+
+    def test_parse_batch_content_filters_invalid_items(self):
+        from src.agents.judge import parse_batch_judge_content
+
+        content = 'prefix [{"id": "a", "feasibility_score": 7.5, "reasoning": "ok"},' \
+                  ' {"id": "b", "feasibility_score": 42}, {"id": "zzz", "feasibility_score": 3},' \
+                  ' {"id": "a", "feasibility_score": 1}] suffix'
+
+        parsed = parse_batch_judge_content(content, ["a", "b", "c"])
+
+        assert parsed == {"a": {"feasibility_score": 7.5, "reasoning": "ok"}}
+        assert parse_batch_judge_content("not json", ["a"]) == {}
+
+
+class TestJudgeScoreCache:
+    """Unchanged strategies reuse their previous score without an LLM call."""
+
+    def _run(self, judge, state):
+        # The chat model is shared through the client registry, so only count new calls
+        before = len(FakeJudgeLLM.instances[-1].calls) if FakeJudgeLLM.instances else 0
+        result = judge.judge_node(state)
+        assert len(FakeJudgeLLM.instances) == 1
+        return result, FakeJudgeLLM.instances[-1].calls[before:]
+
+    def test_unchanged_strategies_are_not_rejudged(self, fake_judge):
+        judge, _ = fake_judge
+        state = {
+            "strategies": [_strategy(1), _strategy(2)],
+            "judge_context": "iteration 1",
+            "config": {"judge_rejudge_policy": "on_change"},
+            "history": [],
+        }
+
+        state, calls = self._run(judge, state)
+        assert sorted(calls) == ["s1", "s2"]
+
+        # Only s2 was touched by the Executor; the context changes every iteration
+        state["strategies"][1]["trajectory"].append("[Executor] 新进展")
+        state["judge_context"] = "iteration 2"
+        state, calls = self._run(judge, state)
+
+        assert calls == ["s2"]
+        assert [s["score"] for s in state["strategies"]] == [0.1, 0.2]
+        assert state["judge_cache"]["id1"]["reuses"] == 1
+        assert "(1 cached)" in state["history"][-1]
+
+    def test_max_reuse_forces_rejudge(self, fake_judge):
+        judge, _ = fake_judge
+        state = {"strategies": [_strategy(1)], "judge_context": "c", "config": {"judge_max_reuse": 1}, "history": []}
+
+        state, _ = self._run(judge, state)
+        state, calls = self._run(judge, state)
+        assert calls == []
+        state, calls = self._run(judge, state)
+        assert calls == ["s1"]
+
+    def test_strict_and_always_policies(self, fake_judge):
+        judge, _ = fake_judge
+        base = {"strategies": [_strategy(1)], "judge_context": "c1", "history": []}
+
+        state, _ = self._run(judge, {**base, "config": {"judge_rejudge_policy": "strict"}})
+        state, calls = self._run(judge, {**state, "judge_context": "c2"})
+        assert calls == ["s1"]
+
+        # strict 是默认策略：新的蒸馏上下文不会复用旧评分
+        state, _ = self._run(judge, {**base, "config": {}})
+        state, calls = self._run(judge, state)
+        assert calls == []
+        state, calls = self._run(judge, {**state, "judge_context": "c2"})
+        assert calls == ["s1"]
+
+        state, _ = self._run(judge, {**base, "config": {"judge_rejudge_policy": "always"}})
+        state, calls = self._run(judge, state)
+        assert calls == ["s1"]
+
+    def test_strict_policy_hits_across_iterations_with_distilled_context(self, fake_judge):
+        from src.agents.distiller import generate_judge_context
+
+        judge, _ = fake_judge
+        state = {
+            "problem_state": "问题", "strategies": [_strategy(1), _strategy(2)], "config": {},
+            "history": ["Architect: scheduled 2 execution tasks"], "iteration_count": 0,
+            "normalized_temperature": 0.9, "spatial_entropy": 1.2,
+        }
+        state["judge_context"] = generate_judge_context(state)
+        state, calls = self._run(judge, state)
+        assert sorted(calls) == ["s1", "s2"]
+
+        # 下一轮: 迭代指标、τ、熵与事件日志都变了，策略本身没有变化
+        state = {
+            **state, "iteration_count": 1, "normalized_temperature": 0.7, "spatial_entropy": 0.8,
+            "history": state["history"] + ["Evolution: tau=0.7"],
+        }
+        state["judge_context"] = generate_judge_context(state)
+        state, calls = self._run(judge, state)
+        assert calls == []
+        assert "(2 cached)" in state["history"][-1]
+
+        # 问题概述变化时仍然重新评估
+        state = {**state, "problem_state": "另一个问题"}
+        state["judge_context"] = generate_judge_context(state)
+        state, calls = self._run(judge, state)
+        assert sorted(calls) == ["s1", "s2"]
+
+    def test_unset_server_policy_defers_to_env_and_default(self, monkeypatch):
+        from server import SimulationConfig
+        from src.agents.judge import get_rejudge_policy
+
+        config = SimulationConfig().model_dump()
+        monkeypatch.delenv("JUDGE_REJUDGE_POLICY", raising=False)
+        assert get_rejudge_policy(config)[0] == "strict"
+        monkeypatch.setenv("JUDGE_REJUDGE_POLICY", "always")
+        assert get_rejudge_policy(config)[0] == "always"
+        assert get_rejudge_policy({**config, "judge_rejudge_policy": "on_change"})[0] == "on_change"
+
+    def test_cache_key_ignores_judge_own_trailing_entries(self):
+        from src.agents.judge import judge_cache_key
+
+        strategy = _strategy(1)
+        before = judge_cache_key(strategy, "m")
+        strategy["trajectory"] = ["[Judge] Score: 1.00, Reasoning: r1"]
+        assert judge_cache_key(strategy, "m") == before
+        strategy["trajectory"].append("[Executor] step")
+        assert judge_cache_key(strategy, "m") != before
+        assert judge_cache_key(_strategy(1), "other-model") != before
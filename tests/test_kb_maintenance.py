@@ -0,0 +1,124 @@
+"""
+Tests for knowledge-base capacity management: near-duplicate merging,
+TTL expiry and retention-weighted eviction.
+"""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _write(kb_path, name, entry_type, embedding, age_days=0, tags=None):
+    record = {
+        "id": name,
+        "title": name,
+        "content": f"content of {name}",
+        "type": entry_type,
+        "tags": tags or [],
+        "created_at": (NOW - timedelta(days=age_days)).isoformat(),
+        "embedding": embedding,
+    }
+    path = kb_path / f"{name}.json"
+    path.write_text(json.dumps(record), encoding="utf-8")
+    return path
+
+
+class TestDuplicateMerging:
+    """Near-identical entries of the same type collapse into the newest one."""
+
+    def test_merges_near_duplicates_of_same_type(self, tmp_path):
+        from src.tools.kb_maintenance import MaintenancePolicy, run_maintenance
+
+        _write(tmp_path, "old", "lesson_learned", [1.0, 0.0], age_days=3, tags=["a"])
+        _write(tmp_path, "new", "lesson_learned", [1.0, 0.01], age_days=1, tags=["b"])
+        _write(tmp_path, "other_type", "meta_insight", [1.0, 0.0])
+        _write(tmp_path, "far", "lesson_learned", [0.0, 5.0])
+
+        report = run_maintenance(
+            kb_path=tmp_path,
+            policy=MaintenancePolicy(duplicate_distance=0.1, max_entries=None),
+            now=NOW.timestamp(),
+        )
+
+        assert report.merged == 1
+        names = sorted(p.stem for p in tmp_path.glob("*.json"))
+        assert names == ["far", "new", "other_type"]
+
+        survivor = json.loads((tmp_path / "new.json").read_text(encoding="utf-8"))
+        assert survivor["tags"] == ["b", "a"]
+        assert survivor["metadata"]["merged_from"] == ["old"]
+        assert survivor["metadata"]["merge_count"] == 1
+
+    def test_incremental_only_compares_new_entries(self, tmp_path):
+        from src.tools.kb_maintenance import MaintenancePolicy, run_maintenance
+
+        policy = MaintenancePolicy(duplicate_distance=0.1, max_entries=None)
+        _write(tmp_path, "a", "lesson_learned", [0.0, 0.0])
+        run_maintenance(kb_path=tmp_path, policy=policy, now=NOW.timestamp())
+
+        path = _write(tmp_path, "b", "lesson_learned", [0.0, 0.05], age_days=-1)
+        # Make sure the new file's mtime is strictly after the recorded run
+        state = json.loads((tmp_path / ".maintenance_state").read_text())
+        import os
+        os.utime(path, (state["last_run_mtime"] + 5, state["last_run_mtime"] + 5))
+
+        report = run_maintenance(kb_path=tmp_path, policy=policy, incremental=True, now=NOW.timestamp())
+
+        assert report.merged == 1
+        assert [p.stem for p in tmp_path.glob("*.json")] == ["b"]
+
+
+class TestTtlAndEviction:
+    """TTL removes stale archives; capacity eviction keeps high-retention entries."""
+
+    def test_ttl_expires_old_branch_archives_only(self, tmp_path):
+        from src.tools.kb_maintenance import MaintenancePolicy, run_maintenance
+
+        _write(tmp_path, "stale_archive", "branch_archive", [0.0, 1.0], age_days=45)
+        _write(tmp_path, "fresh_archive", "branch_archive", [1.0, 0.0], age_days=2)
+        _write(tmp_path, "old_insight", "meta_insight", [5.0, 5.0], age_days=400)
+
+        report = run_maintenance(
+            kb_path=tmp_path,
+            policy=MaintenancePolicy(duplicate_distance=0.0, max_entries=None),
+            now=NOW.timestamp(),
+        )
+
+        assert report.expired == 1
+        assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["fresh_archive", "old_insight"]
+
+    def test_eviction_prefers_low_weight_types(self, tmp_path):
+        from src.tools.kb_maintenance import MaintenancePolicy, run_maintenance
+
+        _write(tmp_path, "archive", "branch_archive", [0.0, 1.0], age_days=1)
+        _write(tmp_path, "insight", "meta_insight", [1.0, 0.0], age_days=1)
+        _write(tmp_path, "lesson", "lesson_learned", [3.0, 3.0], age_days=1)
+
+        report = run_maintenance(
+            kb_path=tmp_path,
+            policy=MaintenancePolicy(duplicate_distance=0.0, max_entries=2),
+            now=NOW.timestamp(),
+        )
+
+        assert report.evicted == 1
+        assert not (tmp_path / "archive.json").exists()
+
+    def test_dry_run_leaves_files_untouched(self, tmp_path):
+        from src.tools.kb_maintenance import MaintenancePolicy, run_maintenance
+
+        _write(tmp_path, "stale_archive", "branch_archive", [0.0, 1.0], age_days=45)
+
+        report = run_maintenance(
+            kb_path=tmp_path,
+            policy=MaintenancePolicy(max_entries=None),
+            dry_run=True,
+            now=NOW.timestamp(),
+        )
+
+        assert report.expired == 1
+        assert (tmp_path / "stale_archive.json").exists()
+        assert not (tmp_path / ".maintenance_state").exists()
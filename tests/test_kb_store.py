@@ -0,0 +1,190 @@
+"""
+Tests for the SQLite-backed hybrid (lexical + vector) knowledge-base index.
+"""
+
+import json
+import os
+
+import pytest
+
+
+def _write(kb_path, name, title, content, entry_type="lesson_learned", tags=None, embedding=None, created_at="2026-01-01T00:00:00"):
+    record = {
+        "id": name,
+        "title": title,
+        "content": content,
+        "type": entry_type,
+        "tags": tags or [],
+        "created_at": created_at,
+        "embedding": embedding if embedding is not None else [0.0, 0.0],
+    }
+    path = kb_path / f"{name}.json"
+    path.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    from src.tools.kb_store import KnowledgeBaseStore
+
+    kb_store = KnowledgeBaseStore(tmp_path / "index.sqlite3")
+    yield kb_store
+    kb_store.close()
+
+
+def _no_embed(_text):
+    raise AssertionError("embedding API should not be called")
+
+
+class TestIndexSync:
+    """The index follows the JSON files incrementally."""
+
+    def test_sync_indexes_updates_and_removes(self, tmp_path, store):
+        path = _write(tmp_path, "a", "多模型集成", "投票机制提升准确率")
+        _write(tmp_path, "b", "数据偏见", "训练数据存在偏差")
+        (tmp_path / "broken.json").write_text("{invalid json", encoding="utf-8")
+
+        assert store.sync_from_directory(tmp_path) == 2
+        assert store.count() == 2
+        assert store.sync_from_directory(tmp_path) == 0  # unchanged mtimes
+
+        _write(tmp_path, "a", "多模型集成", "新的内容：加权投票")
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        (tmp_path / "b.json").unlink()
+
+        assert store.sync_from_directory(tmp_path) == 2
+        assert store.count() == 1
+        results = store.search("加权投票", embed_fn=_no_embed, allow_ungated_lexical=True)
+        assert [r["title"] for r in results] == ["多模型集成"]
+
+
+class TestHybridSearch:
+    """Lexical answers skip embeddings; ambiguous queries fall back to vectors."""
+
+    def test_tag_lookup_needs_no_embedding(self, tmp_path, store):
+        _write(tmp_path, "r1", "归档一", "内容", entry_type="branch_archive", tags=["report_v1"])
+        _write(tmp_path, "r2", "归档二", "内容", entry_type="branch_archive", tags=["report_v2"])
+        store.sync_from_directory(tmp_path)
+
+        results = store.search(tags=["report_v2"], embed_fn=_no_embed)
+
+        assert [r["title"] for r in results] == ["归档二"]
+        assert results[0]["match"] == "metadata"
+
+    def test_exact_keyword_is_answered_lexically(self, tmp_path, store):
+        _write(tmp_path, "a", "多模型集成策略", "通过投票机制组合多个模型的输出")
+        _write(tmp_path, "b", "数据清洗", "去除训练数据中的噪声样本")
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("投票机制", limit=3, embed_fn=_no_embed, allow_ungated_lexical=True)
+
+        assert [r["title"] for r in results] == ["多模型集成策略"]
+        assert results[0]["match"] == "lexical"
+        assert set(results[0]) >= {"title", "type", "content", "tags", "score", "relevance"}
+        assert store.embedding_calls == 0
+
+    def test_short_query_uses_substring_scan(self, tmp_path, store):
+        _write(tmp_path, "a", "数据偏见", "样本分布不均")
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("偏见", embed_fn=_no_embed, allow_ungated_lexical=True)
+
+        assert [r["title"] for r in results] == ["数据偏见"]
+
+    def test_many_lexical_hits_are_reranked_by_vector(self, tmp_path, store):
+        for i, emb in enumerate([[5.0, 0.0], [0.1, 0.0], [2.0, 0.0]]):
+            _write(tmp_path, f"e{i}", f"剪枝经验{i}", "关于剪枝阈值的经验", embedding=emb)
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("剪枝阈值", limit=2, embed_fn=lambda _: [0.0, 0.0])
+
+        assert [r["title"] for r in results] == ["剪枝经验1", "剪枝经验2"]
+        assert all(r["match"] == "hybrid" for r in results)
+        assert store.embedding_calls == 1
+
+    def test_lexical_hits_are_gated_by_epsilon_by_default(self, tmp_path, store):
+        _write(tmp_path, "near", "剪枝经验", "关于剪枝阈值的经验", embedding=[0.1, 0.0])
+        _write(tmp_path, "far", "剪枝记录", "关于剪枝阈值的记录", embedding=[50.0, 0.0])
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("剪枝阈值", embed_fn=lambda _: [0.0, 0.0])
+
+        # 词法命中但距离超出 ε (默认 10.0) 的条目不应返回
+        assert [r["title"] for r in results] == ["剪枝经验"]
+        assert results[0]["match"] == "hybrid"
+        assert 0.0 < results[0]["relevance"] <= 1.0
+        assert store.search("剪枝阈值", embed_fn=lambda _: []) == []
+
+    def test_lexical_hit_outside_epsilon_does_not_hide_close_vector_row(self, tmp_path, store):
+        _write(tmp_path, "far", "剪枝记录", "关于剪枝阈值的记录", embedding=[50.0, 0.0])
+        _write(tmp_path, "close", "相近", "完全不同的措辞", embedding=[0.1, 0.0])
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("剪枝阈值", embed_fn=lambda _: [0.0, 0.0])
+
+        assert [r["title"] for r in results] == ["相近"]
+        assert results[0]["match"] == "vector"
+
+    def test_lexical_and_vector_hits_are_merged_by_distance(self, tmp_path, store):
+        _write(tmp_path, "lex", "剪枝经验", "关于剪枝阈值的经验", embedding=[1.0, 0.0])
+        _write(tmp_path, "close", "相近", "完全不同的措辞", embedding=[0.1, 0.0])
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("剪枝阈值", embed_fn=lambda _: [0.0, 0.0])
+
+        assert [(r["title"], r["match"]) for r in results] == [("相近", "vector"), ("剪枝经验", "hybrid")]
+
+    def test_no_lexical_hit_falls_back_to_vector_within_epsilon(self, tmp_path, store):
+        _write(tmp_path, "near", "相近", "完全不同的措辞", embedding=[0.1, 0.0])
+        _write(tmp_path, "far", "远离", "另一段文本", embedding=[50.0, 0.0])
+        store.sync_from_directory(tmp_path)
+
+        results = store.search(
+            "semantic paraphrase",
+            embed_fn=lambda _: [0.0, 0.0],
+            current_embeddings=[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]],
+        )
+
+        assert [r["title"] for r in results] == ["相近"]
+        assert results[0]["match"] == "vector"
+
+    def test_query_embedding_holds_a_scheduler_slot(self, tmp_path, store):
+        from src.llm_scheduler import EMBEDDING_MODEL_KEY, llm_scheduler
+
+        _write(tmp_path, "a", "相近", "完全不同的措辞", embedding=[0.1, 0.0])
+        store.sync_from_directory(tmp_path)
+        in_flight = []
+
+        def embed(_text):
+            in_flight.append(llm_scheduler.metrics()["in_flight_by_model"].get(EMBEDDING_MODEL_KEY, 0))
+            return [0.0, 0.0]
+
+        store.search("semantic paraphrase", embed_fn=embed)
+
+        assert in_flight == [1]
+
+    def test_type_filter_applies_to_lexical_hits(self, tmp_path, store):
+        _write(tmp_path, "a", "投票机制", "投票机制细节", entry_type="success_pattern")
+        _write(tmp_path, "b", "投票机制", "投票机制细节", entry_type="lesson_learned")
+        store.sync_from_directory(tmp_path)
+
+        results = store.search("投票机制", experience_type="lesson_learned", embed_fn=_no_embed, allow_ungated_lexical=True)
+
+        assert [r["type"] for r in results] == ["lesson_learned"]
+
+
+class TestSearchTool:
+    """search_experiences routes through the SQLite index by default."""
+
+    def test_tool_uses_hybrid_backend(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+        monkeypatch.setenv("KB_INDEX_PATH", str(tmp_path / "tool_index.sqlite3"))
+        _write(tmp_path, "a", "多模型集成", "投票机制", tags=["report_v3"])
+
+        from src.tools.knowledge_base import search_experiences
+
+        result = search_experiences.invoke({"query": "", "tags": ["report_v3"]})
+
+        assert json.loads(result)[0]["title"] == "多模型集成"
+        assert (tmp_path / "tool_index.sqlite3").exists()
@@ -0,0 +1,111 @@
+"""
+Tests for the knowledge-base write-behind queue used during hard pruning.
+"""
+
+import json
+
+import pytest
+
+
+@pytest.fixture
+def kb_env(tmp_path, monkeypatch):
+    from src import embedding_client
+
+    monkeypatch.setenv("KNOWLEDGE_BASE_PATH", str(tmp_path))
+    calls = []
+
+    def _fake_embed_texts(documents):
+        calls.append(list(documents))
+        return [[float(i), 0.5] for i, _ in enumerate(documents)]
+
+    monkeypatch.setattr(embedding_client, "embed_texts", _fake_embed_texts)
+    return tmp_path, calls
+
+
+class TestWriteBehindQueue:
+    """Archive writes are deferred, batched and flushed on drain()."""
+
+    def test_pruned_beam_is_embedded_in_one_batch(self, kb_env):
+        from src.tools.kb_write_queue import KnowledgeBaseWriteQueue
+
+        kb_path, calls = kb_env
+        write_queue = KnowledgeBaseWriteQueue(batch_size=64, flush_interval=0.2)
+
+        for i in range(20):
+            result = write_queue.enqueue_strategy_archive(
+                strategy={"id": f"s{i}", "name": f"策略{i}", "score": 0.5},
+                synthesis_context="在报告 v1 中被综合",
+                branch_rationale="测试分支",
+                report_version=1,
+            )
+            assert "queued" in result
+
+        assert write_queue.drain(timeout=10)
+
+        files = list(kb_path.glob("*.json"))
+        assert len(files) == 20
+        assert len(calls) == 1
+        assert len(calls[0]) == 20
+
+        archive = json.loads(files[0].read_text(encoding="utf-8"))
+        assert archive["type"] == "branch_archive"
+        assert "report_v1" in archive["tags"]
+        assert len(archive["embedding"]) == 2
+        assert write_queue.written == 20
+
+    def test_enqueue_experience_validates_type(self, kb_env):
+        from src.tools.kb_write_queue import KnowledgeBaseWriteQueue
+
+        write_queue = KnowledgeBaseWriteQueue()
+        result = write_queue.enqueue_experience({
+            "title": "t", "content": "c", "experience_type": "bogus",
+        })
+
+        assert result.startswith("Error")
+        assert write_queue.pending == 0
+
+    def test_enqueue_experience_writes_record(self, kb_env):
+        from src.tools.kb_write_queue import KnowledgeBaseWriteQueue
+
+        kb_path, _ = kb_env
+        write_queue = KnowledgeBaseWriteQueue(flush_interval=0.01)
+        write_queue.enqueue_experience({
+            "title": "元洞见", "content": "内容", "experience_type": "meta_insight", "tags": ["x"],
+        })
+
+        assert write_queue.drain(timeout=10)
+        (path,) = kb_path.glob("*.json")
+        record = json.loads(path.read_text(encoding="utf-8"))
+        assert record["type"] == "meta_insight"
+        assert record["tags"] == ["x"]
+        assert "embedding" in record
+
+    def test_drain_on_empty_queue_returns_immediately(self):
+        from src.tools.kb_write_queue import KnowledgeBaseWriteQueue
+
+        assert KnowledgeBaseWriteQueue().drain(timeout=0.1)
+
+    def test_drain_is_bounded_when_the_writer_is_stuck(self, kb_env, monkeypatch):
+        import inspect
+        import threading
+
+        from src import embedding_client
+        from src.tools.kb_write_queue import DEFAULT_DRAIN_TIMEOUT_SECONDS, KnowledgeBaseWriteQueue
+
+        # 默认带超时：运行结束时的 drain() 不会无限期阻塞
+        assert inspect.signature(KnowledgeBaseWriteQueue.drain).parameters["timeout"].default == DEFAULT_DRAIN_TIMEOUT_SECONDS
+
+        release = threading.Event()
+
+        def _stuck_embed_texts(documents):
+            release.wait(10)
+            return [[0.0] for _ in documents]
+
+        monkeypatch.setattr(embedding_client, "embed_texts", _stuck_embed_texts)
+        write_queue = KnowledgeBaseWriteQueue(flush_interval=0.01)
+        write_queue.enqueue_experience({"title": "t", "content": "c", "experience_type": "meta_insight"})
+
+        assert not write_queue.drain(timeout=0.05)
+        assert write_queue.pending == 1
+        release.set()
+        assert write_queue.drain(timeout=10)
@@ -0,0 +1,232 @@
+"""
+Tests for the record / replay LLM response cache.
+"""
+
+import pytest
+
+
+def _response(text):
+    from google.genai import types
+
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=[types.Part(text=text)]))]
+    )
+
+
+class FakeModels:
+    """Stands in for genai ``client.aio.models``; counts network calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, *, model, contents, config=None):
+        self.calls += 1
+        return _response(f"answer {self.calls}")
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        self.calls += 1
+
+        async def stream():
+            for part in ("a", "b", "c"):
+                yield _response(part)
+
+        return stream()
+
+
+class FakeClient:
+    def __init__(self):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = FakeModels()
+        self.models = None
+        self.api_key = "k"
+
+
+def _client(tmp_path, mode):
+    from src.llm_cache import LLMCache
+
+    cache = LLMCache(mode, str(tmp_path / "cache.sqlite3"))
+    raw = FakeClient()
+    return cache, raw, cache.wrap_genai_client(raw)
+
+
+class TestGenaiClient:
+    """generate_content / generate_content_stream are recorded and replayed."""
+
+    async def test_record_then_replay_offline(self, tmp_path):
+        from google.genai import types
+
+        config = types.GenerateContentConfig(temperature=0.2)
+        _, raw, client = _client(tmp_path, "record")
+        live = await client.aio.models.generate_content(model="m", contents="p", config=config)
+        assert live.text == "answer 1"
+
+        cache, raw, client = _client(tmp_path, "replay")
+        replayed = await client.aio.models.generate_content(model="m", contents="p", config=config)
+        assert replayed.text == "answer 1"
+        assert raw.aio.models.calls == 0
+        assert client.api_key == "k"  # 其他属性透传
+        assert cache.stats()["hits"] == 1
+
+    async def test_replay_miss_raises_without_network(self, tmp_path):
+        from src.llm_cache import LLMCacheMiss
+        from src.llm_call_policy import ERROR_FATAL, classify_error
+
+        _, raw, client = _client(tmp_path, "replay")
+        with pytest.raises(LLMCacheMiss) as info:
+            await client.aio.models.generate_content(model="m", contents="unseen")
+        assert raw.aio.models.calls == 0
+        assert classify_error(info.value) == ERROR_FATAL  # 不会被重试
+
+    async def test_key_covers_model_config_and_prompt(self, tmp_path):
+        from google.genai import types
+
+        _, raw, client = _client(tmp_path, "read_through")
+        models = client.aio.models
+        await models.generate_content(model="m", contents="p")
+        await models.generate_content(model="m", contents="p")
+        assert raw.aio.models.calls == 1
+        await models.generate_content(model="other", contents="p")
+        await models.generate_content(model="m", contents="p2")
+        await models.generate_content(model="m", contents="p", config=types.GenerateContentConfig(temperature=0))
+        assert raw.aio.models.calls == 4
+
+    async def test_record_mode_always_calls_model(self, tmp_path):
+        _, raw, client = _client(tmp_path, "record")
+        first = await client.aio.models.generate_content(model="m", contents="p")
+        second = await client.aio.models.generate_content(model="m", contents="p")
+        assert raw.aio.models.calls == 2
+        assert (first.text, second.text) == ("answer 1", "answer 2")
+
+        _, _, client = _client(tmp_path, "replay")
+        assert (await client.aio.models.generate_content(model="m", contents="p")).text == "answer 2"
+
+    async def test_stream_chunks_are_replayed(self, tmp_path):
+        _, _, client = _client(tmp_path, "record")
+        stream = await client.aio.models.generate_content_stream(model="m", contents="p")
+        assert [chunk.text async for chunk in stream] == ["a", "b", "c"]
+
+        _, raw, client = _client(tmp_path, "replay")
+        stream = await client.aio.models.generate_content_stream(model="m", contents="p")
+        assert [chunk.text async for chunk in stream] == ["a", "b", "c"]
+        assert raw.aio.models.calls == 0
+
+    def test_off_mode_returns_client_unchanged(self, tmp_path):
+        cache, raw, client = _client(tmp_path, "off")
+        assert client is raw
+        assert cache.langchain_cache() is None
+
+
+class TestLangChainCache:
+    """Chat model generations (including tool calls) survive the store."""
+
+    def test_chat_generation_round_trip(self, tmp_path):
+        from langchain_core.messages import AIMessage
+        from langchain_core.outputs import ChatGeneration
+
+        from src.llm_cache import LLMCache, LLMCacheMiss
+
+        message = AIMessage(content="", tool_calls=[{"name": "score", "args": {"value": 7}, "id": "t1"}])
+        LLMCache("record", str(tmp_path / "c.sqlite3")).langchain_cache().update(
+            "prompt", "llm", [ChatGeneration(message=message)]
+        )
+
+        cache = LLMCache("replay", str(tmp_path / "c.sqlite3")).langchain_cache()
+        [generation] = cache.lookup("prompt", "llm")
+        assert generation.message.tool_calls[0]["args"] == {"value": 7}
+        with pytest.raises(LLMCacheMiss):
+            cache.lookup("prompt", "other-llm")
+
+    def test_chat_model_uses_cache(self, tmp_path):
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+        from src.llm_cache import LLMCache
+
+        cache = LLMCache("read_through", str(tmp_path / "c.sqlite3")).langchain_cache()
+        model = FakeListChatModel(responses=["first", "second"], cache=cache)
+        assert model.invoke("hi").content == "first"
+        assert model.invoke("hi").content == "first"
+        assert model.invoke("other").content == "second"
+
+    def test_invalid_env_mode_disables_cache(self, monkeypatch):
+        from src.llm_cache import LLMCache
+
+        monkeypatch.setenv("LLM_CACHE_MODE", "bogus")
+        assert not LLMCache.from_env().enabled
+
+
+class TestRunIds:
+    """Run-random uuid4 ids do not change the key and are re-mapped on replay."""
+
+    def test_key_ignores_uuids_and_prefixes(self):
+        from src.llm_cache import request_key
+
+        a, b = "1a2b3c4d-0000-4000-8000-000000000001", "9f8e7d6c-0000-4000-8000-000000000002"
+        assert request_key("generate", "m", f"[{a[:8]}...] x {a}") == request_key("generate", "m", f"[{b[:8]}...] x {b}")
+        # 顺序不同 (两个 id 对调) 是不同的请求
+        assert request_key("generate", "m", f"{a} {b}") == request_key("generate", "m", f"{b} {a}")
+        assert request_key("generate", "m", f"{a} {a}") != request_key("generate", "m", f"{a} {b}")
+        # 普通的 8 位数字不是 id
+        assert request_key("generate", "m", "12345678") != request_key("generate", "m", "87654321")
+
+    def test_response_ids_follow_the_current_run(self):
+        from src.llm_cache import RunIds
+
+        recorded, current = RunIds(), RunIds()
+        recorded.normalise("[1a2b3c4d...] 5e6f7a8b-0000-4000-8000-000000000000")
+        current.normalise("[aaaabbbb...] ccccdddd-0000-4000-8000-000000000000")
+        payload = recorded.mask({"text": "1a2b3c4d / 5e6f7a8b-0000-4000-8000-000000000000 / 5e6f7a8b"})
+        assert current.unmask(payload) == {"text": "aaaabbbb / ccccdddd-0000-4000-8000-000000000000 / ccccdddd"}
+
+
+class TestArchitectReplay:
+    """An Architect call recorded in one run is replayed in the next (new strategy ids)."""
+
+    @staticmethod
+    def _state():
+        import uuid
+
+        strategies = [
+            {"id": str(uuid.uuid4()), "name": f"s{i}", "rationale": "r", "assumption": "a", "status": "active",
+             "score": 0.5, "ucb_score": 0.5 - i / 10, "child_quota": 1, "trajectory": []}
+            for i in range(2)
+        ]
+        return {"problem_state": "p", "strategies": strategies, "history": [], "config": {}}
+
+    async def _run(self, monkeypatch, tmp_path, mode, fake):
+        from src.agents.architect import architect_scheduler_node_async
+        from src.llm_cache import LLMCache
+        from src.llm_clients import llm_clients
+
+        cache = LLMCache(mode, str(tmp_path / "cache.sqlite3"))
+        monkeypatch.setattr(
+            llm_clients, "get_genai_client", lambda api_key, http_options=None: cache.wrap_genai_client(fake.genai_client())
+        )
+        state = self._state()
+        result = await architect_scheduler_node_async(state)
+        return state["strategies"], result["architect_decisions"]
+
+    async def test_record_then_replay_across_runs(self, monkeypatch, tmp_path):
+        from src.fake_llm import FakeLLM
+
+        monkeypatch.setenv("GEMINI_API_KEY", "offline")
+        monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+        fake = FakeLLM(latency=0, seed=1)
+
+        strategies, decisions = await self._run(monkeypatch, tmp_path, "record", fake)
+        ids = [s["id"] for s in strategies]
+        assert [d["strategy_id"] for d in decisions][:2] == ids
+
+        strategies, replayed = await self._run(monkeypatch, tmp_path, "replay", fake)
+        assert fake.metrics()["agents"]["architect"]["calls"] == 1
+        # 回放的决策指向本次运行的策略，而不是录制时的 id
+        assert [d["strategy_id"] for d in replayed][:2] == [s["id"] for s in strategies]
+        assert [d["executor_instruction"] for d in replayed] == [d["executor_instruction"] for d in decisions]
+
+    async def test_replay_miss_is_not_swallowed_by_fallback(self, monkeypatch, tmp_path):
+        from src.fake_llm import FakeLLM
+        from src.llm_cache import LLMCacheMiss
+
+        monkeypatch.setenv("GEMINI_API_KEY", "offline")
+        monkeypatch.setenv("USE_MOCK_AGENTS", "false")
+        with pytest.raises(LLMCacheMiss):
+            await self._run(monkeypatch, tmp_path, "replay", FakeLLM(latency=0))
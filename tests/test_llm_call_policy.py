@@ -0,0 +1,297 @@
+"""
+Tests for per-call LLM deadlines, budgeted hedging, retries and circuit breakers.
+"""
+
+import asyncio
+
+import pytest
+
+
+def _warm(policy, agent, latency=0.01, calls=20):
+    """Seed the latency history so hedging becomes eligible."""
+    for _ in range(calls):
+        policy._agent_stats(agent).calls += 1
+        policy._record(agent, latency)
+
+
+class TestDeadline:
+    """Calls that miss their deadline are cancelled and raise LLMDeadlineExceeded."""
+
+    async def test_timeout_cancels_request(self):
+        from src.llm_call_policy import LLMCallPolicy, LLMDeadlineExceeded
+
+        policy = LLMCallPolicy(timeout=0.05)
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(LLMDeadlineExceeded):
+            await policy.call("executor", "m", slow)
+        await asyncio.sleep(0)
+        assert cancelled.is_set()
+        assert policy.metrics()["agents"]["executor"]["timeouts"] == 1
+
+    async def test_per_agent_timeout_and_disable(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(timeout=0, agent_timeouts={"propagation": 30})
+        assert policy.timeout_for("executor") is None
+        assert policy.timeout_for("propagation") == 30
+
+    async def test_errors_propagate(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(timeout=1)
+
+        async def boom():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await policy.call("judge", "m", boom)
+        assert policy.metrics()["agents"]["judge"]["errors"] == 1
+
+
+class TestHedging:
+    """A duplicate request is fired after the latency percentile, within budget."""
+
+    async def test_hedge_wins_when_primary_stalls(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(timeout=2, hedging=True, hedge_budget=0.5)
+        _warm(policy, "propagation")
+        attempts = []
+
+        async def request():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                await asyncio.sleep(5)  # 首个请求卡住
+            return f"attempt-{len(attempts)}"
+
+        result = await policy.call("propagation", "m", request)
+        assert result == "attempt-2"
+        stats = policy.metrics()["agents"]["propagation"]
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+    async def test_no_hedge_without_history_or_when_disabled(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        assert LLMCallPolicy(hedging=True).hedge_delay("executor") is None
+        policy = LLMCallPolicy(hedging=False)
+        _warm(policy, "executor")
+        assert policy.hedge_delay("executor") is None
+
+    async def test_budget_caps_hedges(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(timeout=2, hedging=True, hedge_budget=0.1)
+        _warm(policy, "executor", calls=10)
+        started = []
+
+        async def request():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        for _ in range(5):
+            assert await policy.call("executor", "m", request) == "ok"
+        # 15 次调用 * 0.1 预算 => 最多 1 次对冲
+        assert policy.metrics()["agents"]["executor"]["hedges"] == 1
+        assert len(started) == 6
+
+    async def test_streaming_calls_are_not_hedged(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(timeout=2, hedging=True, hedge_budget=1.0)
+        _warm(policy, "executor")
+        started = []
+
+        async def request():
+            started.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        await policy.call("executor", "m", request, hedge=False)
+        assert len(started) == 1
+
+
+class TestParsing:
+    def test_parse_agent_values(self):
+        from src.llm_call_policy import parse_agent_values
+
+        assert parse_agent_values("executor=300, judge=0.5,bad,x=y") == {"executor": 300.0, "judge": 0.5}
+        assert parse_agent_values(None) == {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+def _retrying_policy(**kwargs):
+    from src.llm_call_policy import LLMCallPolicy
+
+    return LLMCallPolicy(timeout=1, retry_base_delay=0, retry_max_delay=0, **kwargs)
+
+
+class TestRetry:
+    """Transient failures are retried with backoff; request errors are not."""
+
+    def test_classify_error(self):
+        from src.llm_call_policy import (
+            ERROR_FATAL, ERROR_RETRYABLE, ERROR_TIMEOUT, LLMDeadlineExceeded, classify_error,
+        )
+
+        assert classify_error(FakeAPIError(429)) == ERROR_RETRYABLE
+        assert classify_error(FakeAPIError(503)) == ERROR_RETRYABLE
+        assert classify_error(FakeAPIError(400)) == ERROR_FATAL
+        assert classify_error(RuntimeError("429 RESOURCE_EXHAUSTED: quota")) == ERROR_RETRYABLE
+        assert classify_error(ValueError("bad json")) == ERROR_FATAL
+        assert classify_error(LLMDeadlineExceeded("slow")) == ERROR_TIMEOUT
+
+        wrapped = RuntimeError("langchain wrapper")
+        wrapped.__cause__ = FakeAPIError(429)
+        assert classify_error(wrapped) == ERROR_RETRYABLE
+
+    async def test_transient_error_is_retried(self):
+        policy = _retrying_policy(max_retries=3)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise FakeAPIError(429)
+            return "ok"
+
+        assert await policy.call("judge", "m", flaky) == "ok"
+        assert len(attempts) == 3
+        assert policy.metrics()["agents"]["judge"]["retries"] == 2
+
+    async def test_retries_exhausted_raise_unavailable(self):
+        from src.llm_call_policy import LLMUnavailableError
+
+        policy = _retrying_policy(max_retries=2)
+        attempts = []
+
+        async def always_429():
+            attempts.append(1)
+            raise FakeAPIError(429)
+
+        with pytest.raises(LLMUnavailableError) as info:
+            await policy.call("researcher", "m", always_429)
+        assert len(attempts) == 3
+        assert isinstance(info.value.__cause__, FakeAPIError)
+
+    async def test_fatal_error_is_not_retried(self):
+        policy = _retrying_policy(max_retries=3)
+        attempts = []
+
+        async def bad_request():
+            attempts.append(1)
+            raise FakeAPIError(400)
+
+        with pytest.raises(FakeAPIError):
+            await policy.call("architect", "m", bad_request)
+        assert len(attempts) == 1
+
+    async def test_partial_stream_is_not_retried(self):
+        from src.llm_call_policy import LLMPartialOutputError
+
+        policy = _retrying_policy(max_retries=3)
+        attempts = []
+
+        async def broken_stream():
+            attempts.append(1)
+            raise LLMPartialOutputError("stream cut") from FakeAPIError(503)
+
+        with pytest.raises(LLMPartialOutputError):
+            await policy.call("executor", "m", broken_stream, hedge=False)
+        assert len(attempts) == 1
+
+    def test_backoff_is_jittered_and_capped(self):
+        from src.llm_call_policy import LLMCallPolicy
+
+        policy = LLMCallPolicy(retry_base_delay=1.0, retry_max_delay=4.0)
+        delays = [policy.backoff_delay(attempt) for attempt in range(10) for _ in range(20)]
+        assert all(0 <= d <= 4.0 for d in delays)
+        assert len(set(delays)) > 1
+
+
+class TestCircuitBreaker:
+    """Consecutive transient failures open a per-model breaker that fails fast."""
+
+    async def test_breaker_opens_and_recovers(self):
+        from src.llm_call_policy import LLMCircuitOpenError, LLMUnavailableError
+
+        policy = _retrying_policy(max_retries=0, breaker_threshold=2, breaker_cooldown=0.05)
+        attempts = []
+
+        async def down():
+            attempts.append(1)
+            raise FakeAPIError(503)
+
+        for _ in range(2):
+            with pytest.raises(LLMUnavailableError):
+                await policy.call("judge", "flash", down)
+        assert policy.metrics()["breakers"]["flash"]["state"] == "open"
+
+        with pytest.raises(LLMCircuitOpenError):
+            await policy.call("judge", "flash", down)
+        assert len(attempts) == 2  # 熔断期间不发请求
+
+        # 其他模型不受影响
+        async def ok():
+            return "ok"
+
+        assert await policy.call("judge", "pro", ok) == "ok"
+
+        await asyncio.sleep(0.06)
+        assert policy.metrics()["breakers"]["flash"]["state"] == "half_open"
+        assert await policy.call("judge", "flash", ok) == "ok"
+        assert policy.metrics()["breakers"]["flash"]["state"] == "closed"
+
+    async def test_failed_trial_reopens(self):
+        from src.llm_call_policy import LLMUnavailableError
+
+        policy = _retrying_policy(max_retries=0, breaker_threshold=1, breaker_cooldown=0.02)
+
+        async def down():
+            raise FakeAPIError(429)
+
+        with pytest.raises(LLMUnavailableError):
+            await policy.call("judge", "m", down)
+        await asyncio.sleep(0.03)
+        with pytest.raises(LLMUnavailableError):
+            await policy.call("judge", "m", down)  # 半开试探失败
+        breaker = policy.metrics()["breakers"]["m"]
+        assert breaker["state"] == "open" and breaker["trips"] == 2
+
+    async def test_cancelled_trial_releases_half_open_slot(self):
+        from src.llm_call_policy import LLMUnavailableError
+
+        policy = _retrying_policy(max_retries=0, breaker_threshold=1, breaker_cooldown=0.02)
+
+        async def down():
+            raise FakeAPIError(503)
+
+        with pytest.raises(LLMUnavailableError):
+            await policy.call("judge", "m", down)
+        await asyncio.sleep(0.03)
+
+        # 半开试探在返回前被取消 (例如停止模拟)
+        trial = asyncio.ensure_future(policy.call("judge", "m", lambda: asyncio.sleep(5)))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        async def ok():
+            return "ok"
+
+        assert await policy.call("judge", "m", ok) == "ok"
+        assert policy.metrics()["breakers"]["m"]["state"] == "closed"
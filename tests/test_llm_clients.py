@@ -0,0 +1,113 @@
+"""
+Tests for the process-wide LLM client registry and the shared background loop.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+
+class FakeClient:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    from src import llm_clients as llm_clients_module
+
+    monkeypatch.setattr(llm_clients_module, "ChatGoogleGenerativeAI", FakeClient)
+    monkeypatch.setattr(llm_clients_module.genai, "Client", FakeClient)
+    return llm_clients_module.LLMClientRegistry(max_clients=2)
+
+
+class TestLLMClientRegistry:
+    """Clients are created once per (model, config) and reused afterwards."""
+
+    def test_same_config_reuses_chat_model(self, registry):
+        first = registry.get_chat_model("gemini-x", "key", temperature=1.0, generation_config={"a": 1})
+        second = registry.get_chat_model("gemini-x", "key", temperature=1.0, generation_config={"a": 1})
+
+        assert first is second
+        assert first.kwargs["google_api_key"] == "key"
+        assert first.kwargs["generation_config"] == {"a": 1}
+        assert (registry.created, registry.hits) == (1, 1)
+
+    def test_different_config_creates_new_client(self, registry):
+        base = registry.get_chat_model("gemini-x", "key")
+
+        assert registry.get_chat_model("gemini-x", "key", temperature=0.7) is not base
+        assert registry.get_chat_model("gemini-y", "key") is not base
+        assert registry.get_genai_client("key") is registry.get_genai_client("key")
+
+    def test_least_recently_used_client_is_evicted(self, registry):
+        a = registry.get_genai_client("a")
+        registry.get_genai_client("b")
+        registry.get_genai_client("a")  # refresh "a"
+        registry.get_genai_client("c")  # evicts "b"
+
+        assert len(registry) == 2
+        assert registry.get_genai_client("a") is a
+        created = registry.created
+        registry.get_genai_client("b")
+        assert registry.created == created + 1
+
+    def test_api_key_is_not_stored_in_cache_keys(self, registry):
+        registry.get_genai_client("secret-key")
+
+        assert all("secret-key" not in part for key in registry._clients for part in key)
+
+
+class TestBackgroundLoop:
+    """run_coroutine_sync always executes on the shared background loop."""
+
+    def test_runs_on_single_background_loop(self):
+        from src.core.async_helper import get_background_loop, run_coroutine_sync
+
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        loops = {run_coroutine_sync(current_loop()) for _ in range(3)}
+        assert loops == {get_background_loop()}
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(run_coroutine_sync(current_loop())))
+        thread.start()
+        thread.join()
+        assert results == [get_background_loop()]
+
+    async def test_callable_from_running_loop(self):
+        from src.core.async_helper import run_coroutine_sync
+
+        async def value():
+            return 42
+
+        assert run_coroutine_sync(value()) == 42
+
+
+class TestLoopScopedClients:
+    """Async connection pools are never shared between event loops."""
+
+    def test_clients_are_cached_per_event_loop(self, registry):
+        async def get():
+            return registry.get_genai_client("key")
+
+        def in_new_loop():
+            loop = asyncio.new_event_loop()
+            try:
+                return loop.run_until_complete(get())
+            finally:
+                loop.close()
+
+        first = in_new_loop()
+        second = in_new_loop()
+        loop = asyncio.new_event_loop()
+        try:
+            third = loop.run_until_complete(get())
+            assert loop.run_until_complete(get()) is third
+        finally:
+            loop.close()
+
+        assert first is not second
+        assert registry.get_genai_client("key") is registry.get_genai_client("key")
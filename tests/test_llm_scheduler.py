@@ -0,0 +1,146 @@
+"""
+Tests for the global LLM concurrency governor / priority scheduler.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def scheduler():
+    from src.llm_scheduler import LLMScheduler
+
+    return LLMScheduler(max_concurrency=1, model_limits={"slow": 1})
+
+
+async def _hold(scheduler, log, label, model="m", priority=None, tenant=None, seconds=0.01):
+    async with scheduler.aslot(model, priority=priority, tenant=tenant):
+        log.append(label)
+        await asyncio.sleep(seconds)
+
+
+class TestAdmission:
+    """Global and per-model limits cap the number of in-flight calls."""
+
+    async def test_global_limit(self):
+        from src.llm_scheduler import LLMScheduler
+
+        scheduler = LLMScheduler(max_concurrency=2)
+        peak = {"now": 0, "max": 0}
+
+        async def call():
+            async with scheduler.aslot("m"):
+                peak["now"] += 1
+                peak["max"] = max(peak["max"], peak["now"])
+                await asyncio.sleep(0.01)
+                peak["now"] -= 1
+
+        await asyncio.gather(*(call() for _ in range(6)))
+
+        assert peak["max"] == 2
+        metrics = scheduler.metrics()
+        assert metrics["in_flight"] == 0
+        assert metrics["waits"]["background"]["granted"] == 6
+
+    async def test_per_model_limit_does_not_block_other_models(self):
+        from src.llm_scheduler import LLMScheduler
+
+        scheduler = LLMScheduler(max_concurrency=4, model_limits={"slow": 1})
+        log = []
+        holder = asyncio.create_task(_hold(scheduler, log, "slow-1", model="slow", seconds=0.05))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(_hold(scheduler, log, "slow-2", model="slow"))
+        fast = asyncio.create_task(_hold(scheduler, log, "fast", model="fast"))
+        await asyncio.sleep(0.02)
+
+        assert log == ["slow-1", "fast"]
+        assert scheduler.metrics()["queue_depth"]["background"] == 1
+        await asyncio.gather(holder, queued, fast)
+        assert log[-1] == "slow-2"
+
+    def test_sync_and_async_callers_share_slots(self, scheduler):
+        log = []
+
+        def sync_call():
+            with scheduler.slot("m"):
+                log.append("sync")
+                time.sleep(0.02)
+
+        thread = threading.Thread(target=sync_call)
+        thread.start()
+        time.sleep(0.005)
+
+        async def main():
+            await _hold(scheduler, log, "async")
+
+        asyncio.run(main())
+        thread.join()
+
+        assert log == ["sync", "async"]
+
+
+class TestPriorityAndFairness:
+    """Interactive calls jump the queue; tenants are served round-robin."""
+
+    async def test_interactive_jumps_background_queue(self, scheduler):
+        from src.llm_scheduler import PRIORITY_INTERACTIVE
+
+        log = []
+        holder = asyncio.create_task(_hold(scheduler, log, "running", seconds=0.02))
+        await asyncio.sleep(0)
+        background = [asyncio.create_task(_hold(scheduler, log, f"bg{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(_hold(scheduler, log, "chat", priority=PRIORITY_INTERACTIVE))
+
+        await asyncio.gather(holder, chat, *background)
+
+        assert log[:2] == ["running", "chat"]
+
+    async def test_tenants_are_served_round_robin(self, scheduler):
+        log = []
+        holder = asyncio.create_task(_hold(scheduler, log, "running", seconds=0.02))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(_hold(scheduler, log, f"a{i}", tenant="sim-a")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(_hold(scheduler, log, f"b{i}", tenant="sim-b")) for i in range(2)]
+        await asyncio.sleep(0.005)
+
+        assert scheduler.metrics()["queue_depth_by_tenant"]["background"] == {"sim-a": 3, "sim-b": 2}
+        await asyncio.gather(holder, *tasks)
+
+        assert log == ["running", "a0", "b0", "a1", "b1", "a2"]
+
+    async def test_context_sets_defaults_for_spawned_tasks(self, scheduler):
+        from src.llm_scheduler import PRIORITY_INTERACTIVE
+
+        with scheduler.context(priority=PRIORITY_INTERACTIVE, tenant="chat"):
+            task = asyncio.create_task(_hold(scheduler, [], "x"))
+        await task
+
+        assert scheduler.metrics()["waits"]["interactive"]["granted"] == 1
+
+    async def test_cancelled_waiter_leaves_queue(self, scheduler):
+        log = []
+        holder = asyncio.create_task(_hold(scheduler, log, "running", seconds=0.02))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(scheduler, log, "cancelled"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await holder
+
+        metrics = scheduler.metrics()
+        assert log == ["running"]
+        assert metrics["in_flight"] == 0 and metrics["queue_depth"]["background"] == 0
+
+
+class TestConfiguration:
+    def test_parse_model_limits(self):
+        from src.llm_scheduler import parse_model_limits
+
+        assert parse_model_limits("a=2, b=0,broken,c=x") == {"a": 2, "b": 1}
+        assert parse_model_limits(None) == {}
@@ -0,0 +1,53 @@
+"""
+Tests for the thread-safe progress reporter used for streamed node output.
+"""
+
+import asyncio
+import threading
+
+
+class TestProgressReporter:
+    """Events emitted from worker threads reach the broadcast loop, coalesced."""
+
+    def test_disabled_reporter_is_a_no_op(self):
+        from src.core.progress import ProgressReporter
+
+        reporter = ProgressReporter()
+        stream = reporter.stream("executor_progress", {"task_id": "t"})
+        stream.write("text")
+        stream.close()
+
+        assert reporter.enabled is False
+
+    def test_stream_coalesces_deltas_from_worker_thread(self):
+        from src.core.progress import ProgressReporter
+
+        reporter = ProgressReporter()
+        messages = []
+
+        async def run():
+            async def broadcast(message):
+                messages.append(message)
+
+            reporter.set_broadcast_func(broadcast)
+
+            def worker():
+                stream = reporter.stream("executor_progress", {"task_id": "t"})
+                stream.flush_interval = 60
+                stream.flush_chars = 10
+                for piece in ["abc", "def", "ghij", "kl"]:
+                    stream.write(piece)
+                stream.close()
+                stream.write("ignored after close")
+
+            thread = threading.Thread(target=worker)
+            thread.start()
+            await asyncio.to_thread(thread.join)
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+
+        assert [m["data"]["delta"] for m in messages] == ["abcdefghij", "kl"]
+        assert [m["data"]["done"] for m in messages] == [False, True]
+        assert messages[-1]["data"]["text_length"] == 12
+        assert messages[-1]["data"]["task_id"] == "t"
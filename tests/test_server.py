@@ -48,3 +48,136 @@ def test_websocket_snapshot_and_updates(tmp_path, monkeypatch):
         delete_event = websocket.receive_json()
         assert delete_event["type"] == "delete"
         assert delete_event["data"]["id"] == "alpha"
+
+
+def _write_reflections(knowledge_dir, count):
+    for i in range(count):
+        payload = {
+            "id": f"r{i:02d}",
+            "thread_label": f"Thread {i}",
+            "outcome": "success",
+            "created_at": f"2026-01-01T00:00:{i:02d}+00:00",
+            "reflection": "x" * 1000,
+            "embedding": [0.1] * 16,
+        }
+        (knowledge_dir / f"r{i:02d}.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_websocket_snapshot_is_paginated_summary(tmp_path, monkeypatch):
+    knowledge_dir = tmp_path / "knowledge_base"
+    knowledge_dir.mkdir()
+    monkeypatch.setattr(server, "KNOWLEDGE_BASE_DIR", knowledge_dir)
+    monkeypatch.setattr(server, "POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(server, "SNAPSHOT_PAGE_SIZE", 3)
+    monkeypatch.setattr(server, "_list_reflection_files", lambda: sorted(knowledge_dir.glob("*.json")))
+    server.reflection_cache.clear()
+    _write_reflections(knowledge_dir, 5)
+
+    client = TestClient(server.app)
+    with client.websocket_connect("/ws/knowledge_base") as websocket:
+        snapshot = websocket.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["total"] == 5
+        assert [entry["id"] for entry in snapshot["data"]] == ["r04", "r03", "r02"]
+        first = snapshot["data"][0]
+        assert "embedding_preview" not in first
+        assert first["reflection_truncated"] is True
+        assert len(first["reflection"]) == server.REFLECTION_EXCERPT_CHARS
+
+        websocket.send_json({"type": "page", "cursor": snapshot["next_cursor"]})
+        page = websocket.receive_json()
+        assert page["type"] == "page"
+        assert [entry["id"] for entry in page["data"]] == ["r01", "r00"]
+        assert page["next_cursor"] is None
+
+        websocket.send_json({"type": "detail", "id": "r03"})
+        detail = websocket.receive_json()
+        assert detail["type"] == "detail"
+        assert len(detail["data"]["reflection"]) == 1000
+        assert detail["data"]["embedding_preview"] == [0.1] * 8
+
+
+def test_reflection_cache_reuses_parsed_payloads(tmp_path, monkeypatch):
+    knowledge_dir = tmp_path / "knowledge_base"
+    knowledge_dir.mkdir()
+    _write_reflections(knowledge_dir, 2)
+
+    parsed = []
+    original = server._collect_reflection_payload
+
+    def _counting_collect(path):
+        parsed.append(path.stem)
+        return original(path)
+
+    monkeypatch.setattr(server, "_collect_reflection_payload", _counting_collect)
+    cache = server.ReflectionPayloadCache()
+    paths = sorted(knowledge_dir.glob("*.json"))
+
+    cache.scan(paths)
+    cache.scan(paths)
+    assert parsed == ["r00", "r01"]
+
+    paths[0].unlink()
+    assert [p["id"] for p in cache.scan(paths[1:])] == ["r01"]
+    assert cache.detail("r00") is None
+
+
+def test_knowledge_base_entries_endpoint(tmp_path, monkeypatch):
+    knowledge_dir = tmp_path / "knowledge_base"
+    knowledge_dir.mkdir()
+    monkeypatch.setattr(server, "KNOWLEDGE_BASE_DIR", knowledge_dir)
+    monkeypatch.setattr(server, "_list_reflection_files", lambda: sorted(knowledge_dir.glob("*.json")))
+    server.reflection_cache.clear()
+    _write_reflections(knowledge_dir, 3)
+
+    client = TestClient(server.app)
+    listing = client.get("/api/knowledge_base/entries", params={"limit": 2}).json()
+    assert [entry["id"] for entry in listing["data"]] == ["r02", "r01"]
+    rest = client.get("/api/knowledge_base/entries", params={"cursor": listing["next_cursor"]}).json()
+    assert [entry["id"] for entry in rest["data"]] == ["r00"]
+
+    assert client.get("/api/knowledge_base/entries/r01").json()["id"] == "r01"
+    assert client.get("/api/knowledge_base/entries/missing").status_code == 404
+
+
+def test_websocket_clients_share_one_watcher(tmp_path, monkeypatch):
+    knowledge_dir = tmp_path / "knowledge_base"
+    knowledge_dir.mkdir()
+    monkeypatch.setattr(server, "KNOWLEDGE_BASE_DIR", knowledge_dir)
+    monkeypatch.setattr(server, "POLL_INTERVAL_SECONDS", 0.01)
+    monkeypatch.setattr(server, "_list_reflection_files", lambda: sorted(knowledge_dir.glob("*.json")))
+    server.reflection_cache.clear()
+    _write_reflections(knowledge_dir, 1)
+
+    with TestClient(server.app) as client:
+        with client.websocket_connect("/ws/knowledge_base") as first, \
+                client.websocket_connect("/ws/knowledge_base") as second:
+            assert first.receive_json()["type"] == "snapshot"
+            assert second.receive_json()["type"] == "snapshot"
+            assert server.kb_watcher.subscriber_count == 2
+
+            (knowledge_dir / "new.json").write_text(
+                json.dumps({"id": "new", "reflection": "fresh", "embedding": [0.1]}), encoding="utf-8"
+            )
+            assert first.receive_json()["data"]["id"] == "new"
+            assert second.receive_json()["data"]["id"] == "new"
+
+            (knowledge_dir / "new.json").unlink()
+            assert first.receive_json() == {"type": "delete", "data": {"id": "new"}}
+            assert second.receive_json() == {"type": "delete", "data": {"id": "new"}}
+
+    assert server.kb_watcher.subscriber_count == 0
+
+
+async def test_watcher_resyncs_slow_clients(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "WATCHER_QUEUE_SIZE", 2)
+    monkeypatch.setattr(server, "_list_reflection_files", lambda: [])
+    watcher = server.KnowledgeBaseWatcher()
+    queue = await watcher.subscribe()
+
+    watcher.publish([{"type": "delete", "data": {"id": str(i)}} for i in range(5)])
+
+    assert queue.get_nowait() == {"type": "resync"}
+    assert queue.empty()
+    watcher.unsubscribe(queue)
+    assert watcher.subscriber_count == 0
@@ -0,0 +1,171 @@
+"""
+Tests for the fan-out execution mode (Send-based executor→judge chains).
+"""
+
+import asyncio
+import time
+
+import pytest
+
+
+def _strategy(i, status="active"):
+    return {"id": f"id{i}", "name": f"s{i}", "rationale": "r", "assumption": "a", "status": status,
+            "trajectory": [], "score": 0.0, "child_quota": 1}
+
+
+def _state(strategies, decisions, mode="fanout"):
+    return {
+        "problem_state": "p",
+        "strategies": strategies,
+        "architect_decisions": decisions,
+        "config": {"execution_mode": mode},
+        "history": [],
+        "judge_cache": {},
+    }
+
+
+class TestChainResultsReducer:
+    def test_append_dedupe_and_reset(self):
+        from src.core.state import merge_chain_results
+
+        a, b = {"task_id": "a"}, {"task_id": "b"}
+        merged = merge_chain_results([a], [b])
+        assert merged == [a, b]
+        # 其他节点返回 {**state} 时不会重复追加
+        assert merge_chain_results(merged, merged) == [a, b]
+        assert merge_chain_results(merged, None) == []
+
+
+class TestRouting:
+    """ArchitectScheduler routes to the phased Executor or fans out one chain per strategy."""
+
+    def test_phased_mode_uses_executor(self):
+        from src.agents.strategy_chain import route_after_architect
+
+        state = _state([_strategy(0)], [{"strategy_id": "id0"}], mode="phased")
+        assert route_after_architect(state) == "executor"
+
+    def test_fanout_sends_one_chain_per_strategy(self):
+        from src.agents.strategy_chain import route_after_architect
+
+        strategies = [_strategy(0), _strategy(1), _strategy(2, status="pruned")]
+        decisions = [
+            {"strategy_id": "id0", "executor_instruction": "a"},
+            {"strategy_id": "id0", "executor_instruction": "b"},
+            {"strategy_id": None, "executor_instruction": "synthesize"},
+        ]
+        sends = route_after_architect(_state(strategies, decisions))
+
+        assert [s.node for s in sends] == ["strategy_chain", "strategy_chain"]
+        payloads = {s.arg["strategy"]["id"]: s.arg for s in sends}
+        assert [d["executor_instruction"] for d in payloads["id0"]["decisions"]] == ["a", "b"]
+        assert payloads["id1"]["decisions"] == []  # 只评分的链
+        assert payloads["id0"]["judge_context"]
+        assert len({s.arg["task_id"] for s in sends}) == 2
+
+    def test_nothing_to_fan_out_goes_to_merge(self):
+        from src.agents.strategy_chain import route_after_architect
+
+        state = _state([_strategy(0, status="pruned")], [{"strategy_id": None}])
+        assert route_after_architect(state) == "chain_merge"
+
+    def test_execution_mode_resolution(self, monkeypatch):
+        from src.agents.strategy_chain import get_execution_mode
+
+        monkeypatch.setenv("EXECUTION_MODE", "fanout")
+        assert get_execution_mode({}) == "fanout"
+        assert get_execution_mode({"execution_mode": "phased"}) == "phased"
+        assert get_execution_mode({"execution_mode": "bogus"}) == "phased"
+
+
+@pytest.fixture
+def slow_chain(monkeypatch):
+    """Fake Executor / Judge: each task sleeps, each judged strategy gets a fixed score."""
+    from src.agents import executor, strategy_chain
+
+    monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+    monkeypatch.setattr(executor.kb_write_queue, "enqueue_strategy_archive", lambda **kwargs: "queued")
+
+    async def fake_single(problem, strategy, decision, api_key, use_mock=False, thinking_level="HIGH", on_text=None):
+        await asyncio.sleep(decision.get("delay", 0.2))
+        variant = {"strategy_name": f"{strategy['name']} variant"} if decision.get("variant") else None
+        return {"execution_result": decision["executor_instruction"], "variant_strategy": variant}
+
+    async def fake_judge(state):
+        for s in state["strategies"]:
+            s["score"] = 0.7
+        cache = {s["id"]: {"key": "k", "score": 7.0, "reasoning": "", "reuses": 0} for s in state["strategies"]}
+        return {**state, "judge_cache": cache}
+
+    monkeypatch.setattr(executor, "execute_single_task_async", fake_single)
+    monkeypatch.setattr(strategy_chain, "judge_node_async", fake_judge)
+
+
+def _fanout_graph():
+    """Architect → Send(strategy_chain) → chain_merge, wired exactly like the main graph."""
+    from langgraph.graph import END, StateGraph
+
+    from src.agents.strategy_chain import chain_merge_node_async, route_after_architect, strategy_chain_node_async
+    from src.core.state import DeepThinkState
+
+    workflow = StateGraph(DeepThinkState)
+    workflow.add_node("architect_scheduler", lambda state: state)
+    workflow.add_node("strategy_chain", strategy_chain_node_async)
+    workflow.add_node("chain_merge", chain_merge_node_async)
+    workflow.set_entry_point("architect_scheduler")
+    workflow.add_conditional_edges("architect_scheduler", route_after_architect, ["strategy_chain", "chain_merge"])
+    workflow.add_edge("strategy_chain", "chain_merge")
+    workflow.add_edge("chain_merge", END)
+    return workflow.compile()
+
+
+class TestFanoutExecution:
+    """Chains run concurrently and are merged deterministically before Evolution."""
+
+    async def test_chains_overlap_and_merge_in_strategy_order(self, slow_chain):
+        strategies = [_strategy(i) for i in range(4)]
+        decisions = [
+            # 完成顺序与策略顺序相反
+            {"strategy_id": f"id{i}", "executor_instruction": f"task {i}", "delay": 0.3 - 0.05 * i, "variant": i == 1}
+            for i in range(4)
+        ] + [{"strategy_id": None, "executor_instruction": "synthesize"}]
+
+        started = time.monotonic()
+        result = await _fanout_graph().ainvoke(_state(strategies, decisions))
+        elapsed = time.monotonic() - started
+
+        # 墙钟时间接近最慢的单条链，而不是各链之和
+        assert elapsed < 0.6
+        names = [s["name"] for s in result["strategies"]]
+        assert names == ["s0", "s1", "s2", "s3", "s1 variant"]
+        assert all(s["score"] == 0.7 for s in result["strategies"] if s["status"] == "active")
+        assert result["strategies"][2]["trajectory"] == ["[Executor] task 2..."]
+        assert set(result["judge_cache"]) == {s["id"] for s in result["strategies"]}
+        assert result["report_version"] == 1  # 综合任务在屏障处执行
+        assert result["architect_decisions"] == []
+        assert result["chain_results"] == []
+
+    def test_full_graph_runs_in_fanout_mode(self, monkeypatch):
+        from src.core.graph_builder import build_deep_think_graph
+
+        monkeypatch.setenv("USE_MOCK_AGENTS", "true")
+        monkeypatch.setenv("USE_MOCK_EMBEDDING", "true")
+        monkeypatch.setenv("MOCK_EMBEDDING_DIM", "8")
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+
+        state = {
+            "problem_state": "p", "subtasks": [], "information_needs": [], "strategies": [],
+            "research_context": None, "research_status": "insufficient", "spatial_entropy": 0.0,
+            "effective_temperature": 0.0, "normalized_temperature": 0.0,
+            "config": {"max_iterations": 2, "execution_mode": "fanout", "entropy_change_threshold": 0.0},
+            "virtual_filesystem": {}, "history": [], "iteration_count": 0, "research_iteration": 0,
+            "judge_context": None, "architect_decisions": [],
+        }
+        app = build_deep_think_graph(use_async=False)
+        nodes = [name for chunk in app.stream(state, stream_mode="updates", config={"recursion_limit": 100})
+                 for name in chunk]
+
+        loop = nodes[nodes.index("propagation"):]
+        assert "strategy_chain" in loop and "chain_merge" in loop
+        assert "executor" not in loop and "judge" not in loop
+        assert nodes[-1] == "evolution"